@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgets', '0004_remove_category_old_update_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='budget',
+            name='end_date',
+            field=models.DateField(blank=True, null=True, verbose_name='Fecha de fin'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgets', '0005_budget_end_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='budget',
+            index=models.Index(fields=['user', 'updated_at'], name='budget_user_updated_idx'),
+        ),
+    ]
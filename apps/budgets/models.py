@@ -47,6 +47,9 @@ class Budget(models.Model):
         verbose_name_plural = 'Presupuestos'
         unique_together = ['user', 'category']
         ordering = ['category']
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='budget_user_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.category.name} - {self.amount}"
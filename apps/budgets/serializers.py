@@ -1,9 +1,9 @@
 from rest_framework import serializers
-from apps.categories.models import Category
+from apps.finances.resolver import RelatedObjectsMixin
 from .models import Budget
 
 
-class BudgetSerializer(serializers.ModelSerializer):
+class BudgetSerializer(RelatedObjectsMixin, serializers.ModelSerializer):
     """Serializer para Budget."""
 
     category = serializers.UUIDField()
@@ -25,17 +25,16 @@ class BudgetSerializer(serializers.ModelSerializer):
         user = self.context['request'].user
 
         # Buscar categoría del usuario
-        validated_data['category'] = Category.objects.get(id=category_id, user=user)
+        validated_data['category'] = self.resolve('category', category_id, 'category')
         validated_data['user'] = user
 
         return super().create(validated_data)
 
     def update(self, instance, validated_data):
         category_id = validated_data.pop('category', None)
-        user = self.context['request'].user
 
         if category_id is not None:
-            validated_data['category'] = Category.objects.get(id=category_id, user=user)
+            validated_data['category'] = self.resolve('category', category_id, 'category')
 
         return super().update(instance, validated_data)
 
@@ -0,0 +1,27 @@
+"""
+Comando para eliminar los registros de eliminaciones (Tombstone) más antiguos
+que la retención de la sincronización (TOMBSTONE_RETENTION_DAYS). Los
+clientes con un token anterior ya reciben todos sus datos al sincronizar.
+
+Uso:
+    python manage.py purge_tombstones
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.core.models import Tombstone
+from apps.core.sync import TOMBSTONE_RETENTION_DAYS
+
+
+class Command(BaseCommand):
+    help = 'Elimina los registros de eliminaciones más antiguos que la retención de la sincronización'
+
+    def handle(self, *args, **options):
+        deleted, _ = Tombstone.objects.filter(
+            deleted_at__lt=timezone.now() - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+        ).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Eliminados {deleted} registros de más de {TOMBSTONE_RETENTION_DAYS} días'
+        ))
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.db import models
+
+
+class Tombstone(models.Model):
+    """
+    Registro de un elemento eliminado, para que la sincronización incremental
+    (/api/sync/) informe las eliminaciones a los clientes.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='tombstones',
+        verbose_name='Usuario'
+    )
+    section = models.CharField('Sección', max_length=50)
+    object_id = models.CharField('ID del elemento', max_length=36)
+    deleted_at = models.DateTimeField('Fecha de eliminación', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Eliminación'
+        verbose_name_plural = 'Eliminaciones'
+        ordering = ['deleted_at']
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.section} {self.object_id}"
@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models.signals import post_delete, pre_delete
+from django.utils import timezone
+
+from .models import Tombstone
+from .sync import SECTION_NAMES
+
+
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    """Registra la eliminación para la sincronización (salvo al eliminar el usuario)."""
+    if isinstance(origin, get_user_model()):
+        return
+    Tombstone.objects.create(user_id=instance.user_id, section=SECTION_NAMES[sender], object_id=str(instance.pk))
+
+
+def touch_set_null_relations(sender, instance, origin=None, **kwargs):
+    """
+    Marca como actualizados los elementos sincronizados que quedarán con la
+    relación en NULL (p. ej. los gastos de una tarjeta eliminada): Django los
+    modifica con un UPDATE que no actualiza updated_at.
+    """
+    if isinstance(origin, get_user_model()):
+        return
+    now = timezone.now()
+    for relation in instance._meta.related_objects:
+        if relation.on_delete is models.SET_NULL and relation.related_model in SECTION_NAMES:
+            relation.related_model._base_manager.filter(
+                **{relation.field.name: instance}
+            ).update(updated_at=now)
+
+
+for model in SECTION_NAMES:
+    post_delete.connect(record_tombstone, sender=model, dispatch_uid=f'tombstone_post_delete_{model.__name__}')
+    pre_delete.connect(touch_set_null_relations, sender=model, dispatch_uid=f'sync_pre_delete_{model.__name__}')
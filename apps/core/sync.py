@@ -0,0 +1,137 @@
+"""
+Sincronización incremental para clientes offline (GET /api/sync/).
+
+Cada sección es un modelo del usuario con índice (user, updated_at): con
+?since=<token> se envían solo las filas con updated_at desde ese momento
+(un rango sobre el índice) y los ids eliminados desde entonces (Tombstone).
+Sin token, o con uno más antiguo que la retención de las eliminaciones, se
+envía todo y `full` indica que el cliente debe reemplazar sus datos.
+
+Las cuentas bancarias se envían siempre completas (sin filtrar por
+updated_at): sus totales de fijos y su calculated_balance cambian al editar un
+fijo o al pasar su day_of_month sin que la cuenta se modifique, y son pocas.
+
+El token es el instante en que empezó la sincronización anterior. Las filas
+se piden desde SYNC_OVERLAP antes del token, para no perder cambios de
+transacciones que aún no habían terminado; el cliente aplica los cambios por
+id, así que recibir una fila dos veces no tiene efecto.
+"""
+from collections import namedtuple
+from datetime import timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.budgets.models import Budget
+from apps.budgets.serializers import BudgetSerializer
+from apps.finances.models import (
+    BankAccount, CreditCard, CreditCardPayment, CurrencyExchange, Expense, FixedExpense, FixedIncome, Income,
+)
+from apps.finances.serializers import (
+    BankAccountSerializer,
+    CreditCardPaymentSerializer,
+    CreditCardSerializer,
+    CurrencyExchangeSerializer,
+    ExpenseSerializer,
+    FixedExpenseSerializer,
+    FixedIncomeSerializer,
+    IncomeSerializer,
+)
+from apps.goals.models import Objective
+from apps.goals.serializers import ObjectiveSerializer
+from apps.installments.models import Installment
+from apps.installments.serializers import InstallmentSerializer
+
+from .models import Tombstone
+
+
+# Margen hacia atrás desde el token (transacciones en curso durante la sincronización anterior)
+SYNC_OVERLAP = timedelta(minutes=1)
+
+# Días que se guardan las eliminaciones; un token más antiguo recibe todo de nuevo
+TOMBSTONE_RETENTION_DAYS = 90
+
+# Formato del token (UTC, sin '+' para poder usarlo tal cual en la URL)
+TOKEN_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+
+
+def _serialized(serializer_class):
+    """Serializa instancias (secciones con relaciones anidadas o totales anotados)."""
+    def serialize(queryset):
+        return serializer_class(queryset, many=True).data
+    return serialize
+
+
+def _mapped(serializer_class):
+    """Serializa filas de .values() con row_mapper(), igual que los listados."""
+    def serialize(queryset):
+        serializer = serializer_class()
+        to_dict = serializer.row_mapper()
+        return [to_dict(row) for row in queryset.values(*serializer.value_columns())]
+    return serialize
+
+
+# incremental=False: la sección se envía completa también con ?since=
+SyncSection = namedtuple('SyncSection', ['name', 'model', 'prepare', 'serialize', 'incremental'], defaults=[True])
+
+
+def _unchanged(queryset):
+    return queryset
+
+
+SYNC_SECTIONS = (
+    SyncSection('bank_accounts', BankAccount, lambda queryset: queryset.with_balances(),
+                _serialized(BankAccountSerializer), incremental=False),
+    SyncSection('credit_cards', CreditCard, _unchanged, _serialized(CreditCardSerializer)),
+    SyncSection('expenses', Expense, _unchanged, _mapped(ExpenseSerializer)),
+    SyncSection('incomes', Income, _unchanged, _mapped(IncomeSerializer)),
+    SyncSection('fixed_expenses', FixedExpense, _unchanged, _mapped(FixedExpenseSerializer)),
+    SyncSection('fixed_incomes', FixedIncome, _unchanged, _mapped(FixedIncomeSerializer)),
+    SyncSection('credit_card_payments', CreditCardPayment, _unchanged, _mapped(CreditCardPaymentSerializer)),
+    SyncSection('currency_exchanges', CurrencyExchange, _unchanged, _mapped(CurrencyExchangeSerializer)),
+    SyncSection('budgets', Budget, lambda queryset: queryset.select_related('category'),
+                _serialized(BudgetSerializer)),
+    SyncSection('installments', Installment, _unchanged, _serialized(InstallmentSerializer)),
+    SyncSection('objectives', Objective,
+                lambda queryset: queryset.prefetch_related('key_results', 'key_results__milestones'),
+                _serialized(ObjectiveSerializer)),
+)
+
+SECTION_NAMES = {section.model: section.name for section in SYNC_SECTIONS}
+
+
+def parse_token(token):
+    """Instante de un token de sincronización, o None si no es válido."""
+    since = parse_datetime(token)
+    if since is None or timezone.is_naive(since):
+        return None
+    return since
+
+
+def sync_changes(user, since=None):
+    """
+    Cambios del usuario desde `since` (datetime), o todos sus datos si es
+    None o anterior a la retención de las eliminaciones.
+    """
+    now = timezone.now()
+    if since is not None and since < now - timedelta(days=TOMBSTONE_RETENTION_DAYS):
+        since = None
+
+    deleted = {section.name: [] for section in SYNC_SECTIONS}
+    if since is not None:
+        start = since - SYNC_OVERLAP
+        for section, object_id in Tombstone.objects.filter(
+            user=user, deleted_at__gte=start
+        ).values_list('section', 'object_id'):
+            deleted.setdefault(section, []).append(object_id)
+
+    data = {'token': now.astimezone(dt_timezone.utc).strftime(TOKEN_FORMAT), 'full': since is None}
+    for section in SYNC_SECTIONS:
+        queryset = section.model.objects.filter(user=user)
+        if since is not None and section.incremental:
+            queryset = queryset.filter(updated_at__gte=start)
+        data[section.name] = {
+            'updated': section.serialize(section.prepare(queryset.order_by('updated_at'))),
+            'deleted': deleted[section.name],
+        }
+    return data
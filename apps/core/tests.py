@@ -0,0 +1,79 @@
+from datetime import date, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.finances.models import BankAccount, CreditCard, Expense, FixedExpense
+from apps.users.models import User
+
+from .sync import TOKEN_FORMAT
+
+
+class SyncTests(TestCase):
+    """?since= retorna solo lo modificado y lo eliminado desde el token."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='sync@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.old = self.expense('Antiguo')
+        self.removed = self.expense('Eliminado')
+        Expense.objects.filter(pk__in=[self.old.pk, self.removed.pk]).update(
+            updated_at=timezone.now() - timedelta(hours=2)
+        )
+        self.token = (timezone.now() - timedelta(minutes=30)).astimezone(dt_timezone.utc).strftime(TOKEN_FORMAT)
+
+    def expense(self, description):
+        return Expense.objects.create(
+            user=self.user, amount=Decimal('10.00'), description=description, date=date.today(),
+        )
+
+    def sync(self, **params):
+        response = self.client.get('/api/sync/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_since_returns_updates_and_tombstones(self):
+        new = self.expense('Nuevo')
+        removed_id = str(self.removed.pk)
+        self.removed.delete()
+
+        data = self.sync(since=self.token)
+        self.assertFalse(data['full'])
+        self.assertEqual([row['id'] for row in data['expenses']['updated']], [str(new.pk)])
+        self.assertEqual(data['expenses']['deleted'], [removed_id])
+        self.assertEqual(data['incomes'], {'updated': [], 'deleted': []})
+
+    def test_deleted_card_touches_its_expenses(self):
+        card = CreditCard.objects.create(
+            user=self.user, name='Visa', last_four_digits='1234', limit=Decimal('1000.00'),
+            cut_off_date=20, payment_date=5,
+        )
+        Expense.objects.filter(pk=self.old.pk).update(credit_card=card, updated_at=timezone.now() - timedelta(hours=2))
+        card_id = str(card.pk)
+        card.delete()
+
+        data = self.sync(since=self.token)
+        self.assertEqual([row['id'] for row in data['expenses']['updated']], [str(self.old.pk)])
+        self.assertEqual(data['credit_cards']['deleted'], [card_id])
+
+    def test_bank_accounts_follow_fixed_expense_edits(self):
+        account = BankAccount.objects.create(user=self.user, name='Ahorros', balance=Decimal('1000.00'))
+        fixed = FixedExpense.objects.create(
+            user=self.user, name='Gimnasio', amount=Decimal('80.00'), day_of_month=1, bank_account=account,
+        )
+        BankAccount.objects.filter(pk=account.pk).update(updated_at=timezone.now() - timedelta(hours=2))
+        fixed.amount = Decimal('120.00')
+        fixed.save()
+
+        accounts = self.sync(since=self.token)['bank_accounts']['updated']
+        self.assertEqual([row['id'] for row in accounts], [str(account.pk)])
+        self.assertEqual(Decimal(str(accounts[0]['total_fixed_expenses'])), Decimal('120.00'))
+
+    def test_without_since_returns_everything(self):
+        data = self.sync()
+        self.assertTrue(data['full'])
+        self.assertEqual(len(data['expenses']['updated']), 2)
+        self.assertEqual(self.client.get('/api/sync/', {'since': 'ayer'}).status_code, 400)
@@ -0,0 +1,26 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .sync import parse_token, sync_changes
+
+
+class SyncView(APIView):
+    """
+    Sincronización incremental: GET /api/sync/?since=<token> retorna, por
+    sección, los elementos creados o modificados y los ids eliminados desde
+    el token, y el token para la próxima sincronización. Sin since, retorna
+    todos los datos.
+    """
+
+    def get(self, request):
+        token = request.query_params.get('since')
+        since = None
+        if token:
+            since = parse_token(token)
+            if since is None:
+                return Response(
+                    {'error': 'since debe ser un token de sincronización válido'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        return Response(sync_changes(request.user, since))
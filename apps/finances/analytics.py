@@ -0,0 +1,172 @@
+"""
+Estadísticas de gastos e ingresos por rango de fechas.
+
+Una sola consulta agrupa los movimientos por periodo (día, semana o mes),
+moneda y categoría; las series por moneda y por categoría se arman en
+memoria a partir de esas filas. Por mes, los meses completos se leen de los
+resúmenes mensuales (MonthlyRollup) y solo los meses parciales de los bordes
+se agrupan desde los movimientos. Los montos nunca se suman entre monedas.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+from .balance_history import month_start, next_month
+
+
+GRANULARITIES = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+# Cantidad máxima de periodos de una serie
+MAX_STATS_PERIODS = 731
+
+
+def period_start(day, granularity):
+    """Retorna el inicio del periodo que contiene el día."""
+    if granularity == 'month':
+        return month_start(day)
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def next_period(day, granularity):
+    """Retorna el inicio del periodo siguiente."""
+    if granularity == 'month':
+        return next_month(day)
+    if granularity == 'week':
+        return day + timedelta(days=7)
+    return day + timedelta(days=1)
+
+
+def count_periods(date_from, date_to, granularity):
+    """Cantidad de periodos que cubren el rango, sin construirlos."""
+    if granularity == 'month':
+        return (date_to.year - date_from.year) * 12 + date_to.month - date_from.month + 1
+    if granularity == 'week':
+        return (date_to - period_start(date_from, granularity)).days // 7 + 1
+    return (date_to - date_from).days + 1
+
+
+def periods_between(date_from, date_to, granularity):
+    """Lista de inicios de periodo que cubren el rango."""
+    periods = []
+    current = period_start(date_from, granularity)
+    while current <= date_to:
+        periods.append(current)
+        current = next_period(current, granularity)
+    return periods
+
+
+def grouped_rows(queryset, granularity):
+    """Totales de los movimientos agrupados por (periodo, moneda, categoría)."""
+    return (
+        queryset
+        .annotate(period=GRANULARITIES[granularity]('date'))
+        .order_by()
+        .values('period', 'currency', 'category_id')
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+
+
+def monthly_rows(queryset, rollups, date_from, date_to):
+    """
+    Filas por (mes, moneda, categoría): los meses completos del rango salen de
+    los resúmenes y los parciales de los bordes de los movimientos.
+    """
+    first_full = date_from if date_from.day == 1 else next_month(date_from)
+    day_after = date_to + timedelta(days=1)
+    after_last_full = day_after if day_after.day == 1 else month_start(date_to)
+
+    if first_full >= after_last_full:
+        return list(grouped_rows(queryset.filter(date__gte=date_from, date__lte=date_to), 'month'))
+
+    rows = list(
+        rollups
+        .filter(month__gte=first_full, month__lt=after_last_full)
+        .values('currency', 'category_id', 'total', 'count', period=F('month'))
+    )
+    edges = Q(date__gte=date_from, date__lt=first_full) | Q(date__gte=after_last_full, date__lte=date_to)
+    if date_from < first_full or after_last_full <= date_to:
+        rows.extend(grouped_rows(queryset.filter(edges), 'month'))
+    return rows
+
+
+def month_stats(rollups, start):
+    """
+    Total y totales por nombre de categoría del mes que empieza en `start`,
+    leídos de `rollups` (MonthlyRollup ya filtrado por usuario y tipo) en una
+    sola consulta.
+    """
+    category_totals = (
+        rollups
+        .filter(month=start)
+        .values('category__id', 'category__name')
+        .annotate(total=Sum('total'))
+    )
+
+    monthly_total = 0
+    by_category = {}
+    for item in category_totals:
+        monthly_total += item['total']
+        by_category[item['category__name']] = item['total']
+
+    return {
+        'monthly_total': monthly_total,
+        'by_category': by_category,
+        'month': start.month,
+        'year': start.year,
+    }
+
+
+def range_stats(queryset, date_from, date_to, granularity, rollups=None):
+    """
+    Series de totales por moneda y por (categoría, moneda) entre date_from y
+    date_to (ambos inclusive), alineadas con la lista `periods`. Con
+    granularity='month', los meses completos se leen de `rollups`
+    (MonthlyRollup ya filtrado por usuario y tipo) si se indica.
+    """
+    periods = periods_between(date_from, date_to, granularity)
+    position = {period: index for index, period in enumerate(periods)}
+
+    if granularity == 'month' and rollups is not None:
+        rows = monthly_rows(queryset, rollups, date_from, date_to)
+    else:
+        rows = grouped_rows(queryset.filter(date__gte=date_from, date__lte=date_to), granularity)
+
+    def empty_series():
+        return {'total': Decimal('0'), 'count': 0, 'series': [Decimal('0')] * len(periods)}
+
+    by_currency = defaultdict(empty_series)
+    by_category = defaultdict(empty_series)
+    for row in rows:
+        index = position[row['period']]
+        category_key = (row['category_id'], row['currency'])
+        for entry in (by_currency[row['currency']], by_category[category_key]):
+            entry['total'] += row['total']
+            entry['count'] += row['count']
+            entry['series'][index] += row['total']
+
+    return {
+        'granularity': granularity,
+        'from': date_from.isoformat(),
+        'to': date_to.isoformat(),
+        'periods': [period.isoformat() for period in periods],
+        'by_currency': dict(sorted(by_currency.items())),
+        'by_category': [
+            {
+                'category_id': str(category_id) if category_id else None,
+                'currency': currency,
+                **entry,
+            }
+            for (category_id, currency), entry in sorted(
+                by_category.items(), key=lambda item: (item[0][1], -item[1]['total'])
+            )
+        ],
+    }
@@ -5,3 +5,6 @@ class FinancesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.finances'
     verbose_name = 'Finanzas'
+
+    def ready(self):
+        import apps.finances.signals  # noqa: F401
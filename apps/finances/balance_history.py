@@ -0,0 +1,225 @@
+"""
+Historial de saldos de cuentas bancarias basado en checkpoints mensuales.
+
+El saldo de una cuenta al final de un día es su balance inicial más los
+movimientos que cuentan para el libro (misma moneda, creados desde
+balance_updated_at) con fecha hasta ese día. Para no recorrer todo el
+historial, cada punto parte del checkpoint mensual más cercano y solo suma
+los movimientos posteriores a él.
+"""
+import calendar
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import BankAccount, BankAccountCheckpoint, CreditCardPayment, CurrencyExchange, Expense, Income
+
+
+# Campos del libro que suman al saldo; el resto lo restan
+INFLOW_FIELDS = {'ledger_income', 'ledger_exchanges_in'}
+
+# Por origen: (modelo, campo de cuenta, campo de monto, dirección, filtra por moneda)
+MOVEMENT_SOURCES = (
+    (Expense, 'bank_account', 'amount', 'outflow', True),
+    (Income, 'bank_account', 'amount', 'inflow', True),
+    (CreditCardPayment, 'bank_account', 'amount', 'outflow', True),
+    (CurrencyExchange, 'from_account', 'amount_from', 'outflow', False),
+    (CurrencyExchange, 'to_account', 'amount_to', 'inflow', False),
+)
+
+# Rango máximo de días permitido para la serie diaria
+MAX_DAILY_POINTS = 731
+
+# Rango máximo de meses permitido para la serie mensual
+MAX_MONTHLY_POINTS = 240
+
+
+def month_start(d):
+    """Retorna el primer día del mes de la fecha."""
+    return d.replace(day=1)
+
+
+def month_end(d):
+    """Retorna el último día del mes de la fecha."""
+    return d.replace(day=calendar.monthrange(d.year, d.month)[1])
+
+
+def next_month(d):
+    """Retorna el primer día del mes siguiente."""
+    return month_end(d) + timedelta(days=1)
+
+
+def shift_checkpoints(entries):
+    """
+    Ajusta los checkpoints existentes con aportes al libro ya aplicados.
+
+    Un aporte con fecha en el mes M modifica el acumulado de M y de todos los
+    meses posteriores: un UPDATE por cuenta, mes y dirección.
+    """
+    deltas = defaultdict(Decimal)
+    for entry in entries:
+        direction = 'inflow' if entry.field in INFLOW_FIELDS else 'outflow'
+        deltas[(entry.account_id, month_start(entry.date), direction)] += entry.amount
+
+    for (account_id, month, direction), amount in deltas.items():
+        if amount:
+            BankAccountCheckpoint.objects.filter(account_id=account_id, month__gte=month).update(
+                **{direction: F(direction) + amount}
+            )
+
+
+def _flows(account, after, until, bucket):
+    """
+    Suma entradas y salidas de la cuenta con fecha en (after, until], agrupadas
+    por mes (bucket='month') o por día (bucket='day'). Una consulta por origen.
+    """
+    flows = defaultdict(lambda: {'inflow': Decimal('0'), 'outflow': Decimal('0')})
+
+    for model, account_field, amount_field, direction, match_currency in MOVEMENT_SOURCES:
+        queryset = model.objects.filter(**{account_field: account}, date__lte=until)
+        if after is not None:
+            queryset = queryset.filter(date__gt=after)
+        if match_currency:
+            queryset = queryset.filter(currency=account.currency)
+        if account.balance_updated_at:
+            queryset = queryset.filter(created_at__gte=account.balance_updated_at)
+
+        if bucket == 'month':
+            queryset = queryset.annotate(bucket=TruncMonth('date'))
+        else:
+            queryset = queryset.annotate(bucket=F('date'))
+
+        for row in queryset.order_by().values('bucket').annotate(total=Sum(amount_field)):
+            flows[row['bucket']][direction] += row['total'] or 0
+
+    return flows
+
+
+def _balance(account, inflow, outflow):
+    """Aplica las opciones de la cuenta a los acumulados."""
+    result = Decimal(str(account.balance))
+    if account.subtract_expenses:
+        result -= outflow
+    if account.add_incomes:
+        result += inflow
+    return result
+
+
+def monthly_totals(account, first_month, last_month, today):
+    """
+    Retorna {mes: (inflow, outflow)} acumulados al cierre de cada mes del rango.
+
+    Usa los checkpoints existentes y calcula los faltantes desde el checkpoint
+    anterior más cercano con una consulta agrupada por mes. Los meses ya
+    cerrados que faltaban se guardan como nuevos checkpoints, salvo los
+    anteriores al primer movimiento de la cuenta.
+
+    Mientras calcula e inserta los faltantes bloquea la fila de la cuenta
+    (select_for_update), la misma que actualiza apply_ledger_changes antes de
+    shift_checkpoints: un movimiento que se guarda a la vez o ya está en los
+    flujos leídos o se traslada al checkpoint nuevo, nunca queda fuera.
+    """
+    months = []
+    month = first_month
+    while month <= last_month:
+        months.append(month)
+        month = next_month(month)
+
+    checkpoints = _checkpoints(account, first_month, last_month)
+    if all(month in checkpoints for month in months):
+        return {month: (checkpoints[month].inflow, checkpoints[month].outflow) for month in months}
+
+    with transaction.atomic():
+        BankAccount.objects.select_for_update().filter(pk=account.pk).exists()
+        # Releídos con el bloqueo: otro proceso pudo crearlos o trasladarlos
+        checkpoints = _checkpoints(account, first_month, last_month)
+        return _compute_monthly_totals(account, first_month, last_month, today, months, checkpoints)
+
+
+def _checkpoints(account, first_month, last_month):
+    """Checkpoints de la cuenta en el rango, por mes."""
+    return {
+        checkpoint.month: checkpoint
+        for checkpoint in account.checkpoints.filter(month__gte=first_month, month__lte=last_month)
+    }
+
+
+def _compute_monthly_totals(account, first_month, last_month, today, months, checkpoints):
+    """Acumulados de monthly_totals; guarda los checkpoints faltantes de meses cerrados."""
+    missing = [month for month in months if month not in checkpoints]
+    if not missing:
+        return {month: (checkpoints[month].inflow, checkpoints[month].outflow) for month in months}
+
+    base = account.checkpoints.filter(month__lt=missing[0]).order_by('-month').first()
+    inflow = base.inflow if base else Decimal('0')
+    outflow = base.outflow if base else Decimal('0')
+    walk_from = next_month(base.month) if base else None
+    flows = _flows(account, month_end(base.month) if base else None, month_end(missing[-1]), 'month')
+    # Sin checkpoint previo los flujos leídos empiezan en el primer movimiento:
+    # los meses anteriores no se guardan
+    save_from = base.month if base else min(flows, default=None)
+
+    if walk_from is None:
+        # Sin checkpoint previo: el acumulado del primer mes incluye todo lo anterior
+        earlier = [bucket for bucket in flows if bucket < first_month]
+        for bucket in earlier:
+            inflow += flows[bucket]['inflow']
+            outflow += flows[bucket]['outflow']
+        walk_from = first_month
+    elif base.month >= first_month:
+        # Los meses del rango hasta el checkpoint base ya tienen checkpoint
+        walk_from = first_month
+
+    totals = {}
+    to_create = []
+    month = walk_from
+    while month <= last_month:
+        if month in checkpoints:
+            inflow, outflow = checkpoints[month].inflow, checkpoints[month].outflow
+        elif month <= missing[-1]:
+            inflow += flows[month]['inflow']
+            outflow += flows[month]['outflow']
+            if month_end(month) < today and save_from is not None and month >= save_from:
+                to_create.append(BankAccountCheckpoint(
+                    account=account, month=month, inflow=inflow, outflow=outflow
+                ))
+        if month >= first_month:
+            totals[month] = (inflow, outflow)
+        month = next_month(month)
+
+    if to_create:
+        BankAccountCheckpoint.objects.bulk_create(to_create, ignore_conflicts=True)
+
+    return totals
+
+
+def monthly_series(account, date_from, date_to, today):
+    """Serie de saldos al cierre de cada mes entre date_from y date_to."""
+    totals = monthly_totals(account, month_start(date_from), month_start(date_to), today)
+    return [
+        {'date': month_end(month).isoformat(), 'balance': _balance(account, inflow, outflow)}
+        for month, (inflow, outflow) in sorted(totals.items())
+    ]
+
+
+def daily_series(account, date_from, date_to, today):
+    """Serie de saldos al final de cada día entre date_from y date_to."""
+    first_month = month_start(date_from)
+    previous_month = month_start(first_month - timedelta(days=1))
+
+    inflow, outflow = monthly_totals(account, previous_month, previous_month, today)[previous_month]
+    flows = _flows(account, month_end(previous_month), date_to, 'day')
+
+    points = []
+    day = first_month
+    while day <= date_to:
+        inflow += flows[day]['inflow']
+        outflow += flows[day]['outflow']
+        if day >= date_from:
+            points.append({'date': day.isoformat(), 'balance': _balance(account, inflow, outflow)})
+        day += timedelta(days=1)
+    return points
@@ -0,0 +1,422 @@
+"""
+Escenarios de rendimiento para `manage.py benchmark`.
+
+Cada escenario usa los datos de un usuario de benchmark (se siembran una sola
+vez y se reutilizan en ejecuciones posteriores) y compara variantes de una
+consulta: imprime el plan de ejecución y el tiempo mediano de cada una.
+teardown() elimina ese usuario y todo lo sembrado.
+"""
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.categories.models import Category
+from apps.installments.models import Installment
+
+from .filters import month_range
+from .models import (
+    BankAccount, CreditCard, Expense, FixedExpense, FixedExpenseOccurrence, FixedIncome, FixedIncomeOccurrence, Income,
+)
+from .projections import MAX_PROJECTION_MONTHS, load_inputs, project, projection
+from .rollups import ROLLUP_KINDS, rebuild_rollups
+from .search import DescriptionSearchFilter
+from .serializers import ExpenseSerializer, FixedExpenseSerializer, IncomeSerializer
+
+User = get_user_model()
+
+BENCHMARK_EMAIL = 'benchmark@midinero.local'
+
+# Vocabulario para descripciones variadas (la búsqueda necesita texto realista)
+DESCRIPTION_WORDS = (
+    ('Compra', 'Pago', 'Consumo', 'Suscripción', 'Recarga', 'Delivery', 'Cuota'),
+    ('Wong', 'Plaza Vea', 'Tottus', 'Metro', 'Rappi', 'Netflix', 'Spotify', 'Uber', 'Cabify',
+     'Starbucks', 'Inkafarma', 'Mifarma', 'Sodimac', 'Promart', 'Claro', 'Movistar', 'Entel',
+     'Luz del Sur', 'Sedapal', 'Cineplanet', 'Bembos', 'KFC', 'Pizza Hut', 'Saga Falabella'),
+    ('Miraflores', 'San Isidro', 'Surco', 'Barranco', 'Lince', 'online', 'app', ''),
+)
+
+# Escenarios registrados: nombre -> función(command, options)
+SCENARIOS = {}
+
+
+def scenario(name):
+    """Registra una función como escenario de benchmark."""
+    def register(function):
+        SCENARIOS[name] = function
+        return function
+    return register
+
+
+def benchmark_user():
+    """Retorna el usuario de benchmark, creándolo si no existe."""
+    user, created = User.objects.get_or_create(email=BENCHMARK_EMAIL)
+    if created:
+        user.set_unusable_password()
+        user.save(update_fields=['password'])
+    return user
+
+
+def teardown(command):
+    """
+    Elimina el usuario de benchmark y todos sus datos. Los gastos e ingresos
+    sembrados se borran con un DELETE directo: no tienen tarjeta ni cuenta y
+    sus resúmenes se eliminan con el usuario, así no hace falta cargarlos ni
+    emitir señales por cada fila.
+    """
+    user = User.objects.filter(email=BENCHMARK_EMAIL).first()
+    if user is None:
+        command.stdout.write('No hay usuario de benchmark')
+        return
+
+    with transaction.atomic():
+        FixedExpenseOccurrence.objects.filter(fixed_expense__user=user).delete()
+        FixedIncomeOccurrence.objects.filter(fixed_income__user=user).delete()
+        for model in (Expense, Income):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)} WHERE '
+                    f'{connection.ops.quote_name(model._meta.get_field("user").column)} = %s',
+                    [model._meta.get_field('user').get_db_prep_value(user.pk, connection)],
+                )
+        # Protegen sus categorías: se eliminan antes que el usuario
+        FixedExpense.objects.filter(user=user).delete()
+        FixedIncome.objects.filter(user=user).delete()
+        user.delete()
+    command.stdout.write(command.style.SUCCESS(f'Eliminado {BENCHMARK_EMAIL} con todos sus datos'))
+
+
+def benchmark_categories(user, count=12, kind='expense'):
+    """Retorna las categorías del tipo indicado del usuario de benchmark."""
+    categories = list(Category.objects.filter(user=user, type=kind))
+    if len(categories) < count:
+        Category.objects.bulk_create([
+            Category(user=user, name=f'Categoría {number}', icon='•', color='#64748b', type=kind)
+            for number in range(len(categories), count)
+        ], ignore_conflicts=True)
+        categories = list(Category.objects.filter(user=user, type=kind))
+    return categories
+
+
+def seed(command, model, user, rows, build, batch_size=10000):
+    """
+    Completa hasta `rows` filas del modelo para el usuario de benchmark con
+    bulk_create. build(randomizer) arma cada instancia; no deben tener tarjeta
+    ni cuenta, así no afectan libros ni consumos. Los resúmenes mensuales de
+    gastos e ingresos se reconstruyen al terminar.
+    """
+    existing = model.objects.filter(user=user).count()
+    if existing >= rows:
+        return
+
+    randomizer = random.Random(existing)
+    missing = rows - existing
+    command.stdout.write(f'Sembrando {missing} filas de {model._meta.verbose_name_plural} para {user.email}...')
+
+    while missing > 0:
+        batch = min(batch_size, missing)
+        model.objects.bulk_create([build(randomizer) for _ in range(batch)], batch_size=batch_size)
+        missing -= batch
+
+    # bulk_create no aplica deltas: los resúmenes mensuales se recalculan
+    if model.__name__ in ROLLUP_KINDS:
+        rebuild_rollups([user])
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+
+def benchmark_description(randomizer):
+    """Descripción aleatoria del estilo de un estado de cuenta."""
+    return ' '.join(word for word in (randomizer.choice(words) for words in DESCRIPTION_WORDS) if word)
+
+
+def seed_expenses(command, user, rows, years=5):
+    """Completa hasta `rows` gastos repartidos en los últimos `years` años."""
+    categories = benchmark_categories(user)
+    today = date.today()
+
+    def build(randomizer):
+        return Expense(
+            user=user,
+            amount=Decimal(randomizer.randint(100, 50000)) / 100,
+            currency=randomizer.choice(('PEN', 'PEN', 'PEN', 'USD')),
+            category=randomizer.choice(categories),
+            description=benchmark_description(randomizer),
+            date=today - timedelta(days=randomizer.randint(0, years * 365)),
+        )
+    seed(command, Expense, user, rows, build)
+
+
+def seed_incomes(command, user, rows, years=5):
+    """Completa hasta `rows` ingresos repartidos en los últimos `years` años."""
+    categories = benchmark_categories(user, kind='income')
+    today = date.today()
+
+    def build(randomizer):
+        return Income(
+            user=user,
+            amount=Decimal(randomizer.randint(1000, 900000)) / 100,
+            currency=randomizer.choice(('PEN', 'PEN', 'USD')),
+            category=randomizer.choice(categories),
+            description='Ingreso de benchmark',
+            date=today - timedelta(days=randomizer.randint(0, years * 365)),
+        )
+    seed(command, Income, user, rows, build)
+
+
+def seed_fixed_expenses(command, user, rows):
+    """Completa hasta `rows` gastos fijos."""
+    categories = benchmark_categories(user)
+
+    def build(randomizer):
+        return FixedExpense(
+            user=user,
+            name='Gasto fijo de benchmark',
+            amount=Decimal(randomizer.randint(1000, 90000)) / 100,
+            currency=randomizer.choice(('PEN', 'USD')),
+            category=randomizer.choice(categories),
+            day_of_month=randomizer.randint(1, 28),
+        )
+    seed(command, FixedExpense, user, rows, build)
+
+
+def explain(queryset):
+    """Plan de ejecución del queryset (con tiempos reales en PostgreSQL)."""
+    if connection.vendor == 'postgresql':
+        return queryset.explain(analyze=True, buffers=True)
+    return queryset.explain()
+
+
+def median_ms(function, repeat):
+    """Tiempo mediano en milisegundos de `repeat` ejecuciones."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def compare(command, title, variants, repeat, show_plans=True):
+    """Imprime plan y tiempo mediano de cada variante (etiqueta, queryset)."""
+    command.stdout.write(command.style.MIGRATE_HEADING(f'\n{title}'))
+    for label, queryset in variants:
+        elapsed = median_ms(lambda: list(queryset.all()), repeat)
+        command.stdout.write(command.style.SUCCESS(f'  {label}: {elapsed:.2f} ms (mediana de {repeat})'))
+        if show_plans:
+            for line in explain(queryset).splitlines():
+                command.stdout.write(f'      {line}')
+
+
+@contextmanager
+def without_indexes(model, names):
+    """
+    Elimina temporalmente índices de un modelo dentro de una transacción que
+    se revierte al salir. Solo en PostgreSQL, donde el DDL es transaccional.
+    """
+    indexes = [index for index in model._meta.indexes if index.name in names]
+    with transaction.atomic():
+        with connection.schema_editor(atomic=False) as editor:
+            for index in indexes:
+                editor.remove_index(model, index)
+        try:
+            yield
+        finally:
+            transaction.set_rollback(True)
+
+
+@scenario('date_filters')
+def date_filters(command, options):
+    """Filtros por mes/año con extracción de fecha frente a rangos, con y sin índices compuestos."""
+    user = benchmark_user()
+    seed_expenses(command, user, options['rows'] or 1_000_000)
+    repeat = options['repeat']
+
+    today = date.today()
+    start, end = month_range(today.year, today.month)
+    category = benchmark_categories(user)[0]
+    base = Expense.objects.filter(user=user).order_by('-date', '-created_at')
+
+    def variants():
+        return [
+            ('month/year con extracción (date__month, date__year)',
+             base.filter(date__month=today.month, date__year=today.year)),
+            ('month/year como rango semiabierto',
+             base.filter(date__gte=start, date__lt=end)),
+            ('categoría + mes con extracción',
+             base.filter(category=category, date__month=today.month, date__year=today.year)),
+            ('categoría + mes como rango',
+             base.filter(category=category, date__gte=start, date__lt=end)),
+        ]
+
+    compare(command, 'Con índices compuestos', variants(), repeat)
+
+    if connection.vendor != 'postgresql':
+        command.stdout.write(command.style.WARNING(
+            '\nLa comparación sin índices compuestos requiere PostgreSQL (DDL transaccional)'
+        ))
+        return
+
+    with without_indexes(Expense, {'expense_user_date_idx', 'expense_user_category_date_idx'}):
+        compare(command, 'Sin índices compuestos (antes de la migración 0021)', variants(), repeat)
+
+
+@scenario('list_serialization')
+def list_serialization(command, options):
+    """Filas por segundo de los listados: serializer campo por campo frente a .values() + row_mapper()."""
+    user = benchmark_user()
+    rows = options['rows'] or 500
+    seed_expenses(command, user, rows)
+    seed_incomes(command, user, rows)
+    seed_fixed_expenses(command, user, rows)
+    repeat = options['repeat']
+
+    # Mismos select_related que los ViewSets
+    cases = (
+        ('Gastos', Expense, ExpenseSerializer, ('credit_card', 'category')),
+        ('Ingresos', Income, IncomeSerializer, ('bank_account', 'category')),
+        ('Gastos fijos', FixedExpense, FixedExpenseSerializer, ('credit_card', 'bank_account', 'category')),
+    )
+    for label, model, serializer_class, related in cases:
+        queryset = model.objects.filter(user=user).select_related(*related)[:rows]
+        serializer = serializer_class()
+        to_dict = serializer.row_mapper()
+        columns = serializer.value_columns()
+
+        def serialized():
+            return serializer_class(list(queryset.all()), many=True).data
+
+        def mapped():
+            return [to_dict(row) for row in queryset.values(*columns)]
+
+        if [dict(item) for item in serialized()] != mapped():
+            command.stderr.write(command.style.ERROR(f'{label}: la salida de row_mapper() difiere del serializer'))
+            continue
+
+        command.stdout.write(command.style.MIGRATE_HEADING(f'\n{label} ({rows} filas)'))
+        for variant, function in (('Serializer', serialized), ('values() + row_mapper()', mapped)):
+            elapsed = median_ms(function, repeat)
+            command.stdout.write(command.style.SUCCESS(
+                f'  {variant}: {elapsed:.2f} ms, {rows / elapsed * 1000:,.0f} filas/s (mediana de {repeat})'
+            ))
+
+
+@scenario('description_search')
+def description_search(command, options):
+    """Búsqueda por descripción (contains, prefix, fuzzy) con y sin el índice de trigramas."""
+    if connection.vendor != 'postgresql':
+        command.stderr.write(command.style.ERROR('La búsqueda por descripción requiere PostgreSQL (pg_trgm)'))
+        return
+
+    user = benchmark_user()
+    seed_expenses(command, user, options['rows'] or 200_000)
+    repeat = options['repeat']
+
+    search = DescriptionSearchFilter()
+    view = SimpleNamespace(search_field='description')
+    base = Expense.objects.filter(user=user).order_by('-date', '-created_at')
+
+    def searched(params):
+        request = Request(APIRequestFactory().get('/', params))
+        # Primera página de un listado
+        return search.filter_queryset(request, base, view)[:50]
+
+    def variants():
+        return [
+            ('contains "starbucks"', searched({'search': 'starbucks'})),
+            ('contains "pago netflix"', searched({'search': 'pago netflix'})),
+            ('prefix "cine" (autocompletar)', searched({'search': 'cine', 'search_mode': 'prefix'})),
+            ('fuzzy "starbuks" (con error de tipeo)', searched({'search': 'starbuks', 'search_mode': 'fuzzy'})),
+        ]
+
+    compare(command, 'Con índice de trigramas', variants(), repeat)
+
+    with without_indexes(Expense, {'expense_description_trgm_idx'}):
+        compare(command, 'Sin índice de trigramas (antes de la migración 0024)', variants(), repeat)
+
+
+# Tiempo máximo aceptado para la proyección de un usuario con muchos datos
+PROJECTION_BUDGET_MS = 50
+
+
+@scenario('projections')
+def projections(command, options):
+    """Proyección de 36 meses para un usuario con muchas cuentas, tarjetas, fijos y cuotas."""
+    user = benchmark_user()
+    rows = options['rows'] or 500
+    repeat = options['repeat']
+    today = date.today()
+
+    seed(command, BankAccount, user, 20, lambda randomizer: BankAccount(
+        user=user,
+        name='Cuenta de benchmark',
+        balance=Decimal(randomizer.randint(0, 5_000_000)) / 100,
+        currency=randomizer.choice(('PEN', 'PEN', 'USD')),
+    ))
+    seed(command, CreditCard, user, 10, lambda randomizer: CreditCard(
+        user=user,
+        name='Tarjeta de benchmark',
+        last_four_digits=f'{randomizer.randint(0, 9999):04d}',
+        limit=Decimal('20000.00'),
+        used_pen=Decimal(randomizer.randint(0, 500_000)) / 100,
+        used_usd=Decimal(randomizer.randint(0, 100_000)) / 100,
+        cut_off_date=randomizer.randint(1, 31),
+        payment_date=randomizer.randint(1, 31),
+    ))
+    accounts = list(BankAccount.objects.filter(user=user))
+    cards = list(CreditCard.objects.filter(user=user))
+    categories = benchmark_categories(user)
+
+    seed(command, FixedExpense, user, rows, lambda randomizer: FixedExpense(
+        user=user,
+        name='Gasto fijo de benchmark',
+        amount=Decimal(randomizer.randint(1000, 90000)) / 100,
+        currency=randomizer.choice(('PEN', 'USD')),
+        category=randomizer.choice(categories),
+        day_of_month=randomizer.randint(1, 31),
+        bank_account=randomizer.choice(accounts),
+        credit_card=randomizer.choice(cards + [None]),
+    ))
+    seed(command, FixedIncome, user, rows // 10, lambda randomizer: FixedIncome(
+        user=user,
+        name='Ingreso fijo de benchmark',
+        amount=Decimal(randomizer.randint(100000, 900000)) / 100,
+        currency=randomizer.choice(('PEN', 'USD')),
+        day_of_month=randomizer.randint(1, 31),
+        bank_account=randomizer.choice(accounts),
+    ))
+    seed(command, Installment, user, rows // 2, lambda randomizer: Installment(
+        user=user,
+        credit_card=randomizer.choice(cards),
+        description='Compra en cuotas de benchmark',
+        total_amount=Decimal(randomizer.randint(10000, 1_000_000)) / 100,
+        currency=randomizer.choice(('PEN', 'USD')),
+        total_installments=randomizer.choice((3, 6, 12, 24, 36)),
+        start_date=today - timedelta(days=randomizer.randint(0, 720)),
+    ))
+
+    months = MAX_PROJECTION_MONTHS
+    inputs = load_inputs(user)
+    command.stdout.write(command.style.MIGRATE_HEADING(
+        f'\nProyección de {months} meses: {len(inputs[0])} cuentas, {len(inputs[1])} tarjetas, '
+        f'{len(inputs[2])} gastos fijos, {len(inputs[3])} ingresos fijos, {len(inputs[4])} cuotas'
+    ))
+    for label, function in (
+        ('Cálculo en memoria (entradas ya cargadas)', lambda: project(*inputs, today, months)),
+        ('Completa (cinco consultas + cálculo)', lambda: projection(user, today, months)),
+    ):
+        elapsed = median_ms(function, repeat)
+        style = command.style.SUCCESS if elapsed < PROJECTION_BUDGET_MS else command.style.ERROR
+        command.stdout.write(style(
+            f'  {label}: {elapsed:.2f} ms (mediana de {repeat}, presupuesto {PROJECTION_BUDGET_MS} ms)'
+        ))
@@ -0,0 +1,95 @@
+"""
+Alta masiva de movimientos.
+
+bulk_create no llama a save() ni emite señales, así que los efectos que esos
+caminos aplican fila por fila (consumo de las tarjetas, libro y checkpoints de
+las cuentas, resúmenes mensuales y estados de cuenta) se aplican aquí una sola
+vez para todo el lote, con las mismas funciones de deltas.
+
+Con unique_fields las filas se insertan con INSERT ... ON CONFLICT DO NOTHING
+RETURNING id y los efectos se aplican solo a las que realmente se insertaron
+(como claim_occurrences en apps/finances/recurring.py): las que chocan con la
+restricción única se omiten aunque las haya creado otra transacción en curso.
+"""
+from django.db import connection, transaction
+
+from .ledger import LEDGER_SOURCES, apply_ledger_changes, ledger_entries
+from .models import apply_card_usage_changes, card_usage
+from .rollups import ROLLUP_KINDS, apply_rollup_changes, rollup_entries
+from .statements import STATEMENT_SOURCES, invalidate_statements, statement_key
+
+
+# Modelos que suman o restan al consumo de su tarjeta
+CARD_USAGE_MODELS = ('Expense', 'CreditCardPayment')
+
+
+def insert_ignoring_conflicts(instances, unique_fields, batch_size=1000):
+    """
+    Inserta instancias de un mismo modelo con INSERT ... ON CONFLICT
+    (unique_fields) DO NOTHING RETURNING id. Retorna las que se insertaron.
+    """
+    model = type(instances[0])
+    opts = model._meta
+    table = connection.ops.quote_name(opts.db_table)
+    fields = opts.concrete_fields
+    quoted = [connection.ops.quote_name(field.column) for field in fields]
+    conflict = [connection.ops.quote_name(opts.get_field(name).column) for name in unique_fields]
+    pk = connection.ops.quote_name(opts.pk.column)
+
+    inserted = set()
+    batch_size = min(batch_size, connection.ops.bulk_batch_size(fields, instances) or len(instances))
+    for start in range(0, len(instances), batch_size):
+        batch = instances[start:start + batch_size]
+        row = f"({', '.join(['%s'] * len(fields))})"
+        sql = (
+            f"INSERT INTO {table} ({', '.join(quoted)}) VALUES {', '.join([row] * len(batch))} "
+            f"ON CONFLICT ({', '.join(conflict)}) DO NOTHING "
+            f"RETURNING {pk}"
+        )
+        params = [
+            field.get_db_prep_save(field.pre_save(instance, True), connection)
+            for instance in batch
+            for field in fields
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            inserted.update(opts.pk.to_python(value) for value, in cursor.fetchall())
+
+    created = [instance for instance in instances if instance.pk in inserted]
+    for instance in created:
+        instance._state.adding = False
+        instance._state.db = connection.alias
+    return created
+
+
+def bulk_create_movements(instances, batch_size=1000, unique_fields=None):
+    """
+    Inserta movimientos de un mismo modelo con bulk_create y aplica sus
+    efectos en la misma transacción. Retorna las instancias creadas.
+
+    Con unique_fields (los campos de una restricción única) omite las que ya
+    existen y retorna solo las insertadas.
+    """
+    if not instances:
+        return []
+
+    model_name = type(instances[0]).__name__
+
+    with transaction.atomic():
+        if unique_fields:
+            created = insert_ignoring_conflicts(instances, unique_fields, batch_size=batch_size)
+        else:
+            created = type(instances[0]).objects.bulk_create(instances, batch_size=batch_size)
+
+        if model_name in CARD_USAGE_MODELS:
+            apply_card_usage_changes(added=[usage for instance in created for usage in card_usage(instance)])
+        if model_name in STATEMENT_SOURCES:
+            invalidate_statements([statement_key(instance) for instance in created])
+        if model_name in LEDGER_SOURCES:
+            apply_ledger_changes(added=[entry for instance in created for entry in ledger_entries(instance)])
+        if model_name in ROLLUP_KINDS:
+            apply_rollup_changes(added=[entry for instance in created for entry in rollup_entries(instance)])
+
+    for instance in created:
+        instance._remember_loaded_values()
+    return created
@@ -0,0 +1,69 @@
+"""
+Filtros comunes de los listados de movimientos.
+
+Los filtros por fecha se traducen siempre a rangos sobre la columna date
+(date >= inicio AND date < fin) en lugar de extraer mes o año. Así la
+consulta puede usar los índices compuestos (user, date, ...) de cada modelo.
+"""
+from datetime import date
+
+from rest_framework.exceptions import ValidationError
+
+
+def month_range(year, month):
+    """Retorna el rango semiabierto [inicio, fin) de un mes."""
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def year_range(year):
+    """Retorna el rango semiabierto [inicio, fin) de un año."""
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def _parse_date(value, name):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({'error': f'{name} debe tener formato YYYY-MM-DD'})
+
+
+def _parse_int(value, name, minimum, maximum):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        number = None
+    if number is None or not minimum <= number <= maximum:
+        raise ValidationError({'error': f'{name} debe ser un número entre {minimum} y {maximum}'})
+    return number
+
+
+def filter_by_date(queryset, query_params, field='date'):
+    """
+    Aplica los filtros de fecha de un listado:
+
+    - date_from / date_to (YYYY-MM-DD, ambos inclusive)
+    - month + year, o solo year (se convierten a rangos semiabiertos)
+
+    Si se combinan, el resultado es la intersección de los rangos.
+    """
+    date_from = query_params.get('date_from')
+    date_to = query_params.get('date_to')
+    month = query_params.get('month')
+    year = query_params.get('year')
+
+    if year:
+        year = _parse_int(year, 'year', 1, 9998)
+        if month:
+            start, end = month_range(year, _parse_int(month, 'month', 1, 12))
+        else:
+            start, end = year_range(year)
+        queryset = queryset.filter(**{f'{field}__gte': start, f'{field}__lt': end})
+
+    if date_from:
+        queryset = queryset.filter(**{f'{field}__gte': _parse_date(date_from, 'date_from')})
+    if date_to:
+        queryset = queryset.filter(**{f'{field}__lte': _parse_date(date_to, 'date_to')})
+
+    return queryset
@@ -0,0 +1,296 @@
+"""
+Importación de estados de cuenta bancarios (CSV u OFX).
+
+El archivo se procesa como una cadena de generadores:
+
+    registros del archivo -> StatementLine -> Expense/Income -> lotes
+
+así un archivo de 100k líneas se importa con memoria acotada al tamaño de un
+lote. Los montos negativos son gastos y los positivos, ingresos.
+
+Cada movimiento importado lleva un import_hash de (fecha, monto, moneda,
+descripción normalizada, cuenta y número de repetición dentro del archivo),
+con índice único por usuario: volver a importar el mismo estado de cuenta (o
+uno que se solapa, o el mismo dos veces a la vez) solo crea las filas nuevas,
+y dos movimientos idénticos del mismo archivo no se pierden.
+"""
+import csv
+import hashlib
+import re
+import unicodedata
+from collections import Counter, namedtuple
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import chain, islice
+
+from .bulk import bulk_create_movements
+from .models import Expense, Income
+
+
+IMPORT_FORMATS = ('csv', 'ofx')
+
+IMPORT_BATCH_SIZE = 1000
+
+# Restricción única de los movimientos importados (unique_*_import_hash)
+IMPORT_UNIQUE_FIELDS = ('user', 'import_hash')
+
+# Cantidad máxima de errores de filas que se reportan con detalle
+MAX_REPORTED_ERRORS = 20
+
+CURRENCIES = ('PEN', 'USD')
+
+# Mayor monto que cabe en los campos de monto (max_digits=12, decimal_places=2)
+MAX_AMOUNT = Decimal('9999999999.99')
+
+StatementLine = namedtuple('StatementLine', ['line', 'date', 'amount', 'currency', 'description'])
+
+# Encabezados reconocidos por columna (sin tildes ni mayúsculas)
+CSV_COLUMNS = {
+    'date': ('date', 'fecha', 'fecha operacion', 'fecha de operacion', 'fecha proceso'),
+    'description': ('description', 'descripcion', 'concepto', 'detalle', 'glosa', 'referencia'),
+    'amount': ('amount', 'monto', 'importe'),
+    'debit': ('debit', 'cargo', 'cargos', 'debe'),
+    'credit': ('credit', 'abono', 'abonos', 'haber'),
+    'currency': ('currency', 'moneda'),
+}
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%Y%m%d')
+
+OFX_ELEMENT = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+class StatementFormatError(ValueError):
+    """El archivo no tiene el formato esperado (p. ej. faltan columnas)."""
+
+
+def _normalize(text):
+    """Minúsculas, sin tildes y con espacios simples."""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode()
+    return ' '.join(text.lower().split())
+
+
+def parse_date(value):
+    """Fecha en los formatos habituales de los bancos (ISO, DD/MM/AAAA, OFX)."""
+    text = value.strip().split(' ')[0]
+    if text[:8].isdigit():
+        # OFX: AAAAMMDD[HHMMSS[.XXX]][zona]
+        text = text[:8]
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f'fecha inválida: {value!r}')
+
+
+def parse_amount(value):
+    """
+    Monto con signo. Acepta símbolos de moneda, paréntesis como negativo y
+    separadores de miles con punto o coma (el último separador es el decimal).
+    Con un solo tipo de separador, si le siguen tres dígitos es de miles
+    ("1.234" y "1,234" son mil doscientos treinta y cuatro).
+
+    Solo acepta montos que caben en los campos de monto (hasta dos decimales
+    y MAX_AMOUNT): lo demás es un ValueError, como cualquier línea inválida.
+    """
+    text = value.strip().replace('S/', '').replace('$', '').replace(' ', '')
+    negative = text.startswith('(') and text.endswith(')')
+    text = text.strip('()')
+    if ',' in text and '.' in text:
+        thousands = ',' if text.rfind('.') > text.rfind(',') else '.'
+        text = text.replace(thousands, '').replace(',', '.')
+    elif ',' in text or '.' in text:
+        separator = ',' if ',' in text else '.'
+        whole, _, decimals = text.rpartition(separator)
+        if len(decimals) == 3:
+            text = text.replace(separator, '')
+        else:
+            text = f'{whole.replace(separator, "")}.{decimals}'
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f'monto inválido: {value!r}')
+    if not amount.is_finite():
+        raise ValueError(f'monto inválido: {value!r}')
+    if amount.as_tuple().exponent < -2:
+        raise ValueError(f'monto con más de dos decimales: {value!r}')
+    if abs(amount) > MAX_AMOUNT:
+        raise ValueError(f'monto demasiado grande: {value!r}')
+    return -amount if negative else amount
+
+
+def csv_records(stream):
+    """Genera (línea, campos) de un CSV con encabezados, detectando el separador."""
+    first = stream.readline()
+    if not first:
+        return
+    try:
+        dialect = csv.Sniffer().sniff(first, delimiters=',;\t|')
+    except csv.Error:
+        dialect = csv.excel
+
+    reader = csv.reader(chain([first], stream), dialect)
+    headers = [_normalize(header) for header in next(reader)]
+    columns = {}
+    for name, aliases in CSV_COLUMNS.items():
+        for index, header in enumerate(headers):
+            if header in aliases:
+                columns[name] = index
+                break
+
+    if 'date' not in columns or not ('amount' in columns or {'debit', 'credit'} & set(columns)):
+        raise StatementFormatError('El CSV debe tener columnas de fecha y de monto (o cargo/abono)')
+
+    for line, row in enumerate(reader, start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        record = {name: row[index] if index < len(row) else '' for name, index in columns.items()}
+        if 'amount' not in record:
+            debit = record.pop('debit', '').strip()
+            credit = record.pop('credit', '').strip()
+            record['amount'] = f'-{debit.lstrip("-")}' if debit else credit
+        yield line, record
+
+
+def _ofx_elements(stream, chunk_size=65536):
+    """Genera (cierre, etiqueta, valor) de un OFX (SGML o XML) leyendo por bloques."""
+    buffer = ''
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer += chunk
+        # Sin llegar al final, el elemento desde el último '<' puede estar incompleto
+        end = len(buffer) if not chunk else buffer.rfind('<')
+        if end > 0:
+            for match in OFX_ELEMENT.finditer(buffer, 0, end):
+                closing, tag, value = match.groups()
+                yield bool(closing), tag.upper(), value.strip()
+            buffer = buffer[end:]
+        if not chunk:
+            return
+
+
+def ofx_records(stream):
+    """Genera (número de transacción, campos) de cada STMTTRN de un OFX."""
+    currency = ''
+    transaction = None
+    number = 0
+    for closing, tag, value in _ofx_elements(stream):
+        if tag == 'CURDEF' and not closing:
+            currency = value
+        elif tag == 'STMTTRN':
+            if not closing:
+                transaction = {}
+            elif transaction is not None:
+                number += 1
+                yield number, {
+                    'date': transaction.get('DTPOSTED', ''),
+                    'amount': transaction.get('TRNAMT', ''),
+                    'currency': currency,
+                    'description': transaction.get('NAME') or transaction.get('MEMO', ''),
+                }
+                transaction = None
+        elif transaction is not None and not closing:
+            transaction[tag] = value
+
+
+def statement_lines(records, default_currency, report):
+    """
+    Convierte los registros en StatementLine. Los registros inválidos se
+    cuentan en report (con detalle de los primeros) y se omiten.
+    """
+    for line, record in records:
+        try:
+            amount = parse_amount(record.get('amount', ''))
+            currency = (record.get('currency') or default_currency).strip().upper()
+            if currency in ('S/', 'SOLES'):
+                currency = 'PEN'
+            elif currency in ('$', 'US$', 'DOLARES'):
+                currency = 'USD'
+            if currency not in CURRENCIES:
+                raise ValueError(f'moneda no soportada: {currency!r}')
+            if not amount:
+                raise ValueError('monto cero')
+            yield StatementLine(
+                line=line,
+                date=parse_date(record.get('date', '')),
+                amount=amount,
+                currency=currency,
+                description=' '.join(record.get('description', '').split())[:255] or 'Movimiento importado',
+            )
+        except ValueError as error:
+            report['errors'] += 1
+            if len(report['error_details']) < MAX_REPORTED_ERRORS:
+                report['error_details'].append({'line': line, 'error': str(error)})
+
+
+def movements(lines, user, account, expense_category=None, income_category=None):
+    """Genera el Expense o Income (sin guardar) de cada línea, con su import_hash."""
+    occurrences = Counter()
+    for line in lines:
+        content = '|'.join([
+            line.date.isoformat(),
+            str(line.amount.quantize(Decimal('0.01'))),
+            line.currency,
+            _normalize(line.description),
+            str(account.pk),
+        ])
+        occurrences[content] += 1
+        digest = hashlib.sha256(f'{content}|{occurrences[content]}'.encode()).hexdigest()
+
+        model, category = (Expense, expense_category) if line.amount < 0 else (Income, income_category)
+        yield model(
+            user=user,
+            amount=abs(line.amount),
+            currency=line.currency,
+            category=category,
+            description=line.description,
+            date=line.date,
+            bank_account=account,
+            import_hash=digest,
+        )
+
+
+def batches(iterable, size):
+    """Agrupa un iterable en listas de hasta size elementos."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def import_statement(stream, file_format, user, account, expense_category=None, income_category=None,
+                     batch_size=IMPORT_BATCH_SIZE):
+    """
+    Importa un estado de cuenta (stream de texto) en la cuenta indicada.
+
+    Es un generador: después de cada lote produce el avance
+    {processed, created, duplicates, errors}; el último incluye done=True y
+    el detalle de los primeros errores. Cada lote se guarda en su propia
+    transacción con bulk_create_movements, que omite (con ON CONFLICT DO
+    NOTHING) los movimientos cuyo import_hash ya existe, aunque los haya
+    creado otra importación del mismo archivo en curso.
+    """
+    records = csv_records(stream) if file_format == 'csv' else ofx_records(stream)
+    report = {'processed': 0, 'created': 0, 'duplicates': 0, 'errors': 0, 'error_details': []}
+    pending = movements(
+        statement_lines(records, account.currency, report), user, account, expense_category, income_category
+    )
+
+    def progress(done=False):
+        data = {key: report[key] for key in ('processed', 'created', 'duplicates', 'errors')}
+        if done:
+            data['done'] = True
+            data['error_details'] = report['error_details']
+        return data
+
+    for batch in batches(pending, batch_size):
+        report['processed'] += len(batch)
+        for model in (Expense, Income):
+            instances = [instance for instance in batch if type(instance) is model]
+            if not instances:
+                continue
+            created = bulk_create_movements(instances, batch_size=batch_size, unique_fields=IMPORT_UNIQUE_FIELDS)
+            report['created'] += len(created)
+            report['duplicates'] += len(instances) - len(created)
+        yield progress()
+
+    yield progress(done=True)
@@ -0,0 +1,116 @@
+"""
+Libro mayor materializado de las cuentas bancarias.
+
+Cada movimiento (gasto, ingreso, pago de tarjeta o cambio de divisa) aporta a
+uno de los campos ledger_* de su cuenta. Los aportes se aplican como deltas
+atómicos con F() al crear, editar o eliminar el movimiento, así leer el saldo
+de una cuenta no requiere recorrer su historial.
+
+La fórmula agregada equivalente vive en BankAccountQuerySet y se usa para
+reconstruir o verificar el libro (`manage.py rebuild_ledger`).
+"""
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.db.models import F
+from django.utils import timezone
+
+from .balance_history import shift_checkpoints
+from .models import BankAccount
+
+
+# Aporte de un movimiento al libro de una cuenta.
+# currency es None cuando el aporte no depende de la moneda de la cuenta.
+LedgerEntry = namedtuple('LedgerEntry', ['account_id', 'field', 'currency', 'created_at', 'date', 'amount'])
+
+# Por modelo: (campo de cuenta, campo de monto, campo del libro, filtra por moneda)
+LEDGER_SOURCES = {
+    'Expense': (
+        ('bank_account_id', 'amount', 'ledger_expenses', True),
+    ),
+    'Income': (
+        ('bank_account_id', 'amount', 'ledger_income', True),
+    ),
+    'CreditCardPayment': (
+        ('bank_account_id', 'amount', 'ledger_credit_card_payments', True),
+    ),
+    'CurrencyExchange': (
+        ('from_account_id', 'amount_from', 'ledger_exchanges_out', False),
+        ('to_account_id', 'amount_to', 'ledger_exchanges_in', False),
+    ),
+}
+
+
+def ledger_entries(instance):
+    """Retorna los aportes de un movimiento al libro de sus cuentas."""
+    if instance is None:
+        return []
+
+    entries = []
+    for account_field, amount_field, ledger_field, match_currency in LEDGER_SOURCES[type(instance).__name__]:
+        account_id = getattr(instance, account_field)
+        if account_id is None:
+            continue
+        entries.append(LedgerEntry(
+            account_id=account_id,
+            field=ledger_field,
+            currency=instance.currency if match_currency else None,
+            created_at=instance.created_at,
+            date=instance.date,
+            amount=Decimal(str(getattr(instance, amount_field))),
+        ))
+    return entries
+
+
+def _counts_for_account(account, entry):
+    """Indica si un aporte entra en el libro según la moneda y fecha de saldo de la cuenta."""
+    if entry.currency is not None and entry.currency != account['currency']:
+        return False
+    if account['balance_updated_at'] and entry.created_at < account['balance_updated_at']:
+        return False
+    return True
+
+
+def apply_ledger_changes(removed=(), added=()):
+    """
+    Aplica al libro los aportes retirados y agregados.
+
+    Los aportes que se cancelan entre sí (p. ej. una edición que no cambia
+    monto, moneda ni cuenta) no generan consultas. El resto se agrupa en un
+    UPDATE atómico por cuenta, y se trasladan a los checkpoints mensuales.
+    """
+    deltas = defaultdict(Decimal)
+    for entry in removed:
+        deltas[entry._replace(amount=None)] -= entry.amount
+    for entry in added:
+        deltas[entry._replace(amount=None)] += entry.amount
+
+    entries = [key._replace(amount=amount) for key, amount in deltas.items() if amount]
+    if not entries:
+        return []
+
+    accounts = {
+        account['id']: account
+        for account in BankAccount.objects.filter(
+            pk__in={entry.account_id for entry in entries}
+        ).values('id', 'currency', 'balance_updated_at')
+    }
+
+    applied = []
+    per_account = defaultdict(lambda: defaultdict(Decimal))
+    for entry in entries:
+        account = accounts.get(entry.account_id)
+        if account is None or not _counts_for_account(account, entry):
+            continue
+        per_account[entry.account_id][entry.field] += entry.amount
+        applied.append(entry)
+
+    now = timezone.now()
+    for account_id, fields in per_account.items():
+        # updated_at: los saldos calculados cambian, la cuenta vuelve a sincronizarse
+        BankAccount.objects.filter(pk=account_id).update(updated_at=now, **{
+            field: F(field) + amount for field, amount in fields.items() if amount
+        })
+
+    shift_checkpoints(applied)
+    return applied
@@ -0,0 +1,74 @@
+"""
+Comando para medir el rendimiento de consultas sobre datos sembrados.
+
+Los datos se crean para un usuario de benchmark (benchmark@midinero.local)
+la primera vez y se reutilizan en las siguientes ejecuciones. Como escribe
+hasta un millón de filas en la base configurada, los escenarios solo corren
+con DEBUG o con --allow-writes; --teardown elimina ese usuario y todos sus
+datos.
+
+Uso:
+    python manage.py benchmark date_filters                  # 1M de gastos sembrados
+    python manage.py benchmark date_filters --rows=100000    # Menos filas
+    python manage.py benchmark date_filters --repeat=10      # Más repeticiones por variante
+    python manage.py benchmark list_serialization            # Filas por segundo de los listados
+    python manage.py benchmark description_search            # Búsqueda sobre 200k gastos
+    python manage.py benchmark projections                   # Proyección de 36 meses (< 50 ms)
+    python manage.py benchmark --teardown                    # Elimina el usuario de benchmark
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.finances.benchmarks import BENCHMARK_EMAIL, SCENARIOS, teardown
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta un escenario de benchmark y muestra planes de ejecución y tiempos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'scenario',
+            nargs='?',
+            choices=sorted(SCENARIOS),
+            help='Escenario a ejecutar',
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            help='Cantidad de filas sembradas (default: la del escenario)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Repeticiones por variante para la mediana (default: 5)',
+        )
+
+        parser.add_argument(
+            '--allow-writes',
+            action='store_true',
+            help='Permite sembrar datos aunque DEBUG esté desactivado',
+        )
+        parser.add_argument(
+            '--teardown',
+            action='store_true',
+            help=f'Elimina {BENCHMARK_EMAIL} y todos sus datos',
+        )
+
+    def handle(self, *args, **options):
+        if options['teardown']:
+            teardown(self)
+            return
+
+        if not (settings.DEBUG or options['allow_writes']):
+            self.stderr.write(self.style.ERROR(
+                f"El benchmark escribe datos de {BENCHMARK_EMAIL} en la base configurada: "
+                "requiere DEBUG o --allow-writes"
+            ))
+            return
+
+        if not options['scenario']:
+            self.stderr.write(self.style.ERROR(f"Debes indicar un escenario: {', '.join(sorted(SCENARIOS))}"))
+            return
+
+        SCENARIOS[options['scenario']](self, options)
@@ -0,0 +1,89 @@
+"""
+Comando para importar un estado de cuenta bancario (CSV u OFX) en una cuenta.
+
+Los montos negativos se importan como gastos y los positivos como ingresos.
+Las filas ya importadas antes se omiten (import_hash).
+
+Uso:
+    python manage.py import_statement movimientos.csv --user=email --account=<uuid>
+    python manage.py import_statement extracto.ofx --user=email --account=<uuid>
+    python manage.py import_statement archivo.txt --user=email --account=<uuid> --file-type=csv
+    python manage.py import_statement movimientos.csv --user=email --account=<uuid> \\
+        --expense-category=<uuid> --income-category=<uuid>
+"""
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from apps.categories.models import Category
+from apps.finances.importers import IMPORT_BATCH_SIZE, IMPORT_FORMATS, StatementFormatError, import_statement
+from apps.finances.models import BankAccount
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Importa un estado de cuenta bancario (CSV u OFX) como gastos e ingresos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Ruta del archivo a importar')
+        parser.add_argument('--user', required=True, help='Email del usuario')
+        parser.add_argument('--account', required=True, help='ID de la cuenta bancaria')
+        parser.add_argument(
+            '--file-type',
+            choices=IMPORT_FORMATS,
+            help='Formato del archivo (default: según la extensión)',
+        )
+        parser.add_argument('--expense-category', help='ID de la categoría para los gastos (opcional)')
+        parser.add_argument('--income-category', help='ID de la categoría para los ingresos (opcional)')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help=f'Filas por lote (default: {IMPORT_BATCH_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            self.stderr.write(self.style.ERROR(f"Usuario '{options['user']}' no encontrado"))
+            return
+
+        try:
+            account = BankAccount.objects.get(id=options['account'], user=user)
+            categories = {
+                kind: Category.objects.get(id=options[f'{kind}_category'], user=user, type=kind)
+                if options[f'{kind}_category'] else None
+                for kind in ('expense', 'income')
+            }
+        except (BankAccount.DoesNotExist, Category.DoesNotExist):
+            self.stderr.write(self.style.ERROR('Cuenta o categoría no encontrada para el usuario'))
+            return
+
+        file_format = options['file_type'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        if file_format not in IMPORT_FORMATS:
+            self.stderr.write(self.style.ERROR('Formato no reconocido: usa --file-type=csv u --file-type=ofx'))
+            return
+
+        with open(options['path'], encoding='utf-8-sig', errors='replace', newline='') as stream:
+            try:
+                for progress in import_statement(
+                    stream, file_format, user, account,
+                    categories['expense'], categories['income'], options['batch_size'],
+                ):
+                    self.stdout.write(
+                        f"  Procesadas {progress['processed']}: {progress['created']} creadas, "
+                        f"{progress['duplicates']} duplicadas, {progress['errors']} con error"
+                    )
+            except StatementFormatError as error:
+                self.stderr.write(self.style.ERROR(str(error)))
+                return
+
+        for detail in progress['error_details']:
+            self.stdout.write(self.style.WARNING(f"  Línea {detail['line']}: {detail['error']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Importación terminada: {progress['created']} movimientos creados, "
+            f"{progress['duplicates']} ya existían"
+        ))
@@ -1,34 +1,88 @@
 """
 Comando para procesar ingresos/gastos fijos pendientes.
 
+Los movimientos pendientes de cada usuario se calculan en memoria y se crean
+en lote, en una transacción por usuario (ver apps/finances/recurring.py).
+
+Con --workers N el proceso padre lista los ids de los usuarios con fijos
+vencidos y los reparte por hash entre N procesos; cada proceso abre su propia
+conexión y carga solo sus usuarios, en bloques, y al final se muestran los
+totales y el tiempo de cada shard.
+
+Solo se revisan los fijos con next_due_date vencido (y sus usuarios), con el
+índice parcial de los fijos activos.
+
 Uso:
     python manage.py process_fixed --all-users
-    python manage.py process_fixed --user=username
+    python manage.py process_fixed --user=email
     python manage.py process_fixed --all-users --backfill  # Procesa meses anteriores pendientes
+    python manage.py process_fixed --all-users --workers=8  # En 8 procesos
 """
-import calendar
-from datetime import date, timedelta
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
 from django.utils import timezone
-from django.contrib.auth import get_user_model
 
-from apps.finances.models import FixedExpense, FixedIncome, Expense, Income
+from apps.finances.models import FixedExpense, FixedIncome, Expense
+from apps.finances.recurring import due_fixed, process_due_fixed
 
 User = get_user_model()
 
+# Usuarios que lee cada viaje al cursor
+USER_CHUNK_SIZE = 500
+
+
+def users_with_due_fixed(today):
+    """Usuarios con algún fijo vencido (según next_due_date)."""
+    return User.objects.filter(
+        Q(pk__in=due_fixed(FixedExpense, today).values('user_id'))
+        | Q(pk__in=due_fixed(FixedIncome, today).values('user_id'))
+    ).order_by()
+
+
+def user_shard(user_id, workers):
+    """Shard (0..workers-1) al que pertenece el usuario según su id."""
+    return user_id.int % workers
+
+
+def close_connections():
+    """
+    Inicializa Django en el proceso del pool y descarta las conexiones
+    heredadas del proceso padre: cada shard abre la suya.
+    """
+    django.setup()
+    connections.close_all()
+
 
-def add_months(source_date, months):
-    """Suma o resta meses a una fecha."""
-    month = source_date.month - 1 + months
-    year = source_date.year + month // 12
-    month = month % 12 + 1
-    day = min(source_date.day, calendar.monthrange(year, month)[1])
-    return date(year, month, day)
+def shard_user_ids(today, workers):
+    """Ids de los usuarios con fijos vencidos repartidos en `workers` shards."""
+    shards = [[] for _ in range(workers)]
+    for user_id in users_with_due_fixed(today).values_list('pk', flat=True).iterator(chunk_size=USER_CHUNK_SIZE):
+        shards[user_shard(user_id, workers)].append(user_id)
+    return shards
 
 
-def last_day_of_month(d):
-    """Retorna el último día del mes."""
-    return calendar.monthrange(d.year, d.month)[1]
+def process_shard(shard, user_ids, today, backfill, months_back):
+    """Procesa los usuarios de un shard (sus ids). Retorna sus totales y tiempo."""
+    started = time.monotonic()
+    result = {'shard': shard, 'users': 0, 'expenses': 0, 'incomes': 0}
+    try:
+        for start in range(0, len(user_ids), USER_CHUNK_SIZE):
+            chunk = user_ids[start:start + USER_CHUNK_SIZE]
+            for user in User.objects.filter(pk__in=chunk).only('id', 'fixed_due_date'):
+                created = process_due_fixed(user, today, backfill=backfill, months_back=months_back)
+                result['users'] += 1
+                result['expenses'] += sum(isinstance(movement, Expense) for movement in created)
+                result['incomes'] += sum(not isinstance(movement, Expense) for movement in created)
+    finally:
+        connections.close_all()
+    result['seconds'] = time.monotonic() - started
+    return result
 
 
 class Command(BaseCommand):
@@ -38,7 +92,7 @@ class Command(BaseCommand):
         parser.add_argument(
             '--user',
             type=str,
-            help='Username del usuario a procesar',
+            help='Email del usuario a procesar',
         )
         parser.add_argument(
             '--all-users',
@@ -56,137 +110,94 @@ class Command(BaseCommand):
             default=12,
             help='Cuántos meses atrás revisar con --backfill (default: 12)',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Procesos entre los que se reparten los usuarios con --all-users (default: 1)',
+        )
 
     def handle(self, *args, **options):
         today = timezone.now().date()
+        backfill = options['backfill']
+        months_back = options['months_back']
+
+        if options['workers'] < 1:
+            self.stderr.write(self.style.ERROR('--workers debe ser al menos 1'))
+            return
 
         if options['user']:
             try:
-                users = [User.objects.get(username=options['user'])]
+                users = [User.objects.get(email=options['user'])]
             except User.DoesNotExist:
                 self.stderr.write(self.style.ERROR(f"Usuario '{options['user']}' no encontrado"))
                 return
         elif options['all_users']:
-            users = User.objects.all()
+            if options['workers'] > 1:
+                self._handle_parallel(today, backfill, months_back, options['workers'])
+                return
+            users = users_with_due_fixed(today).iterator(chunk_size=USER_CHUNK_SIZE)
         else:
             self.stderr.write(self.style.ERROR(
-                "Debes especificar --user=username o --all-users"
+                "Debes especificar --user=email o --all-users"
             ))
             return
 
         total_expenses = 0
         total_incomes = 0
-        backfill = options['backfill']
-        months_back = options['months_back']
 
         for user in users:
-            self.stdout.write(f"\nProcesando usuario: {user.username}")
-
-            # Procesar gastos fijos
-            fixed_expenses = FixedExpense.objects.filter(user=user, is_active=True)
-            for fixed in fixed_expenses:
-                processed = self._process_fixed_expense(fixed, today, backfill, months_back)
-                total_expenses += processed
-
-            # Procesar ingresos fijos
-            fixed_incomes = FixedIncome.objects.filter(user=user, is_active=True)
-            for fixed in fixed_incomes:
-                processed = self._process_fixed_income(fixed, today, backfill, months_back)
-                total_incomes += processed
+            self.stdout.write(f"\nProcesando usuario: {user.email}")
+
+            for movement in process_due_fixed(user, today, backfill=backfill, months_back=months_back):
+                if isinstance(movement, Expense):
+                    total_expenses += 1
+                    label = 'Gasto fijo'
+                else:
+                    total_incomes += 1
+                    label = 'Ingreso fijo'
+                name = movement.description.removesuffix(' (Fijo)')
+                self.stdout.write(f"  ✓ {label}: {name} - {movement.currency} {movement.amount} ({movement.date})")
 
         self.stdout.write(self.style.SUCCESS(
             f"\n¡Listo! Procesados: {total_expenses} gastos y {total_incomes} ingresos"
         ))
 
-    def _get_months_to_process(self, fixed, today, backfill, months_back):
-        """Determina qué meses necesitan ser procesados."""
-        months = []
-        current_month = today.replace(day=1)
-
-        if backfill:
-            # Revisar meses anteriores
-            start_month = add_months(current_month, -months_back)
-            # No procesar antes de la fecha de creación del ingreso/gasto fijo
-            created_month = fixed.created_at.date().replace(day=1)
-            if start_month < created_month:
-                start_month = created_month
+    def _handle_parallel(self, today, backfill, months_back, workers):
+        """Reparte los usuarios en `workers` shards y los procesa en paralelo."""
+        started = time.monotonic()
+        totals = {'users': 0, 'expenses': 0, 'incomes': 0}
+        failed = 0
+
+        shards = shard_user_ids(today, workers)
+
+        # Los procesos del pool no deben compartir la conexión del padre
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=close_connections) as pool:
+            futures = {
+                pool.submit(process_shard, shard, user_ids, today, backfill, months_back): shard
+                for shard, user_ids in enumerate(shards)
+            }
+            for future in as_completed(futures):
+                shard = futures[future]
+                try:
+                    result = future.result()
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(self.style.ERROR(f"  Shard {shard} falló: {error}"))
+                    continue
+                for key in totals:
+                    totals[key] += result[key]
+                self.stdout.write(
+                    f"  Shard {shard}: {result['users']} usuarios, {result['expenses']} gastos, "
+                    f"{result['incomes']} ingresos en {result['seconds']:.2f}s"
+                )
+
+        message = (
+            f"\n¡Listo! Procesados: {totals['expenses']} gastos y {totals['incomes']} ingresos "
+            f"de {totals['users']} usuarios en {time.monotonic() - started:.2f}s"
+        )
+        if failed:
+            self.stderr.write(self.style.ERROR(f"{message} ({failed} shards con error)"))
         else:
-            start_month = current_month
-
-        # Iterar desde start_month hasta current_month
-        check_month = start_month
-        while check_month <= current_month:
-            # Determinar la fecha del ingreso/gasto en este mes
-            day = min(fixed.day_of_month, last_day_of_month(check_month))
-            target_date = check_month.replace(day=day)
-
-            # Solo procesar si la fecha ya pasó (o es hoy)
-            if target_date <= today:
-                # Verificar si ya fue procesado este mes
-                month_start = check_month
-                next_month = add_months(check_month, 1)
-
-                already_processed = False
-                if fixed.last_processed_date:
-                    # Si last_processed_date está dentro de este mes, ya fue procesado
-                    if month_start <= fixed.last_processed_date < next_month:
-                        already_processed = True
-                    # Si last_processed_date es posterior a este mes, también ya pasó
-                    elif fixed.last_processed_date >= next_month:
-                        already_processed = True
-
-                if not already_processed:
-                    months.append(target_date)
-
-            check_month = add_months(check_month, 1)
-
-        return months
-
-    def _process_fixed_expense(self, fixed, today, backfill, months_back):
-        """Procesa un gasto fijo para los meses pendientes."""
-        months = self._get_months_to_process(fixed, today, backfill, months_back)
-        count = 0
-
-        for target_date in months:
-            Expense.objects.create(
-                user=fixed.user,
-                amount=fixed.amount,
-                currency=fixed.currency,
-                category=fixed.category,
-                description=f"{fixed.name} (Fijo)",
-                date=target_date,
-                credit_card=fixed.credit_card,
-                bank_account=fixed.bank_account,
-            )
-            count += 1
-            self.stdout.write(f"  ✓ Gasto fijo: {fixed.name} - {fixed.currency} {fixed.amount} ({target_date})")
-
-        if count > 0:
-            fixed.last_processed_date = today
-            fixed.save(update_fields=['last_processed_date'])
-
-        return count
-
-    def _process_fixed_income(self, fixed, today, backfill, months_back):
-        """Procesa un ingreso fijo para los meses pendientes."""
-        months = self._get_months_to_process(fixed, today, backfill, months_back)
-        count = 0
-
-        for target_date in months:
-            Income.objects.create(
-                user=fixed.user,
-                amount=fixed.amount,
-                currency=fixed.currency,
-                category=fixed.category,
-                description=f"{fixed.name} (Fijo)",
-                date=target_date,
-                bank_account=fixed.bank_account,
-            )
-            count += 1
-            self.stdout.write(f"  ✓ Ingreso fijo: {fixed.name} - {fixed.currency} {fixed.amount} ({target_date})")
-
-        if count > 0:
-            fixed.last_processed_date = today
-            fixed.save(update_fields=['last_processed_date'])
-
-        return count
+            self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,74 @@
+"""
+Comando para reconstruir o verificar el libro mayor de las cuentas bancarias.
+
+Uso:
+    python manage.py rebuild_ledger                    # Reconstruye todas las cuentas
+    python manage.py rebuild_ledger --user=email       # Solo las cuentas de un usuario
+    python manage.py rebuild_ledger --check            # Solo verifica, no modifica nada
+"""
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+
+from apps.finances.models import BankAccount, BankAccountQuerySet
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye o verifica el libro mayor (campos ledger_*) de las cuentas bancarias'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='Email del usuario a procesar (opcional)',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Compara el libro con la fórmula agregada sin modificar nada',
+        )
+
+    def handle(self, *args, **options):
+        accounts = BankAccount.objects.all()
+
+        if options['user']:
+            try:
+                user = User.objects.get(email=options['user'])
+            except User.DoesNotExist:
+                self.stderr.write(self.style.ERROR(f"Usuario '{options['user']}' no encontrado"))
+                return
+            accounts = accounts.filter(user=user)
+
+        if options['check']:
+            self._check(accounts)
+            return
+
+        updated = accounts.rebuild_ledger()
+        self.stdout.write(self.style.SUCCESS(f'Libro reconstruido para {updated} cuentas bancarias'))
+
+    def _check(self, accounts):
+        """Reporta las cuentas cuyo libro difiere de la fórmula agregada."""
+        fields = BankAccountQuerySet.LEDGER_FIELDS
+        rows = accounts.with_computed_totals().values(
+            'id', 'name', 'user__email', *fields, *[f'computed_{field}' for field in fields]
+        )
+
+        checked = 0
+        drifted = 0
+        for row in rows.iterator():
+            checked += 1
+            differences = [
+                (field, row[field], row[f'computed_{field}'])
+                for field in fields
+                if row[field] != row[f'computed_{field}']
+            ]
+            if not differences:
+                continue
+            drifted += 1
+            self.stdout.write(f"  ✗ {row['name']} ({row['user__email']}) [{row['id']}]")
+            for field, stored, computed in differences:
+                self.stdout.write(f'      {field}: guardado={stored} calculado={computed} delta={computed - stored}')
+
+        style = self.style.SUCCESS if drifted == 0 else self.style.WARNING
+        self.stdout.write(style(f'\nVerificadas {checked} cuentas: {drifted} con diferencias'))
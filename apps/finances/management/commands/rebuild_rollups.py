@@ -0,0 +1,40 @@
+"""
+Comando para reconstruir los resúmenes mensuales (MonthlyRollup) de gastos e ingresos.
+
+Los resúmenes se mantienen solos al crear, editar o eliminar movimientos;
+este comando los recalcula desde cero, p. ej. tras cargas masivas con
+bulk_create o ediciones directas en la base de datos.
+
+Uso:
+    python manage.py rebuild_rollups                       # Todos los usuarios
+    python manage.py rebuild_rollups --user=email@x.com    # Solo un usuario
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from apps.finances.rollups import rebuild_rollups
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los resúmenes mensuales de gastos e ingresos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='Email del usuario a procesar (opcional, por defecto todos)',
+        )
+
+    def handle(self, *args, **options):
+        users = None
+        if options['user']:
+            try:
+                users = [User.objects.get(email=options['user'])]
+            except User.DoesNotExist:
+                self.stderr.write(self.style.ERROR(f"Usuario '{options['user']}' no encontrado"))
+                return
+
+        created = rebuild_rollups(users)
+        self.stdout.write(self.style.SUCCESS(f'Resúmenes mensuales reconstruidos: {created}'))
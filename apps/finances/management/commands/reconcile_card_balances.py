@@ -0,0 +1,121 @@
+"""
+Comando para recalcular used_pen/used_usd de las tarjetas de crédito.
+
+Recalcula el uso de todas las tarjetas con un número fijo de consultas: una
+agrupación de gastos y una de pagos por (tarjeta, moneda). Por defecto solo
+reporta las diferencias; con --fix las guarda con un bulk_update de las
+tarjetas con diferencias.
+
+El valor calculado es max(0, gastos - pagos), así que hay diferencias que no
+son errores y que --fix sobrescribiría:
+
+- Deuda inicial ingresada al crear o editar la tarjeta (used_pen/used_usd son
+  editables) sin gastos que la respalden.
+- Un pago mayor a la deuda seguido de nuevos gastos: el uso se detiene en 0
+  al pagar, así que el saldo guardado depende del orden de los movimientos
+  y no solo de sus totales.
+
+Uso:
+    python manage.py reconcile_card_balances                    # Reporta diferencias
+    python manage.py reconcile_card_balances --user=email       # Solo las tarjetas de un usuario
+    python manage.py reconcile_card_balances --fix              # Corrige las diferencias
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.finances.models import CreditCard, CreditCardPayment, Expense
+
+User = get_user_model()
+
+# Campo de uso de la tarjeta según la moneda del movimiento
+USED_FIELDS = {
+    'PEN': 'used_pen',
+    'USD': 'used_usd',
+}
+
+
+class Command(BaseCommand):
+    help = 'Recalcula used_pen/used_usd de las tarjetas de crédito a partir de gastos y pagos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='Email del usuario a procesar (opcional)',
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Guarda los valores calculados (por defecto solo reporta las diferencias)',
+        )
+
+    def handle(self, *args, **options):
+        cards = CreditCard.objects.all()
+        expenses = Expense.objects.filter(credit_card__isnull=False)
+        payments = CreditCardPayment.objects.all()
+
+        if options['user']:
+            try:
+                user = User.objects.get(email=options['user'])
+            except User.DoesNotExist:
+                self.stderr.write(self.style.ERROR(f"Usuario '{options['user']}' no encontrado"))
+                return
+            cards = cards.filter(user=user)
+            expenses = expenses.filter(credit_card__user=user)
+            payments = payments.filter(credit_card__user=user)
+
+        computed = self._computed_usage(expenses, payments)
+
+        drifted = []
+        checked = 0
+        for card in cards.select_related('user').order_by('user__email', 'name'):
+            checked += 1
+            differences = []
+            for currency, field in USED_FIELDS.items():
+                stored = getattr(card, field)
+                value = max(Decimal('0'), computed[card.pk][currency]).quantize(Decimal('0.01'))
+                if stored != value:
+                    differences.append((field, stored, value))
+                    setattr(card, field, value)
+            if differences:
+                drifted.append((card, differences))
+
+        for card, differences in drifted:
+            self.stdout.write(f'  ✗ {card.name} ({card.user.email}) [{card.id}]')
+            for field, stored, value in differences:
+                self.stdout.write(f'      {field}: guardado={stored} calculado={value} delta={value - stored}')
+
+        if not options['fix']:
+            style = self.style.SUCCESS if not drifted else self.style.WARNING
+            self.stdout.write(style(f'\nVerificadas {checked} tarjetas: {len(drifted)} con diferencias'))
+            return
+
+        if drifted:
+            now = timezone.now()
+            to_update = []
+            for card, _ in drifted:
+                card.updated_at = now
+                to_update.append(card)
+            with transaction.atomic():
+                CreditCard.objects.bulk_update(
+                    to_update, ['used_pen', 'used_usd', 'updated_at'], batch_size=500
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Verificadas {checked} tarjetas: {len(drifted)} corregidas'
+        ))
+
+    def _computed_usage(self, expenses, payments):
+        """Retorna {tarjeta: {moneda: gastos - pagos}} con una consulta agrupada por origen."""
+        usage = defaultdict(lambda: defaultdict(Decimal))
+        for row in expenses.order_by().values('credit_card_id', 'currency').annotate(total=Sum('amount')):
+            usage[row['credit_card_id']][row['currency']] += row['total'] or 0
+        for row in payments.order_by().values('credit_card_id', 'currency').annotate(total=Sum('amount')):
+            usage[row['credit_card_id']][row['currency']] -= row['total'] or 0
+        return usage
@@ -0,0 +1,78 @@
+# Generated manually: libro mayor materializado en BankAccount
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def populate_ledger(apps, schema_editor):
+    """Calcula el libro inicial de cada cuenta con la fórmula agregada."""
+    BankAccount = apps.get_model('finances', 'BankAccount')
+    Expense = apps.get_model('finances', 'Expense')
+    Income = apps.get_model('finances', 'Income')
+    CreditCardPayment = apps.get_model('finances', 'CreditCardPayment')
+    CurrencyExchange = apps.get_model('finances', 'CurrencyExchange')
+
+    def total(queryset, account, amount_field):
+        if account.balance_updated_at:
+            queryset = queryset.filter(created_at__gte=account.balance_updated_at)
+        return queryset.aggregate(total=Sum(amount_field))['total'] or 0
+
+    for account in BankAccount.objects.all():
+        account.ledger_income = total(
+            Income.objects.filter(bank_account=account, currency=account.currency), account, 'amount'
+        )
+        account.ledger_expenses = total(
+            Expense.objects.filter(bank_account=account, currency=account.currency), account, 'amount'
+        )
+        account.ledger_credit_card_payments = total(
+            CreditCardPayment.objects.filter(bank_account=account, currency=account.currency), account, 'amount'
+        )
+        account.ledger_exchanges_out = total(
+            CurrencyExchange.objects.filter(from_account=account), account, 'amount_from'
+        )
+        account.ledger_exchanges_in = total(
+            CurrencyExchange.objects.filter(to_account=account), account, 'amount_to'
+        )
+        account.save(update_fields=[
+            'ledger_income',
+            'ledger_expenses',
+            'ledger_credit_card_payments',
+            'ledger_exchanges_out',
+            'ledger_exchanges_in',
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0017_add_currency_exchange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bankaccount',
+            name='ledger_income',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14, verbose_name='Total de ingresos'),
+        ),
+        migrations.AddField(
+            model_name='bankaccount',
+            name='ledger_expenses',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14, verbose_name='Total de gastos'),
+        ),
+        migrations.AddField(
+            model_name='bankaccount',
+            name='ledger_credit_card_payments',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14, verbose_name='Total de pagos de tarjeta'),
+        ),
+        migrations.AddField(
+            model_name='bankaccount',
+            name='ledger_exchanges_out',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14, verbose_name='Total de cambios salientes'),
+        ),
+        migrations.AddField(
+            model_name='bankaccount',
+            name='ledger_exchanges_in',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14, verbose_name='Total de cambios entrantes'),
+        ),
+        migrations.RunPython(populate_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0018_bankaccount_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankAccountCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='Primer día del mes', verbose_name='Mes')),
+                ('inflow', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Entradas acumuladas')),
+                ('outflow', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Salidas acumuladas')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='finances.bankaccount', verbose_name='Cuenta bancaria')),
+            ],
+            options={
+                'verbose_name': 'Checkpoint de saldo',
+                'verbose_name_plural': 'Checkpoints de saldo',
+                'ordering': ['account', 'month'],
+                'constraints': [models.UniqueConstraint(fields=('account', 'month'), name='unique_checkpoint_per_account_month')],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0019_bankaccountcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreditCardStatement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(choices=[('PEN', 'Soles'), ('USD', 'Dólares')], max_length=3, verbose_name='Moneda')),
+                ('period_start', models.DateField(verbose_name='Inicio del ciclo')),
+                ('period_end', models.DateField(verbose_name='Fecha de corte')),
+                ('due_date', models.DateField(verbose_name='Fecha de pago')),
+                ('opening_balance', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Saldo anterior')),
+                ('charges', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Consumos')),
+                ('installment_charges', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Cuotas')),
+                ('payments', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Pagos')),
+                ('closing_balance', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Saldo al corte')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+            ],
+            options={
+                'verbose_name': 'Estado de cuenta',
+                'verbose_name_plural': 'Estados de cuenta',
+                'ordering': ['credit_card', 'period_end', 'currency'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='creditcardpayment',
+            index=models.Index(fields=['credit_card', 'date'], name='payment_card_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['credit_card', 'date'], name='expense_card_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='creditcardstatement',
+            name='credit_card',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statements', to='finances.creditcard', verbose_name='Tarjeta de crédito'),
+        ),
+        migrations.AddConstraint(
+            model_name='creditcardstatement',
+            constraint=models.UniqueConstraint(fields=('credit_card', 'period_end', 'currency'), name='unique_statement_per_card_cycle_currency'),
+        ),
+    ]
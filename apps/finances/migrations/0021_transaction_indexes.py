@@ -0,0 +1,57 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0020_creditcardstatement'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='creditcardpayment',
+            index=models.Index(fields=['user', 'date', 'created_at'], name='payment_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creditcardpayment',
+            index=models.Index(fields=['credit_card', 'currency'], name='payment_card_currency_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creditcardpayment',
+            index=models.Index(fields=['bank_account', 'currency', 'created_at'], name='payment_account_currency_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='currencyexchange',
+            index=models.Index(fields=['user', 'date', 'created_at'], name='exchange_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'date', 'created_at'], name='expense_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'category', 'date'], name='expense_user_category_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['credit_card', 'currency'], name='expense_card_currency_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['bank_account', 'currency', 'created_at'], name='expense_account_currency_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='income',
+            index=models.Index(fields=['user', 'date', 'created_at'], name='income_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='income',
+            index=models.Index(fields=['user', 'category', 'date'], name='income_user_category_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='income',
+            index=models.Index(fields=['bank_account', 'currency', 'created_at'], name='income_account_currency_idx'),
+        ),
+    ]
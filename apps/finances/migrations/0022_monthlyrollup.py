@@ -0,0 +1,57 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_rollups(apps, schema_editor):
+    """Calcula los resúmenes mensuales iniciales con una consulta agrupada por modelo."""
+    MonthlyRollup = apps.get_model('finances', 'MonthlyRollup')
+    for model_name, kind in (('Expense', 'expense'), ('Income', 'income')):
+        model = apps.get_model('finances', model_name)
+        rows = (
+            model.objects
+            .annotate(month=TruncMonth('date'))
+            .order_by()
+            .values('user_id', 'month', 'category_id', 'currency')
+            .annotate(total=Sum('amount'), count=Count('id'))
+        )
+        MonthlyRollup.objects.bulk_create(
+            (MonthlyRollup(kind=kind, **row) for row in rows.iterator()),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0001_initial'),
+        ('finances', '0021_transaction_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='Primer día del mes', verbose_name='Mes')),
+                ('currency', models.CharField(choices=[('PEN', 'Soles'), ('USD', 'Dólares')], max_length=3, verbose_name='Moneda')),
+                ('kind', models.CharField(choices=[('expense', 'Gasto'), ('income', 'Ingreso')], max_length=10, verbose_name='Tipo')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total')),
+                ('count', models.IntegerField(default=0, verbose_name='Cantidad')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='categories.category', verbose_name='Categoría')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Resumen mensual',
+                'verbose_name_plural': 'Resúmenes mensuales',
+                'ordering': ['user', 'month', 'kind'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'month', 'category', 'currency', 'kind'), name='unique_rollup_per_user_month_category_currency_kind', nulls_distinct=False)],
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
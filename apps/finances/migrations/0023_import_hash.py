@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0022_monthlyrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='import_hash',
+            field=models.CharField(blank=True, editable=False, help_text='Identifica el movimiento importado de un estado de cuenta', max_length=64, null=True, verbose_name='Hash de importación'),
+        ),
+        migrations.AddField(
+            model_name='income',
+            name='import_hash',
+            field=models.CharField(blank=True, editable=False, help_text='Identifica el movimiento importado de un estado de cuenta', max_length=64, null=True, verbose_name='Hash de importación'),
+        ),
+        migrations.AddConstraint(
+            model_name='expense',
+            constraint=models.UniqueConstraint(fields=('user', 'import_hash'), name='unique_expense_import_hash'),
+        ),
+        migrations.AddConstraint(
+            model_name='income',
+            constraint=models.UniqueConstraint(fields=('user', 'import_hash'), name='unique_income_import_hash'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:05
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0023_import_hash'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='creditcardpayment',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('description'), name='gin_trgm_ops'), name='payment_description_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('description'), name='gin_trgm_ops'), name='expense_description_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fixedexpense',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='fixedexpense_name_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='income',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('description'), name='gin_trgm_ops'), name='income_description_trgm_idx'),
+        ),
+    ]
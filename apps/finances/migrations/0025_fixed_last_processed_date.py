@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0024_description_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fixedexpense',
+            name='last_processed_date',
+            field=models.DateField(blank=True, help_text='Fecha del último mes en que se convirtió a gasto real', null=True, verbose_name='Última fecha procesada'),
+        ),
+        migrations.AddField(
+            model_name='fixedincome',
+            name='last_processed_date',
+            field=models.DateField(blank=True, help_text='Fecha del último mes en que se convirtió a ingreso real', null=True, verbose_name='Última fecha procesada'),
+        ),
+    ]
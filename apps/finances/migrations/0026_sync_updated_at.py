@@ -0,0 +1,73 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:15
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    """Los movimientos existentes toman como updated_at su fecha de creación."""
+    for model_name in ('Expense', 'Income', 'CreditCardPayment', 'CurrencyExchange'):
+        apps.get_model('finances', model_name).objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0025_fixed_last_processed_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='creditcardpayment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización'),
+        ),
+        migrations.AddField(
+            model_name='currencyexchange',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización'),
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización'),
+        ),
+        migrations.AddField(
+            model_name='income',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización'),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='bankaccount',
+            index=models.Index(fields=['user', 'updated_at'], name='bankaccount_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creditcard',
+            index=models.Index(fields=['user', 'updated_at'], name='creditcard_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creditcardpayment',
+            index=models.Index(fields=['user', 'updated_at'], name='payment_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='currencyexchange',
+            index=models.Index(fields=['user', 'updated_at'], name='exchange_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'updated_at'], name='expense_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fixedexpense',
+            index=models.Index(fields=['user', 'updated_at'], name='fixedexpense_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fixedincome',
+            index=models.Index(fields=['user', 'updated_at'], name='fixedincome_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='income',
+            index=models.Index(fields=['user', 'updated_at'], name='income_user_updated_idx'),
+        ),
+    ]
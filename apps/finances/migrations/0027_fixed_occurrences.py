@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0026_sync_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FixedExpenseOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField(help_text='Primer día del mes', verbose_name='Periodo')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('expense', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='fixed_occurrence', to='finances.expense', verbose_name='Gasto')),
+                ('fixed_expense', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='finances.fixedexpense', verbose_name='Gasto fijo')),
+            ],
+            options={
+                'verbose_name': 'Ocurrencia de gasto fijo',
+                'verbose_name_plural': 'Ocurrencias de gastos fijos',
+                'ordering': ['fixed_expense', 'period'],
+                'constraints': [models.UniqueConstraint(fields=('fixed_expense', 'period'), name='unique_fixedexpense_occurrence_period')],
+            },
+        ),
+        migrations.CreateModel(
+            name='FixedIncomeOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField(help_text='Primer día del mes', verbose_name='Periodo')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('fixed_income', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='finances.fixedincome', verbose_name='Ingreso fijo')),
+                ('income', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='fixed_occurrence', to='finances.income', verbose_name='Ingreso')),
+            ],
+            options={
+                'verbose_name': 'Ocurrencia de ingreso fijo',
+                'verbose_name_plural': 'Ocurrencias de ingresos fijos',
+                'ordering': ['fixed_income', 'period'],
+                'constraints': [models.UniqueConstraint(fields=('fixed_income', 'period'), name='unique_fixedincome_occurrence_period')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:24
+
+import calendar
+from datetime import date
+
+from django.db import migrations, models
+
+
+def backfill_next_due_date(apps, schema_editor):
+    """
+    next_due_date de los fijos existentes: el mes siguiente al de
+    last_processed_date o, si nunca se procesaron, el mes de creación.
+    """
+    for model_name in ('FixedExpense', 'FixedIncome'):
+        model = apps.get_model('finances', model_name)
+        items = list(model.objects.all())
+        for fixed in items:
+            if fixed.last_processed_date:
+                month = fixed.last_processed_date.month + 1
+                year = fixed.last_processed_date.year + (month > 12)
+                month = (month - 1) % 12 + 1
+            else:
+                year, month = fixed.created_at.year, fixed.created_at.month
+            day = min(fixed.day_of_month, calendar.monthrange(year, month)[1])
+            fixed.next_due_date = date(year, month, day)
+        model.objects.bulk_update(items, ['next_due_date'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0027_fixed_occurrences'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fixedexpense',
+            name='next_due_date',
+            field=models.DateField(blank=True, help_text='Fecha del primer mes aún no convertido (se mantiene al guardar y al procesar)', null=True, verbose_name='Próximo vencimiento'),
+        ),
+        migrations.AddField(
+            model_name='fixedincome',
+            name='next_due_date',
+            field=models.DateField(blank=True, help_text='Fecha del primer mes aún no convertido (se mantiene al guardar y al procesar)', null=True, verbose_name='Próximo vencimiento'),
+        ),
+        migrations.AddIndex(
+            model_name='fixedexpense',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['next_due_date'], name='fixedexpense_next_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fixedincome',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['next_due_date'], name='fixedincome_next_due_idx'),
+        ),
+        migrations.RunPython(backfill_next_due_date, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,201 @@
+import copy
 import uuid
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import models, transaction
+from django.db.models import F, Func, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, Upper
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 from apps.categories.models import Category
 
 
-class BankAccount(models.Model):
+# Fecha mínima usada cuando la cuenta no tiene balance_updated_at
+BALANCE_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _sum_subquery(queryset, amount_field):
+    """Envuelve un queryset filtrado por OuterRef en un Subquery que suma amount_field."""
+    total = queryset.order_by().annotate(total=Func(F(amount_field), function='SUM')).values('total')
+    return Coalesce(
+        Subquery(total, output_field=models.DecimalField(max_digits=12, decimal_places=2)),
+        Value(Decimal('0')),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+class SnapshotMixin:
+    """
+    Recuerda los valores cargados desde la base de datos para poder calcular
+    deltas al guardar sin volver a leer la fila.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values)
+            if value is not models.DEFERRED
+        }
+        return instance
+
+    def _remember_loaded_values(self):
+        """Toma los valores actuales como los guardados en la base de datos."""
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+        }
+
+    def previous_state(self):
+        """
+        Retorna una copia de la instancia con los valores guardados en la base
+        de datos, o None si es nueva. Solo consulta la base de datos si la
+        instancia se cargó con campos diferidos.
+        """
+        if self._state.adding:
+            return None
+
+        loaded = getattr(self, '_loaded_values', {})
+        if any(field.attname not in loaded for field in self._meta.concrete_fields):
+            return type(self)._base_manager.filter(pk=self.pk).first()
+
+        previous = copy.copy(self)
+        previous.__dict__.update(loaded)
+        return previous
+
+    def save(self, *args, **kwargs):
+        """Tras guardar, los valores en memoria pasan a ser los de la base de datos."""
+        super().save(*args, **kwargs)
+        self._remember_loaded_values()
+
+
+def card_usage(instance):
+    """
+    Retorna lo que un gasto (suma) o un pago de tarjeta (resta) aporta al
+    consumo de su tarjeta: [(tarjeta, moneda, monto)].
+    """
+    if instance is None or instance.credit_card_id is None:
+        return []
+    amount = Decimal(str(instance.amount))
+    if isinstance(instance, CreditCardPayment):
+        amount = -amount
+    return [(instance.credit_card_id, instance.currency, amount)]
+
+
+def apply_card_usage_changes(removed=(), added=()):
+    """
+    Aplica a used_pen/used_usd la diferencia entre consumos retirados y
+    agregados con un UPDATE atómico por tarjeta (sin leer la tarjeta).
+    Los saldos nunca bajan de cero.
+    """
+    deltas = defaultdict(Decimal)
+    for card_id, currency, amount in removed:
+        deltas[(card_id, currency)] -= amount
+    for card_id, currency, amount in added:
+        deltas[(card_id, currency)] += amount
+
+    per_card = defaultdict(dict)
+    for (card_id, currency), amount in deltas.items():
+        if amount:
+            field = 'used_pen' if currency == 'PEN' else 'used_usd'
+            per_card[card_id][field] = amount
+
+    from django.utils import timezone
+    now = timezone.now()
+    for card_id, fields in per_card.items():
+        CreditCard.objects.filter(pk=card_id).update(
+            updated_at=now,
+            **{field: Greatest(F(field) + amount, Value(Decimal('0'))) for field, amount in fields.items()}
+        )
+
+
+class BankAccountQuerySet(models.QuerySet):
+    """QuerySet de cuentas bancarias con totales anotados."""
+
+    # Anotaciones que reemplazan a las propiedades total_* del modelo
+    ANNOTATED_TOTALS = (
+        'total_fixed_income',
+        'total_fixed_expenses',
+    )
+
+    # Campos del libro mayor materializado en BankAccount
+    LEDGER_FIELDS = (
+        'ledger_income',
+        'ledger_expenses',
+        'ledger_credit_card_payments',
+        'ledger_exchanges_out',
+        'ledger_exchanges_in',
+    )
+
+    def _computed_ledger_expressions(self):
+        """
+        Fórmula agregada de cada campo del libro: suma los movimientos de la
+        cuenta (en su moneda) creados desde balance_updated_at.
+        """
+        since = Coalesce(OuterRef('balance_updated_at'), Value(BALANCE_EPOCH))
+
+        def movements(model, account_field, match_currency=True):
+            queryset = model.objects.filter(**{account_field: OuterRef('pk')}, created_at__gte=since)
+            if match_currency:
+                queryset = queryset.filter(currency=OuterRef('currency'))
+            return queryset
+
+        return {
+            'ledger_income': _sum_subquery(movements(Income, 'bank_account'), 'amount'),
+            'ledger_expenses': _sum_subquery(movements(Expense, 'bank_account'), 'amount'),
+            'ledger_credit_card_payments': _sum_subquery(movements(CreditCardPayment, 'bank_account'), 'amount'),
+            'ledger_exchanges_out': _sum_subquery(
+                movements(CurrencyExchange, 'from_account', match_currency=False), 'amount_from'
+            ),
+            'ledger_exchanges_in': _sum_subquery(
+                movements(CurrencyExchange, 'to_account', match_currency=False), 'amount_to'
+            ),
+        }
+
+    def with_balances(self):
+        """
+        Anota los totales de fijos en una sola consulta. Los demás totales se
+        leen del libro materializado (campos ledger_*), así calculated_balance
+        no necesita más consultas.
+        """
+        from django.utils import timezone
+        current_day = timezone.now().date().day
+
+        def fixed(model):
+            return model.objects.filter(
+                bank_account=OuterRef('pk'),
+                currency=OuterRef('currency'),
+                is_active=True,
+                day_of_month__lte=current_day,
+            )
+
+        return self.annotate(
+            annotated_total_fixed_income=_sum_subquery(fixed(FixedIncome), 'amount'),
+            annotated_total_fixed_expenses=_sum_subquery(fixed(FixedExpense), 'amount'),
+        )
+
+    def with_computed_totals(self):
+        """Anota computed_<campo> con la fórmula agregada de cada campo del libro."""
+        return self.annotate(**{
+            f'computed_{field}': expression
+            for field, expression in self._computed_ledger_expressions().items()
+        })
+
+    def rebuild_ledger(self):
+        """
+        Recalcula el libro de las cuentas del queryset en un solo UPDATE y
+        descarta sus checkpoints mensuales, que se regeneran al consultarlos.
+        """
+        from django.utils import timezone
+        BankAccountCheckpoint.objects.filter(account__in=self.values('pk')).delete()
+        return self.update(updated_at=timezone.now(), **self._computed_ledger_expressions())
+
+
+class BankAccount(SnapshotMixin, models.Model):
     """Modelo para cuentas bancarias."""
 
     CURRENCY_CHOICES = [
@@ -55,40 +244,89 @@ class BankAccount(models.Model):
         blank=True,
         help_text='Si tiene valor, solo gastos/ingresos creados después de esta fecha afectan el saldo'
     )
+    # Libro mayor materializado: se actualiza con deltas al escribir movimientos
+    # (ver apps.finances.ledger) y se reconstruye con `manage.py rebuild_ledger`.
+    ledger_income = models.DecimalField(
+        'Total de ingresos', max_digits=14, decimal_places=2, default=0, editable=False
+    )
+    ledger_expenses = models.DecimalField(
+        'Total de gastos', max_digits=14, decimal_places=2, default=0, editable=False
+    )
+    ledger_credit_card_payments = models.DecimalField(
+        'Total de pagos de tarjeta', max_digits=14, decimal_places=2, default=0, editable=False
+    )
+    ledger_exchanges_out = models.DecimalField(
+        'Total de cambios salientes', max_digits=14, decimal_places=2, default=0, editable=False
+    )
+    ledger_exchanges_in = models.DecimalField(
+        'Total de cambios entrantes', max_digits=14, decimal_places=2, default=0, editable=False
+    )
     created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
     updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
 
+    objects = BankAccountQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Cuenta bancaria'
         verbose_name_plural = 'Cuentas bancarias'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='bankaccount_user_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.user.username}"
 
+    def save(self, *args, **kwargs):
+        """
+        Nunca sobrescribe el libro con valores en memoria (se mantiene con
+        UPDATEs atómicos) y lo reconstruye si cambian la moneda o la fecha de
+        saldo respecto de los valores cargados (SnapshotMixin).
+        """
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+
+        previous = self.previous_state()
+        if kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in BankAccountQuerySet.LEDGER_FIELDS
+            ]
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if previous and (
+                previous.currency != self.currency
+                or previous.balance_updated_at != self.balance_updated_at
+            ):
+                BankAccount.objects.filter(pk=self.pk).rebuild_ledger()
+                self.refresh_from_db(fields=BankAccountQuerySet.LEDGER_FIELDS)
+
+    def _annotated(self, name):
+        """Retorna el total anotado por with_balances(), o None si no existe."""
+        return self.__dict__.get(f'annotated_{name}')
+
+    def clear_annotated_totals(self):
+        """Descarta los totales anotados (p. ej. tras cambiar moneda o fecha de saldo)."""
+        for name in BankAccountQuerySet.ANNOTATED_TOTALS:
+            self.__dict__.pop(f'annotated_{name}', None)
+
     @property
     def total_income(self):
-        """Calcula el total de ingresos de esta cuenta en su moneda."""
-        from django.db.models import Sum
-        queryset = self.incomes.filter(currency=self.currency)
-        if self.balance_updated_at:
-            queryset = queryset.filter(created_at__gte=self.balance_updated_at)
-        total = queryset.aggregate(total=Sum('amount'))['total']
-        return total or 0
+        """Total de ingresos de esta cuenta en su moneda."""
+        return self.ledger_income
 
     @property
     def total_expenses(self):
-        """Calcula el total de gastos de esta cuenta en su moneda."""
-        from django.db.models import Sum
-        queryset = self.expenses.filter(currency=self.currency)
-        if self.balance_updated_at:
-            queryset = queryset.filter(created_at__gte=self.balance_updated_at)
-        total = queryset.aggregate(total=Sum('amount'))['total']
-        return total or 0
+        """Total de gastos de esta cuenta en su moneda."""
+        return self.ledger_expenses
 
     @property
     def total_fixed_income(self):
         """Calcula el total de ingresos fijos que ya deberían haberse aplicado este mes."""
+        annotated = self._annotated('total_fixed_income')
+        if annotated is not None:
+            return annotated
         from django.db.models import Sum
         from django.utils import timezone
         today = timezone.now().date()
@@ -105,6 +343,9 @@ class BankAccount(models.Model):
     @property
     def total_fixed_expenses(self):
         """Calcula el total de gastos fijos que ya deberían haberse aplicado este mes."""
+        annotated = self._annotated('total_fixed_expenses')
+        if annotated is not None:
+            return annotated
         from django.db.models import Sum
         from django.utils import timezone
         today = timezone.now().date()
@@ -120,33 +361,18 @@ class BankAccount(models.Model):
 
     @property
     def total_credit_card_payments(self):
-        """Calcula el total de pagos de tarjeta de crédito desde esta cuenta."""
-        from django.db.models import Sum
-        queryset = self.credit_card_payments.filter(currency=self.currency)
-        if self.balance_updated_at:
-            queryset = queryset.filter(created_at__gte=self.balance_updated_at)
-        total = queryset.aggregate(total=Sum('amount'))['total']
-        return total or 0
+        """Total de pagos de tarjeta de crédito desde esta cuenta."""
+        return self.ledger_credit_card_payments
 
     @property
     def total_exchanges_out(self):
-        """Calcula el total de cambios de divisa salientes (dinero que sale de esta cuenta)."""
-        from django.db.models import Sum
-        queryset = self.exchanges_out.all()
-        if self.balance_updated_at:
-            queryset = queryset.filter(created_at__gte=self.balance_updated_at)
-        total = queryset.aggregate(total=Sum('amount_from'))['total']
-        return total or 0
+        """Total de cambios de divisa salientes (dinero que sale de esta cuenta)."""
+        return self.ledger_exchanges_out
 
     @property
     def total_exchanges_in(self):
-        """Calcula el total de cambios de divisa entrantes (dinero que entra a esta cuenta)."""
-        from django.db.models import Sum
-        queryset = self.exchanges_in.all()
-        if self.balance_updated_at:
-            queryset = queryset.filter(created_at__gte=self.balance_updated_at)
-        total = queryset.aggregate(total=Sum('amount_to'))['total']
-        return total or 0
+        """Total de cambios de divisa entrantes (dinero que entra a esta cuenta)."""
+        return self.ledger_exchanges_in
 
     @property
     def calculated_balance(self):
@@ -165,7 +391,41 @@ class BankAccount(models.Model):
         return result
 
 
-class CreditCard(models.Model):
+class BankAccountCheckpoint(models.Model):
+    """
+    Saldo acumulado de una cuenta al cierre de un mes.
+
+    inflow/outflow acumulan los movimientos que cuentan para el libro con fecha
+    hasta el fin de mes; el saldo a esa fecha es balance - outflow + inflow
+    (según subtract_expenses/add_incomes). Se mantienen con deltas en
+    apps.finances.ledger y se generan bajo demanda en apps.finances.balance_history.
+    """
+
+    account = models.ForeignKey(
+        BankAccount,
+        on_delete=models.CASCADE,
+        related_name='checkpoints',
+        verbose_name='Cuenta bancaria'
+    )
+    month = models.DateField('Mes', help_text='Primer día del mes')
+    inflow = models.DecimalField('Entradas acumuladas', max_digits=14, decimal_places=2, default=0)
+    outflow = models.DecimalField('Salidas acumuladas', max_digits=14, decimal_places=2, default=0)
+    created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
+    updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Checkpoint de saldo'
+        verbose_name_plural = 'Checkpoints de saldo'
+        ordering = ['account', 'month']
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'month'], name='unique_checkpoint_per_account_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.account.name} - {self.month:%Y-%m}"
+
+
+class CreditCard(SnapshotMixin, models.Model):
     """Modelo para tarjetas de crédito."""
 
     COLOR_CHOICES = [
@@ -231,12 +491,92 @@ class CreditCard(models.Model):
         verbose_name = 'Tarjeta de crédito'
         verbose_name_plural = 'Tarjetas de crédito'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='creditcard_user_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} (*{self.last_four_digits})"
 
+    def save(self, *args, **kwargs):
+        """
+        No reescribe used_pen/used_usd si no cambiaron en memoria: se mantienen
+        con deltas atómicos y un valor leído antes podría estar desactualizado.
+        """
+        previous = getattr(self, '_loaded_values', None)
+        if not self._state.adding and previous and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and not (field.name in ('used_pen', 'used_usd') and previous.get(field.attname) == getattr(self, field.attname))
+            ]
+        super().save(*args, **kwargs)
+
+    def recalculate_used_amounts(self):
+        """
+        Recalcula used_pen/used_usd desde cero (gastos menos pagos, mínimo cero).
+        Es una vía de reparación: el uso normal se mantiene con deltas.
+        """
+        from django.db.models import Sum
+
+        used = {'PEN': Decimal('0'), 'USD': Decimal('0')}
+        for item in self.expenses.order_by().values('currency').annotate(total=Sum('amount')):
+            used[item['currency']] += item['total'] or 0
+        for item in self.payments.order_by().values('currency').annotate(total=Sum('amount')):
+            used[item['currency']] -= item['total'] or 0
+
+        self.used_pen = max(Decimal('0'), used['PEN'])
+        self.used_usd = max(Decimal('0'), used['USD'])
+        self.save(update_fields=['used_pen', 'used_usd', 'updated_at'])
+
+
+class CreditCardStatement(models.Model):
+    """
+    Estado de cuenta de un ciclo de facturación ya cerrado, por moneda.
+
+    Un ciclo cerrado no cambia salvo que se edite un movimiento con fecha
+    dentro de él o anterior; en ese caso apps.finances.statements elimina
+    los estados desde esa fecha y se recalculan bajo demanda.
+    """
+
+    CURRENCY_CHOICES = [
+        ('PEN', 'Soles'),
+        ('USD', 'Dólares'),
+    ]
+
+    credit_card = models.ForeignKey(
+        CreditCard,
+        on_delete=models.CASCADE,
+        related_name='statements',
+        verbose_name='Tarjeta de crédito'
+    )
+    currency = models.CharField('Moneda', max_length=3, choices=CURRENCY_CHOICES)
+    period_start = models.DateField('Inicio del ciclo')
+    period_end = models.DateField('Fecha de corte')
+    due_date = models.DateField('Fecha de pago')
+    opening_balance = models.DecimalField('Saldo anterior', max_digits=14, decimal_places=2, default=0)
+    charges = models.DecimalField('Consumos', max_digits=14, decimal_places=2, default=0)
+    installment_charges = models.DecimalField('Cuotas', max_digits=14, decimal_places=2, default=0)
+    payments = models.DecimalField('Pagos', max_digits=14, decimal_places=2, default=0)
+    closing_balance = models.DecimalField('Saldo al corte', max_digits=14, decimal_places=2, default=0)
+    created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Estado de cuenta'
+        verbose_name_plural = 'Estados de cuenta'
+        ordering = ['credit_card', 'period_end', 'currency']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['credit_card', 'period_end', 'currency'],
+                name='unique_statement_per_card_cycle_currency'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.credit_card.name} - {self.period_end} ({self.currency})"
+
 
-class Expense(models.Model):
+class Expense(SnapshotMixin, models.Model):
     """Modelo para gastos."""
 
     CURRENCY_CHOICES = [
@@ -289,12 +629,36 @@ class Expense(models.Model):
         related_name='expenses',
         verbose_name='Cuenta bancaria'
     )
+    import_hash = models.CharField(
+        'Hash de importación',
+        max_length=64,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='Identifica el movimiento importado de un estado de cuenta'
+    )
     created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
+    updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
 
     class Meta:
         verbose_name = 'Gasto'
         verbose_name_plural = 'Gastos'
         ordering = ['-date', '-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'import_hash'],
+                name='unique_expense_import_hash'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'date', 'created_at'], name='expense_user_date_idx'),
+            models.Index(fields=['user', 'category', 'date'], name='expense_user_category_date_idx'),
+            models.Index(fields=['credit_card', 'date'], name='expense_card_date_idx'),
+            models.Index(fields=['credit_card', 'currency'], name='expense_card_currency_idx'),
+            models.Index(fields=['bank_account', 'currency', 'created_at'], name='expense_account_currency_idx'),
+            GinIndex(OpClass(Upper('description'), name='gin_trgm_ops'), name='expense_description_trgm_idx'),
+            models.Index(fields=['user', 'updated_at'], name='expense_user_updated_idx'),
+        ]
 
     def __str__(self):
         symbol = 'S/' if self.currency == 'PEN' else '$'
@@ -302,51 +666,45 @@ class Expense(models.Model):
 
     def save(self, *args, **kwargs):
         """Actualiza el monto usado de la tarjeta al guardar."""
-        is_new = self._state.adding
-        old_instance = None
-
-        if not is_new:
-            old_instance = Expense.objects.filter(pk=self.pk).first()
+        previous = self.previous_state()
 
-        super().save(*args, **kwargs)
-
-        # Revertir el impacto en la tarjeta anterior si cambió
-        if old_instance and old_instance.credit_card:
-            if old_instance.credit_card != self.credit_card or old_instance.currency != self.currency or old_instance.amount != self.amount:
-                self._update_card_used_amount(old_instance.credit_card)
-
-        # Aplicar el impacto en la tarjeta actual
-        if self.credit_card:
-            self._update_card_used_amount(self.credit_card)
+        # El libro de la cuenta se actualiza en post_save: todo en una transacción
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            apply_card_usage_changes(removed=card_usage(previous), added=card_usage(self))
 
     def delete(self, *args, **kwargs):
         """Actualiza el monto usado de la tarjeta al eliminar."""
-        card = self.credit_card
-        super().delete(*args, **kwargs)
-        if card:
-            self._update_card_used_amount(card)
-
-    def _update_card_used_amount(self, card):
-        """Recalcula el monto usado de una tarjeta separado por moneda."""
-        from django.db.models import Sum
-
-        totals = card.expenses.values('currency').annotate(total=Sum('amount'))
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            apply_card_usage_changes(removed=card_usage(self))
+        return result
 
-        used_pen = 0
-        used_usd = 0
 
-        for item in totals:
-            if item['currency'] == 'PEN':
-                used_pen = item['total'] or 0
-            elif item['currency'] == 'USD':
-                used_usd = item['total'] or 0
+class NextDueDateMixin:
+    """
+    Para gastos e ingresos fijos: recalcula next_due_date (el primer mes aún
+    no materializado) cada vez que se guardan, así las búsquedas de
+    pendientes son un rango sobre un índice parcial de los fijos activos.
+    """
 
-        card.used_pen = used_pen
-        card.used_usd = used_usd
-        card.save(update_fields=['used_pen', 'used_usd', 'updated_at'])
+    def save(self, *args, **kwargs):
+        """
+        También adelanta la marca fixed_due_date del usuario si este fijo vence
+        antes (la marca solo puede quedar antes de lo que realmente vence).
+        """
+        from .recurring import next_due_date
+        self.next_due_date = next_due_date(self)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'next_due_date'}
+        super().save(*args, **kwargs)
+        if self.is_active:
+            self._meta.get_field('user').related_model.objects.filter(
+                pk=self.user_id, fixed_due_date__gt=self.next_due_date
+            ).update(fixed_due_date=self.next_due_date)
 
 
-class FixedExpense(models.Model):
+class FixedExpense(NextDueDateMixin, models.Model):
     """Modelo para gastos fijos recurrentes."""
 
     CURRENCY_CHOICES = [
@@ -409,6 +767,12 @@ class FixedExpense(models.Model):
         blank=True,
         help_text='Fecha del último mes en que se convirtió a gasto real'
     )
+    next_due_date = models.DateField(
+        'Próximo vencimiento',
+        null=True,
+        blank=True,
+        help_text='Fecha del primer mes aún no convertido (se mantiene al guardar y al procesar)'
+    )
     created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
     updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
 
@@ -416,13 +780,61 @@ class FixedExpense(models.Model):
         verbose_name = 'Gasto fijo'
         verbose_name_plural = 'Gastos fijos'
         ordering = ['day_of_month', 'name']
+        indexes = [
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='fixedexpense_name_trgm_idx'),
+            models.Index(fields=['user', 'updated_at'], name='fixedexpense_user_updated_idx'),
+            models.Index(
+                fields=['next_due_date'],
+                condition=models.Q(is_active=True),
+                name='fixedexpense_next_due_idx',
+            ),
+        ]
 
     def __str__(self):
         symbol = 'S/' if self.currency == 'PEN' else '$'
         return f"{self.name} - {symbol} {self.amount}"
 
 
-class Income(models.Model):
+class FixedExpenseOccurrence(models.Model):
+    """
+    Mes en que un gasto fijo ya se convirtió en gasto real.
+
+    La restricción única (fijo, periodo) garantiza que cada mes se materialice
+    una sola vez aunque process_pending y process_fixed corran a la vez: las
+    ocurrencias se insertan con ON CONFLICT DO NOTHING en
+    apps.finances.recurring y solo se crean los movimientos de las insertadas.
+    """
+
+    fixed_expense = models.ForeignKey(
+        FixedExpense,
+        on_delete=models.CASCADE,
+        related_name='occurrences',
+        verbose_name='Gasto fijo'
+    )
+    period = models.DateField('Periodo', help_text='Primer día del mes')
+    expense = models.OneToOneField(
+        Expense,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='fixed_occurrence',
+        verbose_name='Gasto'
+    )
+    created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Ocurrencia de gasto fijo'
+        verbose_name_plural = 'Ocurrencias de gastos fijos'
+        ordering = ['fixed_expense', 'period']
+        constraints = [
+            models.UniqueConstraint(fields=['fixed_expense', 'period'], name='unique_fixedexpense_occurrence_period'),
+        ]
+
+    def __str__(self):
+        return f"{self.fixed_expense.name} - {self.period:%Y-%m}"
+
+
+class Income(SnapshotMixin, models.Model):
     """Modelo para ingresos."""
 
     CURRENCY_CHOICES = [
@@ -467,19 +879,46 @@ class Income(models.Model):
         related_name='incomes',
         verbose_name='Cuenta bancaria'
     )
+    import_hash = models.CharField(
+        'Hash de importación',
+        max_length=64,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='Identifica el movimiento importado de un estado de cuenta'
+    )
     created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
+    updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
 
     class Meta:
         verbose_name = 'Ingreso'
         verbose_name_plural = 'Ingresos'
         ordering = ['-date', '-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'import_hash'],
+                name='unique_income_import_hash'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'date', 'created_at'], name='income_user_date_idx'),
+            models.Index(fields=['user', 'category', 'date'], name='income_user_category_date_idx'),
+            models.Index(fields=['bank_account', 'currency', 'created_at'], name='income_account_currency_idx'),
+            GinIndex(OpClass(Upper('description'), name='gin_trgm_ops'), name='income_description_trgm_idx'),
+            models.Index(fields=['user', 'updated_at'], name='income_user_updated_idx'),
+        ]
 
     def __str__(self):
         symbol = 'S/' if self.currency == 'PEN' else '$'
         return f"{self.description} - {symbol} {self.amount}"
 
+    def save(self, *args, **kwargs):
+        """Guarda el ingreso y actualiza el libro de la cuenta en la misma transacción."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
-class FixedIncome(models.Model):
+
+class FixedIncome(NextDueDateMixin, models.Model):
     """Modelo para ingresos fijos recurrentes."""
 
     CURRENCY_CHOICES = [
@@ -534,6 +973,12 @@ class FixedIncome(models.Model):
         blank=True,
         help_text='Fecha del último mes en que se convirtió a ingreso real'
     )
+    next_due_date = models.DateField(
+        'Próximo vencimiento',
+        null=True,
+        blank=True,
+        help_text='Fecha del primer mes aún no convertido (se mantiene al guardar y al procesar)'
+    )
     created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
     updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
 
@@ -541,13 +986,60 @@ class FixedIncome(models.Model):
         verbose_name = 'Ingreso fijo'
         verbose_name_plural = 'Ingresos fijos'
         ordering = ['day_of_month', 'name']
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='fixedincome_user_updated_idx'),
+            models.Index(
+                fields=['next_due_date'],
+                condition=models.Q(is_active=True),
+                name='fixedincome_next_due_idx',
+            ),
+        ]
 
     def __str__(self):
         symbol = 'S/' if self.currency == 'PEN' else '$'
         return f"{self.name} - {symbol} {self.amount}"
 
 
-class CreditCardPayment(models.Model):
+class FixedIncomeOccurrence(models.Model):
+    """
+    Mes en que un ingreso fijo ya se convirtió en ingreso real.
+
+    La restricción única (fijo, periodo) garantiza que cada mes se materialice
+    una sola vez aunque process_pending y process_fixed corran a la vez: las
+    ocurrencias se insertan con ON CONFLICT DO NOTHING en
+    apps.finances.recurring y solo se crean los movimientos de las insertadas.
+    """
+
+    fixed_income = models.ForeignKey(
+        FixedIncome,
+        on_delete=models.CASCADE,
+        related_name='occurrences',
+        verbose_name='Ingreso fijo'
+    )
+    period = models.DateField('Periodo', help_text='Primer día del mes')
+    income = models.OneToOneField(
+        Income,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='fixed_occurrence',
+        verbose_name='Ingreso'
+    )
+    created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Ocurrencia de ingreso fijo'
+        verbose_name_plural = 'Ocurrencias de ingresos fijos'
+        ordering = ['fixed_income', 'period']
+        constraints = [
+            models.UniqueConstraint(fields=['fixed_income', 'period'], name='unique_fixedincome_occurrence_period'),
+        ]
+
+    def __str__(self):
+        return f"{self.fixed_income.name} - {self.period:%Y-%m}"
+
+
+class CreditCardPayment(SnapshotMixin, models.Model):
     """Modelo para pagos de tarjetas de crédito."""
 
     CURRENCY_CHOICES = [
@@ -597,67 +1089,46 @@ class CreditCardPayment(models.Model):
         default=''
     )
     created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
+    updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
 
     class Meta:
         verbose_name = 'Pago de tarjeta'
         verbose_name_plural = 'Pagos de tarjetas'
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['user', 'date', 'created_at'], name='payment_user_date_idx'),
+            models.Index(fields=['credit_card', 'date'], name='payment_card_date_idx'),
+            models.Index(fields=['credit_card', 'currency'], name='payment_card_currency_idx'),
+            models.Index(fields=['bank_account', 'currency', 'created_at'], name='payment_account_currency_idx'),
+            GinIndex(OpClass(Upper('description'), name='gin_trgm_ops'), name='payment_description_trgm_idx'),
+            models.Index(fields=['user', 'updated_at'], name='payment_user_updated_idx'),
+        ]
 
     def __str__(self):
         symbol = 'S/' if self.currency == 'PEN' else '$'
         return f"Pago {self.credit_card.name} - {symbol} {self.amount}"
 
     def save(self, *args, **kwargs):
-        """Al guardar, reduce el saldo usado de la tarjeta."""
-        is_new = self._state.adding
-        old_instance = None
+        """
+        Al guardar, reduce el saldo usado de la tarjeta. En una edición el pago
+        anterior se revierte y el nuevo se aplica en el mismo UPDATE atómico.
+        """
+        previous = self.previous_state()
 
-        if not is_new:
-            old_instance = CreditCardPayment.objects.filter(pk=self.pk).first()
-
-        super().save(*args, **kwargs)
-
-        # Si es edición, revertir el pago anterior
-        if old_instance:
-            self._revert_payment(old_instance)
-
-        # Aplicar el nuevo pago
-        self._apply_payment()
+        # El libro de la cuenta se actualiza en post_save: todo en una transacción
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            apply_card_usage_changes(removed=card_usage(previous), added=card_usage(self))
 
     def delete(self, *args, **kwargs):
         """Al eliminar, revierte el pago (suma al saldo usado)."""
-        card = self.credit_card
-        amount = self.amount
-        currency = self.currency
-        super().delete(*args, **kwargs)
-
-        # Revertir: sumar de vuelta al usado
-        if currency == 'PEN':
-            card.used_pen += amount
-        else:
-            card.used_usd += amount
-        card.save(update_fields=['used_pen', 'used_usd', 'updated_at'])
-
-    def _apply_payment(self):
-        """Reduce el saldo usado de la tarjeta según la moneda del pago."""
-        card = self.credit_card
-        if self.currency == 'PEN':
-            card.used_pen = max(0, card.used_pen - self.amount)
-        else:
-            card.used_usd = max(0, card.used_usd - self.amount)
-        card.save(update_fields=['used_pen', 'used_usd', 'updated_at'])
-
-    def _revert_payment(self, old_instance):
-        """Revierte un pago anterior (para ediciones)."""
-        card = old_instance.credit_card
-        if old_instance.currency == 'PEN':
-            card.used_pen += old_instance.amount
-        else:
-            card.used_usd += old_instance.amount
-        card.save(update_fields=['used_pen', 'used_usd', 'updated_at'])
-
-
-class CurrencyExchange(models.Model):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            apply_card_usage_changes(removed=card_usage(self))
+        return result
+
+
+class CurrencyExchange(SnapshotMixin, models.Model):
     """Modelo para cambios de divisa entre cuentas."""
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -708,15 +1179,25 @@ class CurrencyExchange(models.Model):
         default=''
     )
     created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
+    updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
 
     class Meta:
         verbose_name = 'Cambio de divisa'
         verbose_name_plural = 'Cambios de divisa'
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['user', 'date', 'created_at'], name='exchange_user_date_idx'),
+            models.Index(fields=['user', 'updated_at'], name='exchange_user_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.amount_from} {self.from_account.currency} → {self.amount_to} {self.to_account.currency}"
 
+    def save(self, *args, **kwargs):
+        """Guarda el cambio y actualiza el libro de ambas cuentas en la misma transacción."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def clean(self):
         """Valida que las cuentas tengan monedas diferentes."""
         from django.core.exceptions import ValidationError
@@ -725,3 +1206,59 @@ class CurrencyExchange(models.Model):
                 raise ValidationError('Las cuentas deben tener monedas diferentes')
             if self.from_account.user != self.to_account.user:
                 raise ValidationError('Las cuentas deben pertenecer al mismo usuario')
+
+
+class MonthlyRollup(models.Model):
+    """
+    Totales mensuales de gastos o ingresos por categoría y moneda.
+
+    Se mantienen con deltas en apps.finances.rollups al crear, editar o
+    eliminar un gasto o ingreso, y se reconstruyen con
+    `manage.py rebuild_rollups`. Las estadísticas los leen en lugar de
+    recorrer los movimientos.
+    """
+
+    KIND_CHOICES = [
+        ('expense', 'Gasto'),
+        ('income', 'Ingreso'),
+    ]
+
+    CURRENCY_CHOICES = [
+        ('PEN', 'Soles'),
+        ('USD', 'Dólares'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='monthly_rollups',
+        verbose_name='Usuario'
+    )
+    month = models.DateField('Mes', help_text='Primer día del mes')
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='monthly_rollups',
+        verbose_name='Categoría',
+        null=True,
+        blank=True
+    )
+    currency = models.CharField('Moneda', max_length=3, choices=CURRENCY_CHOICES)
+    kind = models.CharField('Tipo', max_length=10, choices=KIND_CHOICES)
+    total = models.DecimalField('Total', max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField('Cantidad', default=0)
+
+    class Meta:
+        verbose_name = 'Resumen mensual'
+        verbose_name_plural = 'Resúmenes mensuales'
+        ordering = ['user', 'month', 'kind']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'month', 'category', 'currency', 'kind'],
+                name='unique_rollup_per_user_month_category_currency_kind',
+                nulls_distinct=False,
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.month:%Y-%m} {self.kind} ({self.currency})"
@@ -0,0 +1,100 @@
+"""
+Paginación de los listados de movimientos.
+
+Por defecto se mantiene la paginación numerada global. Con ?pagination=cursor
+se usa paginación por cursor (keyset) sobre el orden (-date, -created_at, id):
+cada página filtra las filas posteriores a la última de la página anterior,
+sin OFFSET ni COUNT(*), así su costo no depende de cuán atrás esté.
+"""
+import base64
+import binascii
+import json
+import uuid
+from datetime import date, datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class TransactionPagination(PageNumberPagination):
+    """Paginación numerada, o por cursor con ?pagination=cursor."""
+
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    cursor_page_size_query_param = 'page_size'
+    cursor_page_size = 50
+    max_cursor_page_size = 500
+    ordering = ('-date', '-created_at', 'id')
+    # Columnas que debe incluir cada fila para armar el cursor
+    cursor_fields = ('date', 'created_at', 'id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = request.query_params.get(self.mode_query_param) == 'cursor'
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_cursor_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            queryset = self.after(queryset, self.decode_cursor(token))
+
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_cursor_link(),
+            'results': data,
+        })
+
+    def get_cursor_page_size(self, request):
+        """Tamaño de página pedido con ?page_size= (entre 1 y max_cursor_page_size)."""
+        value = request.query_params.get(self.cursor_page_size_query_param)
+        if not value:
+            return self.cursor_page_size
+        try:
+            return min(max(int(value), 1), self.max_cursor_page_size)
+        except ValueError:
+            raise ValidationError({'error': 'page_size debe ser un número'})
+
+    def after(self, queryset, position):
+        """Filtra las filas que van después de position en el orden (-date, -created_at, id)."""
+        row_date, created_at, row_id = position
+        return queryset.filter(
+            Q(date__lt=row_date)
+            | Q(date=row_date, created_at__lt=created_at)
+            | Q(date=row_date, created_at=created_at, id__gt=row_id)
+        )
+
+    def get_next_cursor_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def encode_cursor(self, row):
+        """Codifica la posición de una fila (instancia o diccionario de .values())."""
+        if isinstance(row, dict):
+            values = [row[field] for field in self.cursor_fields]
+        else:
+            values = [getattr(row, field) for field in self.cursor_fields]
+        payload = json.dumps([values[0].isoformat(), values[1].isoformat(), str(values[2])])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, token):
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            row_date, created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return date.fromisoformat(row_date), datetime.fromisoformat(created_at), uuid.UUID(row_id)
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+            raise ValidationError({'error': 'cursor inválido'})
@@ -0,0 +1,211 @@
+"""
+Proyección mes a mes del saldo de las cuentas y la deuda de las tarjetas.
+
+Parte del saldo actual de cada cuenta (calculated_balance) y del consumo de
+cada tarjeta (used_pen/used_usd), y agrega:
+
+- Gastos e ingresos fijos activos en su day_of_month: en la cuenta si es de
+  su moneda (con las mismas reglas que calculated_balance) y, los gastos, en
+  su tarjeta. Del mes actual solo los de días que aún no llegan; los demás ya
+  están en el saldo.
+- Cuotas (Installment) activas en la fecha de cada cuota desde el mes actual,
+  incluidas las de días de este mes que ya pasaron: las cuotas no suman a
+  used_pen/used_usd, así que no están en el consumo actual.
+- Pagos de tarjeta: en cada fecha de pago se paga completo lo consumido en el
+  ciclo que vence (ver apps.finances.statements) y el consumo actual se paga
+  en el próximo vencimiento. Los pagos se informan por tarjeta y no se
+  descuentan de ninguna cuenta, porque la cuenta se elige al pagar.
+
+Todo se calcula en centavos enteros: cada aporte suma en la posición de su
+mes de una lista por cuenta o por tarjeta y moneda, y los saldos al cierre de
+cada mes son la suma acumulada de la lista. Las entradas se leen en cinco
+consultas, sin importar cuántos meses se proyecten.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from itertools import accumulate
+
+from apps.installments.models import Installment
+
+from .balance_history import month_end
+from .models import BankAccount, CreditCard, FixedExpense, FixedIncome
+from .recurring import add_months
+from .statements import CURRENCIES, build_cycle, cycle_for
+
+
+# Meses que se proyectan por defecto y como máximo
+DEFAULT_PROJECTION_MONTHS = 12
+MAX_PROJECTION_MONTHS = 36
+
+# Campos de los fijos que usa la proyección
+FIXED_FIELDS = ('amount', 'currency', 'day_of_month', 'bank_account_id')
+
+# Campos de las cuotas que usa la proyección
+INSTALLMENT_FIELDS = ('credit_card_id', 'currency', 'total_amount', 'total_installments', 'start_date')
+
+
+def to_cents(amount):
+    """Monto en centavos enteros."""
+    return int((Decimal(str(amount)) * 100).to_integral_value())
+
+
+def from_cents(cents):
+    """Centavos como Decimal con dos decimales."""
+    return Decimal(cents).scaleb(-2)
+
+
+def month_index(first_month, day):
+    """Posición del mes de `day` contando desde first_month (0)."""
+    return (day.year - first_month.year) * 12 + day.month - first_month.month
+
+
+def next_card_due_date(card, today):
+    """Fecha de pago del consumo actual: la del ciclo anterior si aún no vence."""
+    current = cycle_for(card, today)
+    previous_month = add_months(current.end.replace(day=1), -1)
+    previous = build_cycle(card, previous_month.year, previous_month.month)
+    if previous.due_date >= today:
+        return previous.due_date
+    return current.due_date
+
+
+def project(accounts, cards, fixed_expenses, fixed_incomes, installments, today, months):
+    """
+    Calcula la proyección con las entradas ya cargadas. Retorna
+    (fechas de cierre, {cuenta: saldos}, {(tarjeta, moneda): (deudas, pagos)})
+    con los montos en centavos.
+
+    Los fijos y las cuotas se agrupan primero por cuenta o tarjeta y día del
+    mes (las cuotas como un rango de meses en una lista de diferencias), así
+    el trabajo por mes depende de cuántos días distintos hay y no de cuántos
+    fijos o cuotas. En el mes actual solo cuentan los fijos de días que aún no
+    llegan (la regla de calculated_balance) y todas las cuotas del mes.
+    """
+    first_month = today.replace(day=1)
+    ends = [month_end(add_months(first_month, index)) for index in range(months)]
+    lengths = [end.day for end in ends]
+    accounts_by_id = {account.pk: account for account in accounts}
+    cards_by_id = {card.pk: card for card in cards}
+
+    def first_index(day_of_month):
+        return 0 if day_of_month > today.day else 1
+
+    # Cuenta -> diferencias por mes de su flujo mensual
+    account_flows = {account_id: [0] * months for account_id in accounts_by_id}
+    # (tarjeta, moneda, día) -> diferencias por mes de lo que se consume ese día
+    card_days = defaultdict(lambda: [0] * (months + 1))
+    for rows, sign, option in ((fixed_incomes, 1, 'add_incomes'), (fixed_expenses, -1, 'subtract_expenses')):
+        for row in rows:
+            cents = to_cents(row['amount'])
+            start = first_index(row['day_of_month'])
+            account = accounts_by_id.get(row['bank_account_id'])
+            if account and getattr(account, option) and account.currency == row['currency']:
+                if start < months:
+                    account_flows[row['bank_account_id']][start] += sign * cents
+            if row.get('credit_card_id') in cards_by_id:
+                card_days[row['credit_card_id'], row['currency'], row['day_of_month']][start] += cents
+
+    for row in installments:
+        if row['credit_card_id'] not in cards_by_id or not row['total_installments']:
+            continue
+        # Como Installment.monthly_amount
+        cents = to_cents((row['total_amount'] / row['total_installments']).quantize(Decimal('0.01')))
+        start_date = row['start_date']
+        start = month_index(first_month, start_date)
+        stop = min(start + row['total_installments'], months)
+        start = max(start, 0)
+        if start < stop:
+            differences = card_days[row['credit_card_id'], row['currency'], start_date.day]
+            differences[start] += cents
+            differences[stop] -= cents
+
+    charges = defaultdict(lambda: [0] * months)
+    # Una posición extra para los pagos que caen después del último mes
+    payments = defaultdict(lambda: [0] * (months + 1))
+    for (card_id, currency, day), differences in card_days.items():
+        card = cards_by_id[card_id]
+        cut_off = card.cut_off_date
+        # El ciclo vence el mes del corte si el día de pago es posterior (build_cycle)
+        late = 0 if card.payment_date > cut_off else 1
+        card_charges = charges[card_id, currency]
+        card_payments = payments[card_id, currency]
+        amount = 0
+        for index in range(months):
+            amount += differences[index]
+            if amount:
+                card_charges[index] += amount
+                # El consumo cierra este mes si su día (ajustado) no pasa del corte (ajustado)
+                closing = index if day <= cut_off or cut_off >= lengths[index] else index + 1
+                card_payments[min(closing + late, months)] += amount
+
+    balances = {
+        account.pk: list(accumulate(
+            accumulate(account_flows[account.pk]), initial=to_cents(account.calculated_balance)
+        ))[1:]
+        for account in accounts
+    }
+
+    debts = {}
+    for card in cards:
+        due_date = next_card_due_date(card, today)
+        for currency in CURRENCIES:
+            used = to_cents(card.used_pen if currency == 'PEN' else card.used_usd)
+            card_payments = payments[card.pk, currency]
+            if used and due_date <= ends[-1]:
+                card_payments[month_index(first_month, due_date)] += used
+            card_payments = card_payments[:months]
+            net = [charged - paid for charged, paid in zip(charges[card.pk, currency], card_payments)]
+            debts[card.pk, currency] = (list(accumulate(net, initial=used))[1:], card_payments)
+
+    return ends, balances, debts
+
+
+def load_inputs(user):
+    """Entradas de la proyección del usuario, en cinco consultas."""
+    return (
+        list(BankAccount.objects.filter(user=user).with_balances()),
+        list(CreditCard.objects.filter(user=user)),
+        list(FixedExpense.objects.filter(user=user, is_active=True).values(*FIXED_FIELDS, 'credit_card_id')),
+        list(FixedIncome.objects.filter(user=user, is_active=True).values(*FIXED_FIELDS)),
+        list(Installment.objects.filter(user=user, is_active=True).values(*INSTALLMENT_FIELDS)),
+    )
+
+
+def projection(user, today, months=DEFAULT_PROJECTION_MONTHS):
+    """Proyección de las cuentas y tarjetas del usuario para `months` meses."""
+    inputs = load_inputs(user)
+    accounts, cards = inputs[:2]
+    ends, balances, debts = project(*inputs, today, months)
+
+    return {
+        'bank_accounts': [
+            {
+                'account_id': str(account.id),
+                'name': account.name,
+                'currency': account.currency,
+                'points': [
+                    {'date': end.isoformat(), 'balance': from_cents(balance)}
+                    for end, balance in zip(ends, balances[account.pk])
+                ],
+            }
+            for account in accounts
+        ],
+        'credit_cards': [
+            {
+                'credit_card_id': str(card.id),
+                'name': card.name,
+                'points': [
+                    {
+                        'date': end.isoformat(),
+                        **{
+                            f'{field}_{currency.lower()}': from_cents(debts[card.pk, currency][position][index])
+                            for currency in CURRENCIES
+                            for position, field in enumerate(('debt', 'payments'))
+                        },
+                    }
+                    for index, end in enumerate(ends)
+                ],
+            }
+            for card in cards
+        ],
+    }
@@ -0,0 +1,235 @@
+"""
+Materialización de gastos e ingresos fijos en movimientos reales.
+
+Los meses pendientes de cada fijo se calculan en memoria y los movimientos de
+un usuario se insertan con bulk_create_movements (un INSERT por lote y los
+efectos sobre tarjetas, libro y resúmenes aplicados una vez por lote, es decir,
+un UPDATE por tarjeta tocada); last_processed_date se actualiza con un solo
+bulk_update (junto con next_due_date, el primer mes aún pendiente, que es lo
+que se consulta para encontrar trabajo). Todo lo de un usuario se guarda en
+una transacción.
+
+Cada mes materializado queda registrado como ocurrencia (fijo, periodo) con
+restricción única. Las ocurrencias se insertan con ON CONFLICT DO NOTHING y
+solo se crean los movimientos de las que realmente se insertaron, así
+process_pending, process_fixed y varios nodos pueden procesar a la vez sin
+duplicar movimientos. En PostgreSQL, además, la transacción toma un
+pg_advisory_xact_lock por usuario para que dos procesos no calculen a la vez
+los pendientes del mismo usuario (sin bloquear a los demás usuarios).
+
+User.fixed_due_date guarda la fecha antes de la cual no vence ningún fijo del
+usuario. process_due_fixed la lee del usuario ya cargado por la autenticación
+y, si aún no llega, retorna sin consultar la base de datos.
+"""
+import calendar
+from datetime import date
+from itertools import chain
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .bulk import bulk_create_movements
+from .models import Expense, FixedExpense, FixedExpenseOccurrence, FixedIncome, FixedIncomeOccurrence, Income
+
+
+# fixed_due_date de un usuario sin fijos activos
+NOTHING_DUE = date.max
+
+# Tipo de movimiento -> (modelo de ocurrencias, campo del fijo, campo del movimiento)
+OCCURRENCE_MODELS = {
+    Expense: (FixedExpenseOccurrence, 'fixed_expense', 'expense'),
+    Income: (FixedIncomeOccurrence, 'fixed_income', 'income'),
+}
+
+
+def add_months(source_date, months):
+    """Suma o resta meses a una fecha."""
+    month = source_date.month - 1 + months
+    year = source_date.year + month // 12
+    month = month % 12 + 1
+    day = min(source_date.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day)
+
+
+def last_day_of_month(d):
+    """Retorna el último día del mes."""
+    return calendar.monthrange(d.year, d.month)[1]
+
+
+def due_dates(fixed, today, backfill=False, months_back=12):
+    """
+    Fechas de los meses en que el fijo debió aplicarse y aún no se procesó:
+    solo el mes actual o, con backfill, hasta months_back meses atrás (sin
+    pasar del mes en que se creó el fijo).
+    """
+    current_month = today.replace(day=1)
+
+    if backfill:
+        start_month = max(add_months(current_month, -months_back), fixed.created_at.date().replace(day=1))
+    else:
+        start_month = current_month
+
+    # Los meses hasta el de last_processed_date (inclusive) ya se procesaron
+    if fixed.last_processed_date:
+        start_month = max(start_month, add_months(fixed.last_processed_date.replace(day=1), 1))
+
+    dates = []
+    check_month = start_month
+    while check_month <= current_month:
+        target_date = check_month.replace(day=min(fixed.day_of_month, last_day_of_month(check_month)))
+        # Solo si la fecha ya pasó (o es hoy)
+        if target_date <= today:
+            dates.append(target_date)
+        check_month = add_months(check_month, 1)
+    return dates
+
+
+def next_due_date(fixed):
+    """
+    Fecha del primer mes aún no materializado del fijo: el mes siguiente al
+    de last_processed_date o, si nunca se procesó, el mes en que se creó.
+    """
+    if fixed.last_processed_date:
+        month = add_months(fixed.last_processed_date.replace(day=1), 1)
+    else:
+        month = (fixed.created_at or timezone.now()).date().replace(day=1)
+    return month.replace(day=min(fixed.day_of_month, last_day_of_month(month)))
+
+
+def due_fixed(model, today):
+    """
+    Fijos activos (FixedExpense o FixedIncome) con algún mes pendiente:
+    un rango sobre el índice parcial de next_due_date, cuyo costo depende de
+    lo que vence y no de cuántos fijos hay.
+    """
+    return model.objects.filter(is_active=True, next_due_date__lte=today)
+
+
+def occurrence(fixed, target_date):
+    """Gasto o ingreso (sin guardar) del fijo en la fecha indicada."""
+    data = {
+        'user_id': fixed.user_id,
+        'amount': fixed.amount,
+        'currency': fixed.currency,
+        'category_id': fixed.category_id,
+        'description': f"{fixed.name} (Fijo)",
+        'date': target_date,
+        'bank_account_id': fixed.bank_account_id,
+    }
+    if isinstance(fixed, FixedExpense):
+        return Expense(credit_card_id=fixed.credit_card_id, **data)
+    return Income(**data)
+
+
+def lock_user(user_id):
+    """
+    Bloqueo por usuario hasta el fin de la transacción (pg_advisory_xact_lock
+    con los 64 bits altos del UUID). En otras bases no hace nada.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', [(user_id.int >> 64) - (1 << 63)])
+
+
+def claim_occurrences(movement_model, rows):
+    """
+    Inserta las ocurrencias (fijo, periodo, movimiento) con ON CONFLICT DO
+    NOTHING. Retorna los ids de los movimientos cuyas ocurrencias se
+    insertaron: los demás meses ya los materializó otro proceso.
+    """
+    model, fixed_field, movement_field = OCCURRENCE_MODELS[movement_model]
+    table = connection.ops.quote_name(model._meta.db_table)
+    fields = [
+        model._meta.get_field(name)
+        for name in (fixed_field, 'period', movement_field, 'created_at')
+    ]
+    quoted = [connection.ops.quote_name(field.column) for field in fields]
+    now = timezone.now()
+    rows = [(fixed_id, period, movement_id, now) for fixed_id, period, movement_id in rows]
+
+    claimed = set()
+    batch_size = connection.ops.bulk_batch_size(fields, rows) or len(rows)
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        placeholders = ', '.join(['(%s, %s, %s, %s)'] * len(batch))
+        sql = (
+            f"INSERT INTO {table} ({', '.join(quoted)}) VALUES {placeholders} "
+            f"ON CONFLICT ({quoted[0]}, {quoted[1]}) DO NOTHING "
+            f"RETURNING {quoted[2]}"
+        )
+        params = [
+            field.get_db_prep_save(value, connection)
+            for row in batch
+            for field, value in zip(fields, row)
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            claimed.update(fields[2].to_python(movement_id) for movement_id, in cursor.fetchall())
+    return claimed
+
+
+def process_fixed_items(fixed_items, today, backfill=False, months_back=12):
+    """
+    Crea los movimientos pendientes de los fijos (de un mismo usuario) en una
+    transacción y marca los fijos procesados. Retorna los movimientos creados.
+    """
+    pending = {Expense: [], Income: []}
+    processed = {FixedExpense: [], FixedIncome: []}
+    for fixed in fixed_items:
+        dates = due_dates(fixed, today, backfill, months_back)
+        if not dates:
+            continue
+        for target_date in dates:
+            instance = occurrence(fixed, target_date)
+            pending[type(instance)].append((fixed.pk, target_date.replace(day=1), instance))
+        fixed.last_processed_date = today
+        fixed.next_due_date = next_due_date(fixed)
+        processed[type(fixed)].append(fixed)
+
+    if not any(processed.values()):
+        return []
+
+    created = []
+    with transaction.atomic():
+        lock_user(next(fixed for items in processed.values() for fixed in items).user_id)
+        for movement_model, rows in pending.items():
+            if not rows:
+                continue
+            claimed = claim_occurrences(movement_model, [
+                (fixed_id, period, instance.pk) for fixed_id, period, instance in rows
+            ])
+            created.extend(bulk_create_movements([
+                instance for _, _, instance in rows if instance.pk in claimed
+            ]))
+        for model, items in processed.items():
+            if items:
+                model.objects.bulk_update(items, ['last_processed_date', 'next_due_date'])
+    return created
+
+
+def refresh_fixed_due_date(user):
+    """Recalcula y guarda user.fixed_due_date: el menor next_due_date de sus fijos activos."""
+    dates = [
+        model.objects.filter(user=user, is_active=True).aggregate(due=Min('next_due_date'))['due']
+        for model in (FixedExpense, FixedIncome)
+    ]
+    user.fixed_due_date = min([due for due in dates if due] or [NOTHING_DUE])
+    get_user_model().objects.filter(pk=user.pk).update(fixed_due_date=user.fixed_due_date)
+
+
+def process_due_fixed(user, today, models=(FixedExpense, FixedIncome), backfill=False, months_back=12):
+    """
+    Procesa los fijos vencidos del usuario (de los modelos indicados) y
+    actualiza su fixed_due_date en la misma transacción. Si fixed_due_date
+    indica que nada vence hasta después de hoy, retorna sin consultas.
+    """
+    if user.fixed_due_date is not None and user.fixed_due_date > today:
+        return []
+    fixed_items = chain.from_iterable(due_fixed(model, today).filter(user=user) for model in models)
+    with transaction.atomic():
+        created = process_fixed_items(fixed_items, today, backfill, months_back)
+        refresh_fixed_due_date(user)
+    return created
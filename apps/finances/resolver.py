@@ -0,0 +1,91 @@
+"""
+Resolución de categorías, tarjetas y cuentas referenciadas en una solicitud.
+
+Los serializers de escritura reciben ids (category, credit_card_id,
+bank_account_id, ...) que deben pertenecer al usuario. UserObjects carga
+cada tipo una sola vez por solicitud (todas las filas del usuario en una
+consulta, la primera vez que se pide uno) y resuelve desde memoria los ids y
+la cuenta por defecto de cada moneda, así una escritura hace como máximo una
+consulta por tipo en lugar de un .get() por campo y por validación.
+"""
+from rest_framework import serializers
+
+from apps.categories.models import Category
+
+from .models import BankAccount, CreditCard
+
+
+# Atributo de la solicitud donde se guarda su UserObjects
+REQUEST_ATTRIBUTE = '_user_objects'
+
+# Error de validación cuando el id no pertenece al usuario
+NOT_FOUND_MESSAGES = {
+    'category': 'Categoría no encontrada',
+    'credit_card': 'Tarjeta de crédito no encontrada',
+    'bank_account': 'Cuenta bancaria no encontrada',
+}
+
+
+class UserObjects:
+    """Categorías, tarjetas y cuentas de un usuario, cargadas bajo demanda."""
+
+    def __init__(self, user):
+        self.user = user
+        self._loaded = {}
+
+    def _objects(self, model):
+        """Objetos del usuario por id (una consulta la primera vez)."""
+        if model not in self._loaded:
+            self._loaded[model] = {obj.pk: obj for obj in model.objects.filter(user=self.user)}
+        return self._loaded[model]
+
+    def category(self, pk):
+        """Categoría del usuario con ese id, o None."""
+        return self._objects(Category).get(pk)
+
+    def credit_card(self, pk):
+        """Tarjeta de crédito del usuario con ese id, o None."""
+        return self._objects(CreditCard).get(pk)
+
+    def bank_account(self, pk):
+        """Cuenta bancaria del usuario con ese id, o None."""
+        return self._objects(BankAccount).get(pk)
+
+    def default_account(self, currency):
+        """
+        Cuenta que se asigna automáticamente a un movimiento de esa moneda:
+        la primera según el orden del modelo, igual que
+        BankAccount.objects.filter(user=user, currency=currency).first().
+        """
+        for account in self._objects(BankAccount).values():
+            if account.currency == currency:
+                return account
+        return None
+
+
+def user_objects(request):
+    """UserObjects de la solicitud (se crea la primera vez que se pide)."""
+    resolver = getattr(request, REQUEST_ATTRIBUTE, None)
+    if resolver is None or resolver.user != request.user:
+        resolver = UserObjects(request.user)
+        setattr(request, REQUEST_ATTRIBUTE, resolver)
+    return resolver
+
+
+class RelatedObjectsMixin:
+    """
+    Para serializers de escritura: resuelve los ids recibidos con el
+    UserObjects de la solicitud. Un id que no es del usuario es un error de
+    validación del campo.
+    """
+
+    def resolve(self, kind, pk, field):
+        """Objeto `kind` (category, credit_card o bank_account) con ese id."""
+        obj = getattr(user_objects(self.context['request']), kind)(pk)
+        if obj is None:
+            raise serializers.ValidationError({field: [NOT_FOUND_MESSAGES[kind]]})
+        return obj
+
+    def default_account(self, currency):
+        """Cuenta por defecto del usuario para esa moneda, o None."""
+        return user_objects(self.context['request']).default_account(currency)
@@ -0,0 +1,146 @@
+"""
+Resúmenes mensuales (MonthlyRollup) de gastos e ingresos.
+
+Cada gasto o ingreso aporta su monto y una unidad al resumen de
+(usuario, mes, categoría, moneda, tipo). Los aportes se aplican como deltas
+atómicos (INSERT ... ON CONFLICT DO UPDATE, o UPDATE con F() cuando solo se
+resta) que suman sobre la fila existente, así dos escrituras concurrentes no
+se pisan.
+"""
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+from .balance_history import month_start
+from .models import Expense, Income, MonthlyRollup
+
+
+# Aporte de un movimiento a un resumen mensual
+RollupEntry = namedtuple('RollupEntry', ['user_id', 'month', 'category_id', 'currency', 'kind', 'total', 'count'])
+
+# Por modelo: tipo de resumen
+ROLLUP_KINDS = {
+    'Expense': 'expense',
+    'Income': 'income',
+}
+
+ROLLUP_MODELS = (
+    (Expense, 'expense'),
+    (Income, 'income'),
+)
+
+
+def rollup_entries(instance):
+    """Retorna el aporte de un gasto o ingreso a su resumen mensual."""
+    if instance is None:
+        return []
+    return [RollupEntry(
+        user_id=instance.user_id,
+        month=month_start(instance.date),
+        category_id=instance.category_id,
+        currency=instance.currency,
+        kind=ROLLUP_KINDS[type(instance).__name__],
+        total=Decimal(str(instance.amount)),
+        count=1,
+    )]
+
+
+def apply_rollup_changes(removed=(), added=()):
+    """
+    Aplica los aportes retirados y agregados a los resúmenes mensuales.
+
+    Los aportes que se cancelan (p. ej. editar solo la descripción) no
+    generan consultas; los que suman se aplican en un solo INSERT de varias
+    filas.
+    """
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for entry in removed:
+        key = entry[:5]
+        deltas[key][0] -= entry.total
+        deltas[key][1] -= entry.count
+    for entry in added:
+        key = entry[:5]
+        deltas[key][0] += entry.total
+        deltas[key][1] += entry.count
+
+    rows = sorted(
+        ((*key, total, count) for key, (total, count) in deltas.items() if total or count),
+        key=lambda row: tuple(str(value) for value in row[:5]),
+    )
+
+    # Lo que solo resta (p. ej. al eliminar) actualiza filas existentes: un
+    # INSERT podría recrear el resumen de un usuario que se está eliminando.
+    # Sin restricciones únicas con NULLS NOT DISTINCT (p. ej. SQLite) no hay
+    # ON CONFLICT posible y cada fila se actualiza o se crea por separado.
+    upsert = connection.features.supports_nulls_distinct_unique_constraints
+    pending = []
+    for user_id, month, category_id, currency, kind, total, count in rows:
+        if count >= 0 and upsert:
+            pending.append((user_id, month, category_id, currency, kind, total, count))
+            continue
+        updated = MonthlyRollup.objects.filter(
+            user_id=user_id, month=month, category_id=category_id, currency=currency, kind=kind
+        ).update(total=F('total') + total, count=F('count') + count)
+        if not updated and count >= 0:
+            MonthlyRollup.objects.create(
+                user_id=user_id, month=month, category_id=category_id, currency=currency, kind=kind,
+                total=total, count=count,
+            )
+    rows = pending
+    if not rows:
+        return
+
+    table = connection.ops.quote_name(MonthlyRollup._meta.db_table)
+    columns = ('user_id', 'month', 'category_id', 'currency', 'kind', 'total', 'count')
+    quoted = [connection.ops.quote_name(column) for column in columns]
+    placeholders = ', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(rows))
+    sql = (
+        f"INSERT INTO {table} ({', '.join(quoted)}) VALUES {placeholders} "
+        f"ON CONFLICT ({', '.join(quoted[:5])}) DO UPDATE SET "
+        f"{quoted[5]} = {table}.{quoted[5]} + EXCLUDED.{quoted[5]}, "
+        f"{quoted[6]} = {table}.{quoted[6]} + EXCLUDED.{quoted[6]}"
+    )
+
+    fields = [MonthlyRollup._meta.get_field(column.removesuffix('_id')) for column in columns]
+    params = [
+        field.get_db_prep_save(value, connection)
+        for row in rows
+        for field, value in zip(fields, row)
+    ]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def rebuild_rollups(users=None):
+    """
+    Recalcula desde cero los resúmenes mensuales (de todos los usuarios o de
+    los indicados) con una consulta agrupada por tipo de movimiento.
+    Retorna la cantidad de resúmenes creados.
+    """
+    to_create = []
+    for model, kind in ROLLUP_MODELS:
+        queryset = model.objects.all()
+        if users is not None:
+            queryset = queryset.filter(user__in=users)
+        rows = (
+            queryset
+            .annotate(month=TruncMonth('date'))
+            .order_by()
+            .values('user_id', 'month', 'category_id', 'currency')
+            .annotate(total=Sum('amount'), count=Count('id'))
+        )
+        to_create.extend(
+            MonthlyRollup(kind=kind, **row) for row in rows.iterator()
+        )
+
+    with transaction.atomic():
+        existing = MonthlyRollup.objects.all()
+        if users is not None:
+            existing = existing.filter(user__in=users)
+        existing.delete()
+        MonthlyRollup.objects.bulk_create(to_create, batch_size=1000)
+    return len(to_create)
@@ -0,0 +1,65 @@
+"""
+Búsqueda por descripción en los listados de movimientos.
+
+?search= busca en el campo `search_field` de la vista (la descripción, o el
+nombre en gastos fijos) con ?search_mode=:
+
+- contains (default): cada palabra debe aparecer en el texto.
+- prefix: el texto o alguna de sus palabras empieza con la búsqueda (para
+  autocompletar mientras se escribe).
+- fuzzy: similitud de trigramas, tolera errores de tipeo.
+
+Los resultados se ordenan por relevancia (similitud de trigramas de
+pg_trgm) y luego por el orden del listado. Las tres variantes comparan
+contra UPPER(campo), que es la expresión del índice GIN gin_trgm_ops de
+cada tabla, así ninguna recorre todas las filas del usuario.
+"""
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Q
+from django.db.models.functions import Upper
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
+
+SEARCH_MODES = ('contains', 'prefix', 'fuzzy')
+
+
+class DescriptionSearchFilter(SearchFilter):
+    """SearchFilter con modos contains/prefix/fuzzy y orden por relevancia."""
+
+    mode_param = 'search_mode'
+
+    def filter_queryset(self, request, queryset, view):
+        field = getattr(view, 'search_field', None)
+        query = ' '.join(request.query_params.get(self.search_param, '').split())
+        if field is None or not query:
+            return queryset
+
+        mode = request.query_params.get(self.mode_param, 'contains')
+        if mode not in SEARCH_MODES:
+            raise ValidationError({'error': 'search_mode debe ser "contains", "prefix" o "fuzzy"'})
+
+        if mode == 'fuzzy':
+            queryset = queryset.annotate(search_text=Upper(field)).filter(
+                search_text__trigram_word_similar=query.upper()
+            )
+        elif mode == 'prefix':
+            queryset = queryset.filter(
+                Q(**{f'{field}__istartswith': query}) | Q(**{f'{field}__icontains': f' {query}'})
+            )
+        else:
+            for term in query.split(' '):
+                queryset = queryset.filter(**{f'{field}__icontains': term})
+
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        return queryset.annotate(
+            search_rank=TrigramWordSimilarity(query.upper(), Upper(field))
+        ).order_by('-search_rank', *ordering)
+
+
+# Filtros por defecto con DescriptionSearchFilter en lugar de SearchFilter
+SEARCH_FILTER_BACKENDS = [
+    DescriptionSearchFilter if backend is SearchFilter else backend
+    for backend in api_settings.DEFAULT_FILTER_BACKENDS
+]
@@ -1,6 +1,149 @@
-from rest_framework import serializers
-from apps.categories.models import Category
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from .bulk import bulk_create_movements
 from .models import BankAccount, CreditCard, CreditCardPayment, CurrencyExchange, Expense, FixedExpense, FixedIncome, Income
+from .resolver import NOT_FOUND_MESSAGES, RelatedObjectsMixin, user_objects
+
+
+def _compiled_converter(field):
+    """
+    Retorna la conversión de un valor no nulo equivalente a
+    field.to_representation, resolviendo una sola vez lo que DRF resuelve
+    en cada llamada (zona horaria y formato de fechas, formato de UUID).
+    """
+    if isinstance(field, serializers.UUIDField) and field.uuid_format == 'hex_verbose':
+        return str
+    if isinstance(field, serializers.DateTimeField):
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if output_format and output_format.lower() != ISO_8601 and field_timezone is not None:
+            def convert(value):
+                if isinstance(value, str):
+                    return value
+                return value.astimezone(field_timezone).strftime(output_format)
+            return convert
+    return field.to_representation
+
+
+class SparseFieldsetMixin:
+    """
+    Permite pedir solo algunos campos en lecturas con ?fields=id,amount,date.
+
+    related_id_fields indica los campos que se representan con el id de una
+    relación ({campo: atributo}); con él, row_mapper() arma la misma salida
+    que to_representation() a partir de filas de .values(), sin instanciar
+    modelos ni recorrer el serializer fila por fila.
+    """
+
+    fields_query_param = 'fields'
+    related_id_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return
+        requested = request.query_params.get(self.fields_query_param)
+        if not requested:
+            return
+
+        requested = {name.strip() for name in requested.split(',') if name.strip()}
+        unknown = requested - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError({'error': f"Campos desconocidos: {', '.join(sorted(unknown))}"})
+        for name in list(self.fields):
+            if name not in requested:
+                self.fields.pop(name)
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        for name, attname in self.related_id_fields.items():
+            if name in data:
+                value = getattr(instance, attname)
+                data[name] = str(value) if value else None
+        return data
+
+    def _value_column(self, name, field):
+        """Columna de .values() de un campo (source 'a.b' se lee como a__b)."""
+        return self.related_id_fields.get(name, field.source.replace('.', '__'))
+
+    def value_columns(self):
+        """Columnas de .values() necesarias para los campos visibles."""
+        return [
+            self._value_column(name, field)
+            for name, field in self.fields.items()
+            if not field.write_only
+        ]
+
+    def row_mapper(self):
+        """
+        Retorna una función fila -> diccionario equivalente a to_representation()
+        para filas de .values(self.value_columns()). Los campos y sus
+        conversiones se resuelven una sola vez.
+        """
+        spec = tuple(
+            (name, self._value_column(name, field), _compiled_converter(field))
+            for name, field in self.fields.items()
+            if not field.write_only
+        )
+
+        def to_dict(row):
+            return {
+                name: None if row[column] is None else convert(row[column])
+                for name, column, convert in spec
+            }
+        return to_dict
+
+
+class BulkMovementListSerializer(serializers.ListSerializer):
+    """
+    Alta masiva de gastos o ingresos (acción bulk de los ViewSets).
+
+    Valida todos los elementos juntos: las categorías, tarjetas y cuentas
+    referenciadas se resuelven con el UserObjects de la solicitud (una
+    consulta por tipo para todo el lote), y create() inserta las filas con
+    bulk_create en una sola transacción.
+    """
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        objects = user_objects(self.context['request'])
+
+        errors = {}
+        for index, item in enumerate(items):
+            item_errors = {}
+            item['category'] = objects.category(item['category'])
+            if item['category'] is None:
+                item_errors['category'] = [NOT_FOUND_MESSAGES['category']]
+
+            credit_card_id = item.pop('credit_card_id', None)
+            bank_account_id = item.pop('bank_account_id', None)
+            if credit_card_id:
+                item['credit_card'] = objects.credit_card(credit_card_id)
+                if item['credit_card'] is None:
+                    item_errors['credit_card_id'] = [NOT_FOUND_MESSAGES['credit_card']]
+            elif bank_account_id:
+                item['bank_account'] = objects.bank_account(bank_account_id)
+                if item['bank_account'] is None:
+                    item_errors['bank_account_id'] = [NOT_FOUND_MESSAGES['bank_account']]
+            else:
+                # Auto-asignar cuenta bancaria según la moneda
+                item['bank_account'] = objects.default_account(item.get('currency', 'PEN'))
+
+            if item_errors:
+                errors[index] = item_errors
+
+        if errors:
+            # Mismo formato de errores que ListSerializer (dict por índice desde DRF 3.18)
+            if not getattr(api_settings, 'LIST_SERIALIZER_ERRORS_AS_DICT', False):
+                errors = [errors.get(index, {}) for index in range(len(items))]
+            raise serializers.ValidationError(errors)
+        return items
+
+    def create(self, validated_data):
+        user = self.context['request'].user
+        model = self.child.Meta.model
+        return bulk_create_movements([model(user=user, **attrs) for attrs in validated_data])
 
 
 class BankAccountSerializer(serializers.ModelSerializer):
@@ -51,7 +194,10 @@ class BankAccountSerializer(serializers.ModelSerializer):
         if reset_balance_date:
             validated_data['balance_updated_at'] = timezone.now()
 
-        return super().update(instance, validated_data)
+        instance = super().update(instance, validated_data)
+        # La moneda o la fecha de saldo pueden haber cambiado: recalcular totales
+        instance.clear_annotated_totals()
+        return instance
 
 
 class CreditCardSerializer(serializers.ModelSerializer):
@@ -74,15 +220,22 @@ class CreditCardSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class ExpenseSerializer(serializers.ModelSerializer):
+class ExpenseSerializer(RelatedObjectsMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer para gastos."""
 
     category = serializers.UUIDField()
     credit_card_id = serializers.UUIDField(required=False, allow_null=True)
     bank_account_id = serializers.UUIDField(required=False, allow_null=True)
 
+    related_id_fields = {
+        'category': 'category_id',
+        'credit_card_id': 'credit_card_id',
+        'bank_account_id': 'bank_account_id',
+    }
+
     class Meta:
         model = Expense
+        list_serializer_class = BulkMovementListSerializer
         fields = [
             'id',
             'amount',
@@ -104,16 +257,16 @@ class ExpenseSerializer(serializers.ModelSerializer):
         validated_data['user'] = user
 
         # Buscar categoría del usuario
-        validated_data['category'] = Category.objects.get(id=category_id, user=user)
+        validated_data['category'] = self.resolve('category', category_id, 'category')
 
         if credit_card_id:
-            validated_data['credit_card'] = CreditCard.objects.get(id=credit_card_id, user=user)
+            validated_data['credit_card'] = self.resolve('credit_card', credit_card_id, 'credit_card_id')
         elif bank_account_id:
-            validated_data['bank_account'] = BankAccount.objects.get(id=bank_account_id, user=user)
+            validated_data['bank_account'] = self.resolve('bank_account', bank_account_id, 'bank_account_id')
         else:
             # Auto-asignar cuenta bancaria según la moneda del gasto
             currency = validated_data.get('currency', 'PEN')
-            bank_account = BankAccount.objects.filter(user=user, currency=currency).first()
+            bank_account = self.default_account(currency)
             if bank_account:
                 validated_data['bank_account'] = bank_account
 
@@ -123,10 +276,9 @@ class ExpenseSerializer(serializers.ModelSerializer):
         credit_card_id = validated_data.pop('credit_card_id', None)
         bank_account_id = validated_data.pop('bank_account_id', None)
         category_id = validated_data.pop('category', None)
-        user = self.context['request'].user
 
         if category_id is not None:
-            validated_data['category'] = Category.objects.get(id=category_id, user=user)
+            validated_data['category'] = self.resolve('category', category_id, 'category')
 
         # Determinar currency (del update o del existente)
         currency = validated_data.get('currency', instance.currency)
@@ -134,32 +286,25 @@ class ExpenseSerializer(serializers.ModelSerializer):
         if credit_card_id is not None:
             if credit_card_id:
                 # Usa tarjeta de crédito, quitar cuenta bancaria
-                validated_data['credit_card'] = CreditCard.objects.get(id=credit_card_id, user=user)
+                validated_data['credit_card'] = self.resolve('credit_card', credit_card_id, 'credit_card_id')
                 validated_data['bank_account'] = None
             else:
                 # Quita tarjeta, auto-asignar cuenta según currency
                 validated_data['credit_card'] = None
                 if bank_account_id:
-                    validated_data['bank_account'] = BankAccount.objects.get(id=bank_account_id, user=user)
+                    validated_data['bank_account'] = self.resolve('bank_account', bank_account_id, 'bank_account_id')
                 else:
-                    bank_account = BankAccount.objects.filter(user=user, currency=currency).first()
+                    bank_account = self.default_account(currency)
                     if bank_account:
                         validated_data['bank_account'] = bank_account
         elif bank_account_id is not None:
             if bank_account_id:
-                validated_data['bank_account'] = BankAccount.objects.get(id=bank_account_id, user=user)
+                validated_data['bank_account'] = self.resolve('bank_account', bank_account_id, 'bank_account_id')
             else:
                 validated_data['bank_account'] = None
 
         return super().update(instance, validated_data)
 
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        data['category'] = str(instance.category_id) if instance.category_id else None
-        data['credit_card_id'] = str(instance.credit_card_id) if instance.credit_card_id else None
-        data['bank_account_id'] = str(instance.bank_account_id) if instance.bank_account_id else None
-        return data
-
 
 class ExpenseStatsSerializer(serializers.Serializer):
     """Serializer para estadísticas de gastos."""
@@ -170,14 +315,20 @@ class ExpenseStatsSerializer(serializers.Serializer):
     year = serializers.IntegerField()
 
 
-class IncomeSerializer(serializers.ModelSerializer):
+class IncomeSerializer(RelatedObjectsMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer para ingresos."""
 
     category = serializers.UUIDField()
     bank_account_id = serializers.UUIDField(required=False, allow_null=True)
 
+    related_id_fields = {
+        'category': 'category_id',
+        'bank_account_id': 'bank_account_id',
+    }
+
     class Meta:
         model = Income
+        list_serializer_class = BulkMovementListSerializer
         fields = [
             'id',
             'amount',
@@ -197,14 +348,14 @@ class IncomeSerializer(serializers.ModelSerializer):
         validated_data['user'] = user
 
         # Buscar categoría del usuario
-        validated_data['category'] = Category.objects.get(id=category_id, user=user)
+        validated_data['category'] = self.resolve('category', category_id, 'category')
 
         if bank_account_id:
-            validated_data['bank_account'] = BankAccount.objects.get(id=bank_account_id, user=user)
+            validated_data['bank_account'] = self.resolve('bank_account', bank_account_id, 'bank_account_id')
         else:
             # Auto-asignar cuenta bancaria según la moneda
             currency = validated_data.get('currency', 'PEN')
-            bank_account = BankAccount.objects.filter(user=user, currency=currency).first()
+            bank_account = self.default_account(currency)
             if bank_account:
                 validated_data['bank_account'] = bank_account
 
@@ -213,33 +364,32 @@ class IncomeSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         bank_account_id = validated_data.pop('bank_account_id', None)
         category_id = validated_data.pop('category', None)
-        user = self.context['request'].user
 
         if category_id is not None:
-            validated_data['category'] = Category.objects.get(id=category_id, user=user)
+            validated_data['category'] = self.resolve('category', category_id, 'category')
 
         if bank_account_id is not None:
             if bank_account_id:
-                validated_data['bank_account'] = BankAccount.objects.get(id=bank_account_id, user=user)
+                validated_data['bank_account'] = self.resolve('bank_account', bank_account_id, 'bank_account_id')
             else:
                 validated_data['bank_account'] = None
 
         return super().update(instance, validated_data)
 
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        data['category'] = str(instance.category_id) if instance.category_id else None
-        data['bank_account_id'] = str(instance.bank_account_id) if instance.bank_account_id else None
-        return data
-
 
-class FixedExpenseSerializer(serializers.ModelSerializer):
+class FixedExpenseSerializer(RelatedObjectsMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer para gastos fijos."""
 
     category = serializers.UUIDField()
     credit_card_id = serializers.UUIDField(required=False, allow_null=True)
     bank_account_id = serializers.UUIDField(required=False, allow_null=True)
 
+    related_id_fields = {
+        'category': 'category_id',
+        'credit_card_id': 'credit_card_id',
+        'bank_account_id': 'bank_account_id',
+    }
+
     class Meta:
         model = FixedExpense
         fields = [
@@ -264,16 +414,16 @@ class FixedExpenseSerializer(serializers.ModelSerializer):
         validated_data['user'] = user
 
         # Buscar categoría del usuario
-        validated_data['category'] = Category.objects.get(id=category_id, user=user)
+        validated_data['category'] = self.resolve('category', category_id, 'category')
 
         if credit_card_id:
-            validated_data['credit_card'] = CreditCard.objects.get(id=credit_card_id, user=user)
+            validated_data['credit_card'] = self.resolve('credit_card', credit_card_id, 'credit_card_id')
         elif bank_account_id:
-            validated_data['bank_account'] = BankAccount.objects.get(id=bank_account_id, user=user)
+            validated_data['bank_account'] = self.resolve('bank_account', bank_account_id, 'bank_account_id')
         else:
             # Auto-asignar cuenta bancaria según la moneda
             currency = validated_data.get('currency', 'PEN')
-            bank_account = BankAccount.objects.filter(user=user, currency=currency).first()
+            bank_account = self.default_account(currency)
             if bank_account:
                 validated_data['bank_account'] = bank_account
 
@@ -283,39 +433,36 @@ class FixedExpenseSerializer(serializers.ModelSerializer):
         credit_card_id = validated_data.pop('credit_card_id', None)
         bank_account_id = validated_data.pop('bank_account_id', None)
         category_id = validated_data.pop('category', None)
-        user = self.context['request'].user
 
         if category_id is not None:
-            validated_data['category'] = Category.objects.get(id=category_id, user=user)
+            validated_data['category'] = self.resolve('category', category_id, 'category')
 
         if credit_card_id is not None:
             if credit_card_id:
-                validated_data['credit_card'] = CreditCard.objects.get(id=credit_card_id, user=user)
+                validated_data['credit_card'] = self.resolve('credit_card', credit_card_id, 'credit_card_id')
             else:
                 validated_data['credit_card'] = None
 
         if bank_account_id is not None:
             if bank_account_id:
-                validated_data['bank_account'] = BankAccount.objects.get(id=bank_account_id, user=user)
+                validated_data['bank_account'] = self.resolve('bank_account', bank_account_id, 'bank_account_id')
             else:
                 validated_data['bank_account'] = None
 
         return super().update(instance, validated_data)
 
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        data['category'] = str(instance.category_id) if instance.category_id else None
-        data['credit_card_id'] = str(instance.credit_card_id) if instance.credit_card_id else None
-        data['bank_account_id'] = str(instance.bank_account_id) if instance.bank_account_id else None
-        return data
 
-
-class FixedIncomeSerializer(serializers.ModelSerializer):
+class FixedIncomeSerializer(RelatedObjectsMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer para ingresos fijos."""
 
     category = serializers.UUIDField()
     bank_account_id = serializers.UUIDField(required=False, allow_null=True)
 
+    related_id_fields = {
+        'category': 'category_id',
+        'bank_account_id': 'bank_account_id',
+    }
+
     class Meta:
         model = FixedIncome
         fields = [
@@ -338,14 +485,14 @@ class FixedIncomeSerializer(serializers.ModelSerializer):
         validated_data['user'] = user
 
         # Buscar categoría del usuario
-        validated_data['category'] = Category.objects.get(id=category_id, user=user)
+        validated_data['category'] = self.resolve('category', category_id, 'category')
 
         if bank_account_id:
-            validated_data['bank_account'] = BankAccount.objects.get(id=bank_account_id, user=user)
+            validated_data['bank_account'] = self.resolve('bank_account', bank_account_id, 'bank_account_id')
         else:
             # Auto-asignar cuenta bancaria según la moneda
             currency = validated_data.get('currency', 'PEN')
-            bank_account = BankAccount.objects.filter(user=user, currency=currency).first()
+            bank_account = self.default_account(currency)
             if bank_account:
                 validated_data['bank_account'] = bank_account
 
@@ -354,32 +501,30 @@ class FixedIncomeSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         bank_account_id = validated_data.pop('bank_account_id', None)
         category_id = validated_data.pop('category', None)
-        user = self.context['request'].user
 
         if category_id is not None:
-            validated_data['category'] = Category.objects.get(id=category_id, user=user)
+            validated_data['category'] = self.resolve('category', category_id, 'category')
 
         if bank_account_id is not None:
             if bank_account_id:
-                validated_data['bank_account'] = BankAccount.objects.get(id=bank_account_id, user=user)
+                validated_data['bank_account'] = self.resolve('bank_account', bank_account_id, 'bank_account_id')
             else:
                 validated_data['bank_account'] = None
 
         return super().update(instance, validated_data)
 
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        data['category'] = str(instance.category_id) if instance.category_id else None
-        data['bank_account_id'] = str(instance.bank_account_id) if instance.bank_account_id else None
-        return data
-
 
-class CreditCardPaymentSerializer(serializers.ModelSerializer):
+class CreditCardPaymentSerializer(RelatedObjectsMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer para pagos de tarjetas de crédito."""
 
     credit_card_id = serializers.UUIDField()
     bank_account_id = serializers.UUIDField(required=False, allow_null=True)
 
+    related_id_fields = {
+        'credit_card_id': 'credit_card_id',
+        'bank_account_id': 'bank_account_id',
+    }
+
     class Meta:
         model = CreditCardPayment
         fields = [
@@ -401,42 +546,37 @@ class CreditCardPaymentSerializer(serializers.ModelSerializer):
         validated_data['user'] = user
 
         # Buscar tarjeta del usuario
-        validated_data['credit_card'] = CreditCard.objects.get(id=credit_card_id, user=user)
+        validated_data['credit_card'] = self.resolve('credit_card', credit_card_id, 'credit_card_id')
 
         # Buscar cuenta bancaria si se proporciona
         if bank_account_id:
-            validated_data['bank_account'] = BankAccount.objects.get(id=bank_account_id, user=user)
+            validated_data['bank_account'] = self.resolve('bank_account', bank_account_id, 'bank_account_id')
 
         return super().create(validated_data)
 
     def update(self, instance, validated_data):
         credit_card_id = validated_data.pop('credit_card_id', None)
         bank_account_id = validated_data.pop('bank_account_id', None)
-        user = self.context['request'].user
 
         if credit_card_id is not None:
-            validated_data['credit_card'] = CreditCard.objects.get(id=credit_card_id, user=user)
+            validated_data['credit_card'] = self.resolve('credit_card', credit_card_id, 'credit_card_id')
 
         if bank_account_id is not None:
             if bank_account_id:
-                validated_data['bank_account'] = BankAccount.objects.get(id=bank_account_id, user=user)
+                validated_data['bank_account'] = self.resolve('bank_account', bank_account_id, 'bank_account_id')
             else:
                 validated_data['bank_account'] = None
 
         return super().update(instance, validated_data)
 
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        data['credit_card_id'] = str(instance.credit_card_id) if instance.credit_card_id else None
-        data['bank_account_id'] = str(instance.bank_account_id) if instance.bank_account_id else None
-        return data
-
 
-class CurrencyExchangeSerializer(serializers.ModelSerializer):
+class CurrencyExchangeSerializer(RelatedObjectsMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer para cambios de divisa."""
 
     from_account_id = serializers.UUIDField()
     to_account_id = serializers.UUIDField()
+    from_currency = serializers.CharField(source='from_account.currency', read_only=True)
+    to_currency = serializers.CharField(source='to_account.currency', read_only=True)
 
     class Meta:
         model = CurrencyExchange
@@ -450,6 +590,8 @@ class CurrencyExchangeSerializer(serializers.ModelSerializer):
             'date',
             'description',
             'created_at',
+            'from_currency',
+            'to_currency',
         ]
         read_only_fields = ['id', 'created_at']
 
@@ -457,15 +599,14 @@ class CurrencyExchangeSerializer(serializers.ModelSerializer):
         """Valida que las cuentas sean diferentes y de distinta moneda."""
         from_account_id = data.get('from_account_id')
         to_account_id = data.get('to_account_id')
-        user = self.context['request'].user
 
         if from_account_id == to_account_id:
             raise serializers.ValidationError('Las cuentas origen y destino deben ser diferentes')
 
-        try:
-            from_account = BankAccount.objects.get(id=from_account_id, user=user)
-            to_account = BankAccount.objects.get(id=to_account_id, user=user)
-        except BankAccount.DoesNotExist:
+        accounts = user_objects(self.context['request'])
+        from_account = accounts.bank_account(from_account_id)
+        to_account = accounts.bank_account(to_account_id)
+        if from_account is None or to_account is None:
             raise serializers.ValidationError('Cuenta no encontrada')
 
         if from_account.currency == to_account.currency:
@@ -479,28 +620,19 @@ class CurrencyExchangeSerializer(serializers.ModelSerializer):
         user = self.context['request'].user
         validated_data['user'] = user
 
-        validated_data['from_account'] = BankAccount.objects.get(id=from_account_id, user=user)
-        validated_data['to_account'] = BankAccount.objects.get(id=to_account_id, user=user)
+        validated_data['from_account'] = self.resolve('bank_account', from_account_id, 'from_account_id')
+        validated_data['to_account'] = self.resolve('bank_account', to_account_id, 'to_account_id')
 
         return super().create(validated_data)
 
     def update(self, instance, validated_data):
         from_account_id = validated_data.pop('from_account_id', None)
         to_account_id = validated_data.pop('to_account_id', None)
-        user = self.context['request'].user
 
         if from_account_id is not None:
-            validated_data['from_account'] = BankAccount.objects.get(id=from_account_id, user=user)
+            validated_data['from_account'] = self.resolve('bank_account', from_account_id, 'from_account_id')
 
         if to_account_id is not None:
-            validated_data['to_account'] = BankAccount.objects.get(id=to_account_id, user=user)
+            validated_data['to_account'] = self.resolve('bank_account', to_account_id, 'to_account_id')
 
         return super().update(instance, validated_data)
-
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        data['from_account_id'] = str(instance.from_account_id)
-        data['to_account_id'] = str(instance.to_account_id)
-        data['from_currency'] = instance.from_account.currency
-        data['to_currency'] = instance.to_account.currency
-        return data
@@ -0,0 +1,103 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from apps.installments.models import Installment
+
+from .ledger import apply_ledger_changes, ledger_entries
+from .models import CreditCard, CreditCardPayment, CreditCardStatement, CurrencyExchange, Expense, Income
+from .rollups import apply_rollup_changes, rollup_entries
+from .statements import invalidate_statements, statement_key
+
+
+# Modelos cuyos movimientos afectan el libro de las cuentas bancarias
+LEDGER_MODELS = (Expense, Income, CreditCardPayment, CurrencyExchange)
+
+# Modelos cuyos movimientos afectan los estados de cuenta de las tarjetas
+STATEMENT_MODELS = (Expense, CreditCardPayment, Installment)
+
+# Modelos resumidos en MonthlyRollup
+ROLLUP_MODELS = (Expense, Income)
+
+
+def capture_previous_ledger_entries(sender, instance, raw=False, **kwargs):
+    """Guarda los aportes al libro que tenía el movimiento antes de editarse."""
+    if raw:
+        instance._previous_ledger_entries = []
+        return
+    instance._previous_ledger_entries = ledger_entries(instance.previous_state())
+
+
+def update_ledger_on_save(sender, instance, raw=False, **kwargs):
+    """Aplica al libro la diferencia entre los aportes anteriores y los nuevos."""
+    if raw:
+        return
+    previous = instance.__dict__.pop('_previous_ledger_entries', [])
+    apply_ledger_changes(removed=previous, added=ledger_entries(instance))
+
+
+def update_ledger_on_delete(sender, instance, **kwargs):
+    """Retira del libro los aportes de un movimiento eliminado (incluye cascadas)."""
+    apply_ledger_changes(removed=ledger_entries(instance))
+
+
+def capture_previous_rollup_entries(sender, instance, raw=False, **kwargs):
+    """Guarda el aporte al resumen mensual que tenía el movimiento antes de editarse."""
+    instance._previous_rollup_entries = [] if raw else rollup_entries(instance.previous_state())
+
+
+def update_rollups_on_save(sender, instance, raw=False, **kwargs):
+    """Aplica al resumen mensual la diferencia entre el aporte anterior y el nuevo."""
+    if raw:
+        return
+    previous = instance.__dict__.pop('_previous_rollup_entries', [])
+    apply_rollup_changes(removed=previous, added=rollup_entries(instance))
+
+
+def update_rollups_on_delete(sender, instance, **kwargs):
+    """Retira del resumen mensual el aporte de un movimiento eliminado."""
+    apply_rollup_changes(removed=rollup_entries(instance))
+
+
+def capture_previous_statement_key(sender, instance, raw=False, **kwargs):
+    """Guarda tarjeta, fecha y montos que tenía el movimiento antes de editarse."""
+    instance._previous_statement_key = None if raw else statement_key(instance.previous_state())
+
+
+def invalidate_statements_on_save(sender, instance, raw=False, **kwargs):
+    """Invalida los estados de cuenta afectados si cambió tarjeta, fecha o monto."""
+    previous = instance.__dict__.pop('_previous_statement_key', None)
+    current = statement_key(instance)
+    if raw or previous == current:
+        return
+    invalidate_statements([previous, current])
+
+
+def invalidate_statements_on_delete(sender, instance, **kwargs):
+    """Invalida los estados de cuenta desde la fecha del movimiento eliminado."""
+    invalidate_statements([statement_key(instance)])
+
+
+def invalidate_statements_on_cycle_change(sender, instance, raw=False, **kwargs):
+    """Si cambian las fechas de corte o de pago, los ciclos guardados dejan de valer."""
+    previous = instance.previous_state()
+    if raw or previous is None:
+        return
+    if (previous.cut_off_date, previous.payment_date) != (instance.cut_off_date, instance.payment_date):
+        CreditCardStatement.objects.filter(credit_card_id=instance.pk).delete()
+
+
+for model in LEDGER_MODELS:
+    pre_save.connect(capture_previous_ledger_entries, sender=model, dispatch_uid=f'ledger_pre_save_{model.__name__}')
+    post_save.connect(update_ledger_on_save, sender=model, dispatch_uid=f'ledger_post_save_{model.__name__}')
+    post_delete.connect(update_ledger_on_delete, sender=model, dispatch_uid=f'ledger_post_delete_{model.__name__}')
+
+for model in ROLLUP_MODELS:
+    pre_save.connect(capture_previous_rollup_entries, sender=model, dispatch_uid=f'rollups_pre_save_{model.__name__}')
+    post_save.connect(update_rollups_on_save, sender=model, dispatch_uid=f'rollups_post_save_{model.__name__}')
+    post_delete.connect(update_rollups_on_delete, sender=model, dispatch_uid=f'rollups_post_delete_{model.__name__}')
+
+for model in STATEMENT_MODELS:
+    pre_save.connect(capture_previous_statement_key, sender=model, dispatch_uid=f'statements_pre_save_{model.__name__}')
+    post_save.connect(invalidate_statements_on_save, sender=model, dispatch_uid=f'statements_post_save_{model.__name__}')
+    post_delete.connect(invalidate_statements_on_delete, sender=model, dispatch_uid=f'statements_post_delete_{model.__name__}')
+
+pre_save.connect(invalidate_statements_on_cycle_change, sender=CreditCard, dispatch_uid='statements_pre_save_CreditCard')
@@ -0,0 +1,299 @@
+"""
+Estados de cuenta de tarjetas de crédito por ciclo de facturación.
+
+Un ciclo cierra el día de corte (cut_off_date) y empieza el día siguiente al
+corte anterior. Vence el día de pago (payment_date) del mismo mes del corte si
+es posterior a él, o del mes siguiente en caso contrario. Los días que no
+existen en un mes (p. ej. 31 en febrero) se ajustan al último día del mes.
+
+Los consumos de un ciclo son los gastos con la tarjeta y las cuotas
+(Installment.monthly_amount) que vencen en él; los pagos restan. El saldo al
+corte arrastra el del ciclo anterior. Los ciclos cerrados se guardan en
+CreditCardStatement y se invalidan cuando cambia un movimiento con fecha en
+ellos o anterior; calcularlos e invalidarlos bloquea la fila de la tarjeta.
+"""
+import bisect
+import calendar
+from collections import defaultdict, namedtuple
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from apps.installments.models import Installment
+
+from .models import CreditCard, CreditCardPayment, CreditCardStatement, Expense
+
+
+CURRENCIES = ('PEN', 'USD')
+
+# Cantidad máxima de ciclos que se calculan en una consulta
+MAX_STATEMENT_CYCLES = 60
+
+# Campos que se guardan por ciclo y moneda
+STATEMENT_FIELDS = ('opening_balance', 'charges', 'installment_charges', 'payments', 'closing_balance')
+
+# Por modelo: (campo de fecha, campos que afectan los estados de cuenta)
+STATEMENT_SOURCES = {
+    'Expense': ('date', ('amount', 'currency')),
+    'CreditCardPayment': ('date', ('amount', 'currency')),
+    'Installment': ('start_date', ('total_amount', 'total_installments', 'currency', 'is_active')),
+}
+
+Cycle = namedtuple('Cycle', ['start', 'end', 'due_date'])
+
+
+def _day_in_month(year, month, day):
+    """Retorna la fecha del día en el mes, ajustada al último día si no existe."""
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def _shift_month(year, month, months):
+    """Retorna (año, mes) desplazado en la cantidad de meses indicada."""
+    index = year * 12 + (month - 1) + months
+    return index // 12, index % 12 + 1
+
+
+def build_cycle(card, year, month):
+    """Retorna el ciclo de la tarjeta que cierra en el mes indicado."""
+    end = _day_in_month(year, month, card.cut_off_date)
+    start = _day_in_month(*_shift_month(year, month, -1), card.cut_off_date) + timedelta(days=1)
+    if card.payment_date > card.cut_off_date:
+        due_date = _day_in_month(year, month, card.payment_date)
+    else:
+        due_date = _day_in_month(*_shift_month(year, month, 1), card.payment_date)
+    return Cycle(start=start, end=end, due_date=due_date)
+
+
+def cycle_for(card, day):
+    """Retorna el ciclo de la tarjeta que contiene el día."""
+    cycle = build_cycle(card, day.year, day.month)
+    if day <= cycle.end:
+        return cycle
+    return build_cycle(card, *_shift_month(day.year, day.month, 1))
+
+
+def cycles_representable(card, date_from, date_to):
+    """
+    Indica si se pueden construir el ciclo anterior al que contiene date_from
+    y el siguiente al que contiene date_to (card_statements usa ambos) sin
+    salir del rango de fechas.
+    """
+    try:
+        first = cycle_for(card, date_from)
+        cycle_for(card, first.start - timedelta(days=1))
+        last = cycle_for(card, date_to)
+        build_cycle(card, *_shift_month(last.end.year, last.end.month, 1))
+    except (OverflowError, ValueError):
+        return False
+    return True
+
+
+def installment_schedule(installment):
+    """Retorna [(fecha, monto)] de cada cuota de una compra a plazos."""
+    start = installment.start_date
+    amount = installment.monthly_amount
+    return [
+        (_day_in_month(*_shift_month(start.year, start.month, number), start.day), amount)
+        for number in range(installment.total_installments)
+    ]
+
+
+def statement_key(instance):
+    """
+    Retorna (tarjeta, fecha, valores) de un movimiento que afecta los estados
+    de cuenta, o None si no afecta ninguno.
+    """
+    if instance is None or instance.credit_card_id is None:
+        return None
+    date_field, value_fields = STATEMENT_SOURCES[type(instance).__name__]
+    return (
+        instance.credit_card_id,
+        getattr(instance, date_field),
+        tuple(getattr(instance, field) for field in value_fields),
+    )
+
+
+def lock_cards(card_ids):
+    """
+    Bloquea las filas de las tarjetas hasta el fin de la transacción (en
+    orden de id, para que dos transacciones no se esperen mutuamente).
+    """
+    list(CreditCard.objects.select_for_update().filter(pk__in=card_ids).order_by('pk').values_list('pk'))
+
+
+def invalidate_statements(keys):
+    """
+    Elimina los estados guardados que dependen de los movimientos indicados:
+    los del ciclo de cada fecha y todos los posteriores, porque arrastran
+    su saldo.
+
+    Antes bloquea las tarjetas, como card_statements mientras calcula y
+    guarda: si un cálculo en curso no vio el movimiento, la eliminación
+    espera a que guarde sus estados y los borra.
+    """
+    condition = Q()
+    card_ids = set()
+    for key in keys:
+        if key is not None:
+            card_id, day, _ = key
+            condition |= Q(credit_card_id=card_id, period_end__gte=day)
+            card_ids.add(card_id)
+    if condition:
+        with transaction.atomic():
+            lock_cards(card_ids)
+            CreditCardStatement.objects.filter(condition).delete()
+
+
+def _zero_totals():
+    return {currency: Decimal('0') for currency in CURRENCIES}
+
+
+def _opening_balances(card, before, installments):
+    """Saldo por moneda de todos los movimientos con fecha anterior a before."""
+    balances = _zero_totals()
+    for row in card.expenses.filter(date__lt=before).order_by().values('currency').annotate(total=Sum('amount')):
+        balances[row['currency']] += row['total'] or 0
+    for row in card.payments.filter(date__lt=before).order_by().values('currency').annotate(total=Sum('amount')):
+        balances[row['currency']] -= row['total'] or 0
+    for installment in installments:
+        for day, amount in installment_schedule(installment):
+            if day < before:
+                balances[installment.currency] += amount
+    return balances
+
+
+def _cycle_flows(card, cycles, installments):
+    """
+    Suma consumos, cuotas y pagos por ciclo y moneda. Una consulta por rango
+    de fechas (índice credit_card, date) para gastos y otra para pagos.
+    """
+    ends = [cycle.end for cycle in cycles]
+    start, end = cycles[0].start, cycles[-1].end
+    flows = [{field: _zero_totals() for field in ('charges', 'installment_charges', 'payments')} for _ in cycles]
+
+    def add(field, day, currency, amount):
+        flows[bisect.bisect_left(ends, day)][field][currency] += amount
+
+    sources = (
+        (Expense.objects.filter(credit_card=card), 'charges'),
+        (CreditCardPayment.objects.filter(credit_card=card), 'payments'),
+    )
+    for queryset, field in sources:
+        rows = queryset.filter(date__gte=start, date__lte=end).order_by().values('date', 'currency')
+        for row in rows.annotate(total=Sum('amount')):
+            add(field, row['date'], row['currency'], row['total'] or 0)
+
+    for installment in installments:
+        for day, amount in installment_schedule(installment):
+            if start <= day <= end:
+                add('installment_charges', day, installment.currency, amount)
+
+    return flows
+
+
+def _serialize(cycle, totals, today):
+    return {
+        'period_start': cycle.start.isoformat(),
+        'period_end': cycle.end.isoformat(),
+        'due_date': cycle.due_date.isoformat(),
+        'status': 'closed' if cycle.end < today else 'open',
+        'currencies': totals,
+    }
+
+
+def _cached_statements(card, previous_cycle, cycles):
+    """Estados guardados desde el ciclo anterior al rango: {fin de ciclo: {moneda: campos}}."""
+    cached = defaultdict(dict)
+    for statement in card.statements.filter(period_end__gte=previous_cycle.end, period_end__lte=cycles[-1].end):
+        cached[statement.period_end][statement.currency] = {
+            field: getattr(statement, field) for field in STATEMENT_FIELDS
+        }
+    return cached
+
+
+def _cached_prefix(cycles, cached):
+    """Cantidad de ciclos del inicio del rango que ya están guardados."""
+    index = 0
+    while index < len(cycles) and all(currency in cached[cycles[index].end] for currency in CURRENCIES):
+        index += 1
+    return index
+
+
+def card_statements(card, date_from, date_to, today):
+    """
+    Retorna los estados de cuenta de los ciclos que contienen date_from hasta
+    date_to. Los ciclos cerrados ya guardados se leen de CreditCardStatement;
+    el resto se calcula desde el primer ciclo faltante y los cerrados se guardan.
+
+    Mientras calcula y guarda bloquea la fila de la tarjeta, igual que
+    invalidate_statements antes de eliminar: un movimiento que se guarda a la
+    vez o ya está en lo calculado o borra los estados recién guardados.
+    """
+    first = cycle_for(card, date_from)
+    last = cycle_for(card, date_to)
+    cycles = []
+    year, month = first.end.year, first.end.month
+    while True:
+        cycle = build_cycle(card, year, month)
+        if cycle.end > last.end:
+            break
+        cycles.append(cycle)
+        year, month = _shift_month(year, month, 1)
+
+    previous_cycle = cycle_for(card, cycles[0].start - timedelta(days=1))
+    cached = _cached_statements(card, previous_cycle, cycles)
+    if _cached_prefix(cycles, cached) == len(cycles):
+        return [_serialize(cycle, cached[cycle.end], today) for cycle in cycles]
+
+    with transaction.atomic():
+        lock_cards([card.pk])
+        # Releídos con el bloqueo: otro proceso pudo guardarlos o invalidarlos
+        cached = _cached_statements(card, previous_cycle, cycles)
+        index = _cached_prefix(cycles, cached)
+        results = [_serialize(cycle, cached[cycle.end], today) for cycle in cycles[:index]]
+        if index == len(cycles):
+            return results
+
+        pending = cycles[index:]
+        installments = list(Installment.objects.filter(credit_card=card, is_active=True))
+
+        if index > 0:
+            opening = {currency: cached[cycles[index - 1].end][currency]['closing_balance'] for currency in CURRENCIES}
+        elif _cached_prefix([previous_cycle], cached):
+            opening = {currency: cached[previous_cycle.end][currency]['closing_balance'] for currency in CURRENCIES}
+        else:
+            opening = _opening_balances(card, pending[0].start, installments)
+
+        to_create = []
+        for cycle, flows in zip(pending, _cycle_flows(card, pending, installments)):
+            totals = {}
+            for currency in CURRENCIES:
+                charges = flows['charges'][currency]
+                installment_charges = flows['installment_charges'][currency]
+                payments = flows['payments'][currency]
+                closing = opening[currency] + charges + installment_charges - payments
+                totals[currency] = {
+                    'opening_balance': opening[currency],
+                    'charges': charges,
+                    'installment_charges': installment_charges,
+                    'payments': payments,
+                    'closing_balance': closing,
+                }
+                opening[currency] = closing
+                if cycle.end < today:
+                    to_create.append(CreditCardStatement(
+                        credit_card=card,
+                        currency=currency,
+                        period_start=cycle.start,
+                        period_end=cycle.end,
+                        due_date=cycle.due_date,
+                        **totals[currency],
+                    ))
+            results.append(_serialize(cycle, totals, today))
+
+        if to_create:
+            CreditCardStatement.objects.bulk_create(to_create, ignore_conflicts=True)
+
+    return results
@@ -0,0 +1,1179 @@
+import csv
+import io
+import json
+import random
+import threading
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from apps.budgets.models import Budget
+from apps.categories.models import Category
+from apps.installments.models import Installment
+from apps.users.models import User
+from .analytics import period_start
+from .balance_history import monthly_series
+from .filters import filter_by_date
+from .importers import parse_amount
+from .management.commands.process_fixed import shard_user_ids, user_shard
+from .models import (
+    BankAccount, BankAccountQuerySet, CreditCard, CreditCardPayment, CreditCardStatement, CurrencyExchange, Expense,
+    FixedExpense, FixedExpenseOccurrence, FixedIncome, Income, MonthlyRollup,
+)
+from .recurring import add_months, due_fixed, process_fixed_items
+from .rollups import rebuild_rollups
+from .serializers import ExpenseSerializer, FixedExpenseSerializer, IncomeSerializer
+
+
+def create_card(user, **kwargs):
+    defaults = {
+        'name': 'Visa',
+        'last_four_digits': '1234',
+        'limit': Decimal('10000.00'),
+        'cut_off_date': 20,
+        'payment_date': 5,
+    }
+    defaults.update(kwargs)
+    return CreditCard.objects.create(user=user, **defaults)
+
+
+class CreditCardPaymentBalanceTests(TestCase):
+    """Aplicación y reversión de pagos sobre used_pen/used_usd."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='pagos@example.com', password='x')
+        self.card = create_card(self.user, used_pen=Decimal('100.00'), used_usd=Decimal('50.00'))
+
+    def pay(self, amount, currency='PEN', card=None):
+        return CreditCardPayment.objects.create(
+            user=self.user,
+            credit_card=card or self.card,
+            amount=Decimal(amount),
+            currency=currency,
+            date=date.today(),
+        )
+
+    def assertUsed(self, used_pen, used_usd, card=None):
+        card = card or self.card
+        card.refresh_from_db()
+        self.assertEqual(card.used_pen, Decimal(used_pen))
+        self.assertEqual(card.used_usd, Decimal(used_usd))
+
+    def test_payment_reduces_used_in_its_currency(self):
+        self.pay('30.00')
+        self.pay('20.00', currency='USD')
+        self.assertUsed('70.00', '30.00')
+
+    def test_payment_clamps_at_zero(self):
+        self.pay('250.00')
+        self.assertUsed('0.00', '50.00')
+
+    def test_edit_reverts_previous_amount(self):
+        payment = self.pay('30.00')
+        payment.amount = Decimal('10.00')
+        payment.save()
+        self.assertUsed('90.00', '50.00')
+
+        payment.currency = 'USD'
+        payment.save()
+        self.assertUsed('100.00', '40.00')
+
+    def test_edit_moves_payment_between_cards(self):
+        other = create_card(self.user, name='Mastercard', used_pen=Decimal('40.00'))
+        payment = self.pay('30.00')
+        payment.credit_card = other
+        payment.save()
+        self.assertUsed('100.00', '50.00')
+        self.assertUsed('10.00', '0.00', card=other)
+
+    def test_delete_reverts_payment(self):
+        payment = self.pay('30.00')
+        payment.delete()
+        self.assertUsed('100.00', '50.00')
+
+    def test_stale_card_instance_does_not_overwrite_used(self):
+        stale = CreditCard.objects.get(pk=self.card.pk)
+        self.pay('30.00')
+        stale.name = 'Visa Oro'
+        stale.save()
+        self.assertUsed('70.00', '50.00')
+
+
+class CreditCardExpenseUsageTests(TestCase):
+    """Los gastos con tarjeta suman a used_pen/used_usd y se revierten al editarse o eliminarse."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='consumos@example.com', password='x')
+        self.card = create_card(self.user)
+
+    def spend(self, amount, currency='PEN'):
+        return Expense.objects.create(
+            user=self.user, credit_card=self.card, amount=Decimal(amount), currency=currency,
+            description='Consumo', date=date.today(),
+        )
+
+    def assertUsed(self, used_pen, used_usd, card=None):
+        card = card or self.card
+        card.refresh_from_db()
+        self.assertEqual((card.used_pen, card.used_usd), (Decimal(used_pen), Decimal(used_usd)))
+
+    def test_expense_edits_apply_only_the_difference(self):
+        expense = self.spend('40.00')
+        self.spend('10.00', currency='USD')
+        self.assertUsed('40.00', '10.00')
+
+        expense.amount = Decimal('25.00')
+        expense.save()
+        self.assertUsed('25.00', '10.00')
+
+        expense.currency = 'USD'
+        expense.save()
+        self.assertUsed('0.00', '35.00')
+
+    def test_expense_moves_between_cards_and_delete_reverts(self):
+        other = create_card(self.user, name='Mastercard')
+        expense = self.spend('40.00')
+        expense.credit_card = other
+        expense.save()
+        self.assertUsed('0.00', '0.00')
+        self.assertUsed('40.00', '0.00', card=other)
+
+        expense.delete()
+        self.assertUsed('0.00', '0.00', card=other)
+
+
+class ReconcileCardBalancesTests(TestCase):
+    """reconcile_card_balances reporta las diferencias y solo las guarda con --fix."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='conciliar@example.com', password='x')
+        self.card = create_card(self.user)
+        self.clean = create_card(self.user, name='Mastercard', last_four_digits='9999')
+        for card in (self.card, self.clean):
+            Expense.objects.create(
+                user=self.user, credit_card=card, amount=Decimal('100.00'), description='Consumo', date=date.today(),
+            )
+        CreditCardPayment.objects.create(
+            user=self.user, credit_card=self.card, amount=Decimal('30.00'), currency='PEN', date=date.today(),
+        )
+        CreditCard.objects.filter(pk=self.card.pk).update(used_pen=Decimal('45.00'))
+        self.clean_updated_at = CreditCard.objects.get(pk=self.clean.pk).updated_at
+
+    def reconcile(self, *args):
+        out = io.StringIO()
+        call_command('reconcile_card_balances', '--user=conciliar@example.com', *args, stdout=out)
+        return out.getvalue()
+
+    def used_pen(self, card):
+        return CreditCard.objects.get(pk=card.pk).used_pen
+
+    def test_default_only_reports(self):
+        output = self.reconcile()
+        self.assertIn('used_pen: guardado=45.00 calculado=70.00 delta=25.00', output)
+        self.assertIn('Verificadas 2 tarjetas: 1 con diferencias', output)
+        self.assertEqual(self.used_pen(self.card), Decimal('45.00'))
+
+    def test_fix_writes_only_drifted_cards(self):
+        self.assertIn('Verificadas 2 tarjetas: 1 corregidas', self.reconcile('--fix'))
+        self.assertEqual(self.used_pen(self.card), Decimal('70.00'))
+        self.assertEqual(CreditCard.objects.get(pk=self.clean.pk).updated_at, self.clean_updated_at)
+        self.assertIn('0 con diferencias', self.reconcile())
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Requiere escrituras concurrentes reales (PostgreSQL)')
+class CreditCardConcurrencyTests(TransactionTestCase):
+    """Muchos hilos escribiendo sobre la misma tarjeta no pierden actualizaciones."""
+
+    THREADS = 16
+    OPERATIONS = 10
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='concurrencia@example.com', password='x')
+        self.card = create_card(self.user)
+        # Saldo inicial alto para que ningún pago llegue al límite de cero
+        Expense.objects.create(
+            user=self.user,
+            amount=Decimal('5000.00'),
+            currency='PEN',
+            description='Saldo inicial',
+            date=date.today(),
+            credit_card=self.card,
+        )
+
+    def worker(self, barrier, errors):
+        try:
+            barrier.wait()
+            for _ in range(self.OPERATIONS):
+                Expense.objects.create(
+                    user=self.user,
+                    amount=Decimal('3.00'),
+                    currency='PEN',
+                    description='Consumo',
+                    date=date.today(),
+                    credit_card_id=self.card.pk,
+                )
+                payment = CreditCardPayment.objects.create(
+                    user=self.user,
+                    credit_card_id=self.card.pk,
+                    amount=Decimal('2.00'),
+                    currency='PEN',
+                    date=date.today(),
+                )
+                payment.amount = Decimal('1.50')
+                payment.save()
+                temporary = CreditCardPayment.objects.create(
+                    user=self.user,
+                    credit_card_id=self.card.pk,
+                    amount=Decimal('4.00'),
+                    currency='PEN',
+                    date=date.today(),
+                )
+                temporary.delete()
+        except Exception as exc:  # pragma: no cover - se reporta en el test
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    def test_concurrent_payments_and_expenses_keep_exact_totals(self):
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+        threads = [
+            threading.Thread(target=self.worker, args=(barrier, errors))
+            for _ in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        operations = self.THREADS * self.OPERATIONS
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.used_pen, Decimal('5000.00') + operations * (Decimal('3.00') - Decimal('1.50')))
+        self.assertEqual(self.card.used_usd, Decimal('0.00'))
+
+
+class DashboardQueryTests(TestCase):
+    """El dashboard usa la misma cantidad de consultas sin importar los datos."""
+
+    QUERIES = 8
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='dashboard@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_data(self, count):
+        existing = Category.objects.filter(user=self.user).count()
+        for index in range(existing, existing + count):
+            category = Category.objects.create(
+                user=self.user, name=f'Comida {index}', icon='x', color='#f97316', type='expense'
+            )
+            account = BankAccount.objects.create(user=self.user, name=f'Cuenta {index}', balance=Decimal('500.00'))
+            card = create_card(self.user, name=f'Visa {index}')
+            Expense.objects.create(
+                user=self.user, amount=Decimal('20.00'), category=category, description='Almuerzo',
+                date=date.today(), bank_account=account, credit_card=card,
+            )
+            Budget.objects.create(
+                user=self.user, category=category, amount=Decimal('300.00'), start_date=date.today()
+            )
+            Installment.objects.create(
+                user=self.user, credit_card=card, description='Laptop', total_amount=Decimal('1200.00'),
+                total_installments=12, start_date=date.today(),
+            )
+            FixedExpense.objects.create(
+                user=self.user, name='Alquiler', amount=Decimal('800.00'), category=category,
+                day_of_month=1, bank_account=account,
+            )
+            FixedIncome.objects.create(
+                user=self.user, name='Sueldo', amount=Decimal('3000.00'), day_of_month=1, bank_account=account,
+            )
+
+    def get_dashboard(self):
+        with self.assertNumQueries(self.QUERIES):
+            response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_query_count_does_not_grow_with_data(self):
+        self.add_data(1)
+        self.get_dashboard()
+
+        self.add_data(4)
+        data = self.get_dashboard()
+        for section in ('bank_accounts', 'credit_cards', 'budgets', 'installments', 'fixed_expenses', 'fixed_incomes'):
+            self.assertEqual(len(data[section]), 5)
+        self.assertEqual(data['expense_stats']['monthly_total'], 100)
+        self.assertEqual(data['settings']['exchange_rate'], 3.75)
+
+    def test_account_balances_match_bank_accounts_endpoint(self):
+        self.add_data(2)
+        data = self.get_dashboard()
+        self.assertEqual(data['bank_accounts'], self.client.get('/api/bank-accounts/').json()['results'])
+
+
+class FixedOccurrenceTests(TestCase):
+    """Cada mes de un fijo se materializa una sola vez."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='fijos@example.com', password='x')
+        self.card = create_card(self.user)
+        self.fixed = FixedExpense.objects.create(
+            user=self.user, name='Netflix', amount=Decimal('45.00'), day_of_month=1, credit_card=self.card,
+        )
+
+    def test_stale_fixed_items_do_not_duplicate_month(self):
+        first = list(FixedExpense.objects.filter(user=self.user))
+        second = list(FixedExpense.objects.filter(user=self.user))
+
+        self.assertEqual(len(process_fixed_items(first, date.today())), 1)
+        self.assertEqual(process_fixed_items(second, date.today()), [])
+
+        expense = Expense.objects.get(user=self.user)
+        self.assertEqual(expense.fixed_occurrence.period, date.today().replace(day=1))
+        self.assertEqual(FixedExpenseOccurrence.objects.filter(fixed_expense=self.fixed).count(), 1)
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.used_pen, Decimal('45.00'))
+
+    def test_process_pending_is_idempotent(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.post('/api/fixed-expenses/process_pending/')
+        self.assertEqual(response.json()['processed'], 1)
+        self.assertEqual(response.json()['expense_ids'], [str(Expense.objects.get(user=self.user).pk)])
+        self.assertEqual(client.post('/api/fixed-expenses/process_pending/').json()['processed'], 0)
+
+    def test_next_due_date_advances_after_processing(self):
+        today = date.today()
+        self.assertEqual(self.fixed.next_due_date, today.replace(day=1))
+        self.assertEqual(list(due_fixed(FixedExpense, today)), [self.fixed])
+
+        process_fixed_items(due_fixed(FixedExpense, today), today)
+
+        self.fixed.refresh_from_db()
+        self.assertEqual(self.fixed.next_due_date, add_months(today.replace(day=1), 1))
+        self.assertEqual(list(due_fixed(FixedExpense, today)), [])
+
+    def test_process_pending_skips_queries_until_something_is_due(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.post('/api/fixed-expenses/process_pending/').json()['processed'], 1)
+
+        with self.assertNumQueries(0):
+            response = client.post('/api/fixed-incomes/process_pending/')
+        self.assertEqual(response.json()['processed'], 0)
+
+        FixedIncome.objects.create(user=self.user, name='Sueldo', amount=Decimal('3000.00'), day_of_month=1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.fixed_due_date, date.today().replace(day=1))
+        self.assertEqual(client.post('/api/fixed-incomes/process_pending/').json()['processed'], 1)
+
+    def test_shards_split_due_users_once(self):
+        other = User.objects.create_user(email='fijos2@example.com', password='x')
+        FixedIncome.objects.create(user=other, name='Sueldo', amount=Decimal('3000.00'), day_of_month=1)
+        today = date.today()
+
+        shards = shard_user_ids(today, 3)
+        self.assertEqual(len(shards), 3)
+        self.assertEqual(sorted(user_id for ids in shards for user_id in ids), sorted([self.user.pk, other.pk]))
+        for shard, ids in enumerate(shards):
+            self.assertTrue(all(user_shard(user_id, 3) == shard for user_id in ids))
+
+
+class ProcessFixedCommandTests(TestCase):
+    """process_fixed --all-users --backfill aplica los efectos con consultas por usuario, no por fijo."""
+
+    def setUp(self):
+        self.created = timezone.now() - timedelta(days=70)
+        today = timezone.now().date()
+        self.months = (today.year - self.created.year) * 12 + today.month - self.created.month + 1
+
+    def user_with_fixed(self, email, count):
+        user = User.objects.create_user(email=email, password='x')
+        card = create_card(user)
+        account = BankAccount.objects.create(user=user, name='Sueldo', balance=Decimal('0.00'))
+        food = Category.objects.create(user=user, name='Comida', icon='x', color='#f97316', type='expense')
+        for index in range(count):
+            FixedExpense.objects.create(
+                user=user, name=f'Gasto {index}', amount=Decimal('10.00'), day_of_month=1, category=food,
+                credit_card=card, bank_account=account,
+            )
+            FixedIncome.objects.create(
+                user=user, name=f'Ingreso {index}', amount=Decimal('25.00'), day_of_month=1, bank_account=account,
+            )
+        for model in (FixedExpense, FixedIncome):
+            model.objects.filter(user=user).update(created_at=self.created)
+        return user, card, account
+
+    def process(self):
+        with CaptureQueriesContext(connection) as queries:
+            call_command('process_fixed', '--all-users', '--backfill', stdout=io.StringIO())
+        return len(queries)
+
+    def assertEffects(self, user, card, account, count):
+        card.refresh_from_db()
+        account.refresh_from_db()
+        self.assertEqual(Expense.objects.filter(user=user).count(), count * self.months)
+        self.assertEqual(card.used_pen, Decimal('10.00') * count * self.months)
+        self.assertEqual(account.ledger_income, Decimal('25.00') * count * self.months)
+        self.assertEqual(account.ledger_expenses, Decimal('10.00') * count * self.months)
+
+        fields = BankAccountQuerySet.LEDGER_FIELDS
+        row = BankAccount.objects.filter(pk=account.pk).with_computed_totals().values(
+            *fields, *[f'computed_{field}' for field in fields]
+        ).get()
+        for field in fields:
+            self.assertEqual(row[field], row[f'computed_{field}'], field)
+
+        def rollups():
+            return sorted(
+                (row['month'], str(row['category_id']), row['currency'], row['kind'], row['total'], row['count'])
+                for row in MonthlyRollup.objects.filter(user=user).exclude(count=0).values()
+            )
+        maintained = rollups()
+        rebuild_rollups([user])
+        self.assertEqual(maintained, rollups())
+
+    def test_effects_and_queries_per_user(self):
+        few = self.user_with_fixed('pocos@example.com', 2)
+        few_queries = self.process()
+        self.assertEffects(*few, 2)
+
+        many = self.user_with_fixed('muchos@example.com', 6)
+        many_queries = self.process()
+        self.assertEffects(*many, 6)
+        self.assertEqual(many_queries, few_queries)
+
+        # Una segunda corrida no encuentra nada pendiente
+        self.process()
+        self.assertEqual(Expense.objects.count(), 8 * self.months)
+
+
+class ProjectionTests(TestCase):
+    """Proyección de saldos y deudas en una cantidad fija de consultas."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='proyeccion@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.account = BankAccount.objects.create(user=self.user, name='Sueldo', balance=Decimal('1000.00'))
+        self.card = create_card(self.user, used_pen=Decimal('500.00'))
+        FixedIncome.objects.create(
+            user=self.user, name='Sueldo', amount=Decimal('3000.00'), day_of_month=1, bank_account=self.account,
+        )
+        Installment.objects.create(
+            user=self.user, credit_card=self.card, description='Laptop', total_amount=Decimal('1200.00'),
+            total_installments=12, start_date=add_months(date.today().replace(day=1), 1),
+        )
+
+    def get_projection(self, months):
+        with self.assertNumQueries(5):
+            response = self.client.get('/api/projections/', {'months': months})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_account_balance_adds_fixed_income_each_month(self):
+        points = self.get_projection(3)['bank_accounts'][0]['points']
+        # El ingreso del día 1 del mes actual ya está en el saldo
+        self.assertEqual([point['balance'] for point in points], [4000, 7000, 10000])
+
+    def test_card_debt_is_paid_on_payment_dates(self):
+        points = self.get_projection(36)['credit_cards'][0]['points']
+        self.assertEqual(sum(point['payments_pen'] for point in points), 1700)
+        self.assertEqual(points[-1]['debt_pen'], 0)
+        # Cada cuota se paga en el vencimiento siguiente: queda una sola pendiente al cierre
+        self.assertEqual(max(point['debt_pen'] for point in points[1:]), 100)
+
+    def test_current_month_installment_counts_after_its_day(self):
+        card = create_card(self.user, name='Mastercard', last_four_digits='9999')
+        Installment.objects.create(
+            user=self.user, credit_card=card, description='Celular', total_amount=Decimal('300.00'),
+            total_installments=3, start_date=date.today().replace(day=1),
+        )
+        projected = self.get_projection(4)['credit_cards']
+        points = next(item for item in projected if item['credit_card_id'] == str(card.pk))['points']
+        # Una cuota por mes desde el actual (corte 20), cada una pagada el día 5 siguiente
+        self.assertEqual([point['debt_pen'] for point in points], [100, 100, 100, 0])
+        self.assertEqual([point['payments_pen'] for point in points], [0, 100, 100, 100])
+
+    def test_months_out_of_range(self):
+        self.assertEqual(self.client.get('/api/projections/', {'months': 37}).status_code, 400)
+
+
+class ImportStatementTests(TestCase):
+    """Importación de estados de cuenta: duplicados y líneas inválidas."""
+
+    STATEMENT = (
+        'fecha,descripcion,monto\n'
+        '2026-01-05,Supermercado,-120.50\n'
+        '2026-01-05,Supermercado,-120.50\n'
+        '2026-01-10,Sueldo,"3,500.00"\n'
+        '2026-01-11,Nada,NaN\n'
+        '2026-01-12,Enorme,1e15\n'
+        '2026-01-13,Centavos,-1.0055\n'
+    )
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='importar@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.account = BankAccount.objects.create(user=self.user, name='Ahorros', balance=Decimal('1000.00'))
+
+    def import_file(self, content):
+        upload = SimpleUploadedFile('estado.csv', content.encode(), content_type='text/csv')
+        response = self.client.post(f'/api/bank-accounts/{self.account.pk}/import/', {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertTrue(lines[-1]['done'])
+        return lines[-1]
+
+    def test_invalid_amounts_are_reported_as_errors(self):
+        report = self.import_file(self.STATEMENT)
+        self.assertEqual((report['created'], report['errors']), (3, 3))
+        self.assertEqual([error['line'] for error in report['error_details']], [5, 6, 7])
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(Income.objects.get(user=self.user).amount, Decimal('3500.00'))
+
+    def test_reimport_creates_nothing(self):
+        self.import_file(self.STATEMENT)
+        report = self.import_file(self.STATEMENT)
+        self.assertEqual((report['created'], report['duplicates']), (0, 3))
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 2)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.total_expenses, Decimal('241.00'))
+
+    def test_parse_amount_thousands_and_limits(self):
+        self.assertEqual(parse_amount('1.234'), Decimal('1234'))
+        self.assertEqual(parse_amount('1,234'), Decimal('1234'))
+        self.assertEqual(parse_amount('(12,50)'), Decimal('-12.50'))
+        for value in ('NaN', 'Infinity', '1e15', '1,234.567', '1.0055', 'abc'):
+            with self.assertRaises(ValueError):
+                parse_amount(value)
+
+
+class BalanceCheckpointTests(TestCase):
+    """Los checkpoints guardados siguen a los movimientos con fecha pasada."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='checkpoints@example.com', password='x')
+        self.account = BankAccount.objects.create(user=self.user, name='Ahorros', balance=Decimal('1000.00'))
+        self.today = date.today()
+        self.first = add_months(self.today.replace(day=1), -6)
+        self.expense(add_months(self.first, 1), '100.00')
+
+    def expense(self, day, amount):
+        return Expense.objects.create(
+            user=self.user, amount=Decimal(amount), description='Compra', date=day, bank_account=self.account,
+        )
+
+    def series(self):
+        return monthly_series(self.account, self.first, self.today, self.today)
+
+    def test_checkpoints_follow_back_dated_changes(self):
+        self.series()
+        # Desde el mes del primer movimiento hasta el último mes cerrado
+        self.assertEqual(self.account.checkpoints.count(), 5)
+
+        backdated = self.expense(self.first, '50.00')
+        edited = self.expense(add_months(self.first, 2), '30.00')
+        edited.amount = Decimal('45.00')
+        edited.save()
+        backdated.delete()
+        self.expense(add_months(self.first, 3), '5.00')
+        cached = self.series()
+
+        self.account.checkpoints.all().delete()
+        self.assertEqual(cached, self.series())
+        self.assertEqual(cached[-1]['balance'], Decimal('850.00'))
+
+    def test_no_checkpoints_before_first_movement(self):
+        monthly_series(self.account, add_months(self.first, -24), add_months(self.first, 2), self.today)
+        self.assertEqual(
+            list(self.account.checkpoints.values_list('month', flat=True).order_by('month')),
+            [add_months(self.first, 1), add_months(self.first, 2)],
+        )
+
+    def test_balances_rejects_unbounded_ranges(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f'/api/bank-accounts/{self.account.pk}/balances/'
+        for params in (
+            {'from': '0001-01-01', 'to': '2026-01-01'},
+            {'from': '0001-01-01', 'to': '0001-01-20', 'granularity': 'day'},
+            {'from': '9999-12-01', 'to': '9999-12-31'},
+            {'to': '0001-01-05'},
+        ):
+            self.assertEqual(client.get(url, params).status_code, 400, params)
+        self.assertFalse(self.account.checkpoints.exists())
+
+
+class StatementCacheTests(TestCase):
+    """Los estados de cuenta guardados se invalidan con movimientos con fecha pasada."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='estados@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.card = create_card(self.user)
+        self.first = add_months(date.today().replace(day=1), -6)
+        self.expense(add_months(self.first, 1), '100.00')
+
+    def expense(self, day, amount):
+        return Expense.objects.create(
+            user=self.user, amount=Decimal(amount), description='Compra', date=day, credit_card=self.card,
+        )
+
+    def statements(self):
+        response = self.client.get(
+            f'/api/credit-cards/{self.card.pk}/statements/', {'from': self.first.isoformat()}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['statements']
+
+    def test_cached_statements_follow_back_dated_changes(self):
+        self.statements()
+        self.assertTrue(CreditCardStatement.objects.filter(credit_card=self.card).exists())
+
+        self.expense(add_months(self.first, 2), '40.00')
+        payment = CreditCardPayment.objects.create(
+            user=self.user, credit_card=self.card, amount=Decimal('30.00'), currency='PEN',
+            date=add_months(self.first, 3),
+        )
+        payment.amount = Decimal('60.00')
+        payment.save()
+        cached = self.statements()
+
+        CreditCardStatement.objects.filter(credit_card=self.card).delete()
+        self.assertEqual(cached, self.statements())
+        self.assertEqual(cached[-1]['currencies']['PEN']['closing_balance'], 80)
+
+    def test_rejects_ranges_past_representable_dates(self):
+        url = f'/api/credit-cards/{self.card.pk}/statements/'
+        for params in (
+            {'from': '9999-01-01', 'to': '9999-12-31'},
+            {'from': '9999-10-01', 'to': '9999-11-30'},
+            {'from': '0001-01-01', 'to': '0001-03-01'},
+            {'to': '0001-01-05'},
+        ):
+            self.assertEqual(self.client.get(url, params).status_code, 400, params)
+        self.assertEqual(self.client.get(url, {'from': '9999-01-01', 'to': '9999-09-30'}).status_code, 200)
+
+
+class LedgerTests(TestCase):
+    """El libro de las cuentas coincide con la fórmula de rebuild_ledger."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='libro@example.com', password='x')
+        self.soles = BankAccount.objects.create(user=self.user, name='Soles', balance=Decimal('1000.00'))
+        self.dollars = BankAccount.objects.create(
+            user=self.user, name='Dólares', currency='USD', balance=Decimal('200.00')
+        )
+
+    def assertLedgerMatchesRebuild(self):
+        fields = BankAccountQuerySet.LEDGER_FIELDS
+        for row in BankAccount.objects.filter(user=self.user).with_computed_totals().values(
+            'name', *fields, *[f'computed_{field}' for field in fields]
+        ):
+            for field in fields:
+                self.assertEqual(row[field], row[f'computed_{field}'], f"{row['name']}: {field}")
+
+    def test_ledger_follows_create_edit_and_delete(self):
+        expense = Expense.objects.create(
+            user=self.user, amount=Decimal('50.00'), description='Compra', date=date.today(), bank_account=self.soles,
+        )
+        Income.objects.create(
+            user=self.user, amount=Decimal('300.00'), description='Sueldo', date=date.today(), bank_account=self.soles,
+        )
+        exchange = CurrencyExchange.objects.create(
+            user=self.user, from_account=self.soles, to_account=self.dollars, amount_from=Decimal('375.00'),
+            amount_to=Decimal('100.00'), exchange_rate=Decimal('3.75'), date=date.today(),
+        )
+        self.assertLedgerMatchesRebuild()
+
+        expense.amount = Decimal('80.00')
+        expense.save()
+        # En otra moneda el gasto deja de contar para la cuenta
+        expense.currency = 'USD'
+        expense.save()
+        exchange.amount_to = Decimal('90.00')
+        exchange.save()
+        self.assertLedgerMatchesRebuild()
+
+        expense.delete()
+        exchange.delete()
+        self.assertLedgerMatchesRebuild()
+        self.soles.refresh_from_db()
+        self.assertEqual(self.soles.calculated_balance, Decimal('1300.00'))
+
+    def test_account_save_rebuilds_only_on_currency_or_balance_date_change(self):
+        Expense.objects.create(
+            user=self.user, amount=Decimal('50.00'), description='Compra', date=date.today(), bank_account=self.soles,
+        )
+        account = BankAccount.objects.get(pk=self.soles.pk)
+
+        account.balance = Decimal('900.00')
+        with CaptureQueriesContext(connection) as queries:
+            account.save()
+        self.assertFalse([query for query in queries if query['sql'].lstrip().upper().startswith('SELECT')])
+        self.assertEqual(account.ledger_expenses, Decimal('50.00'))
+
+        account.currency = 'USD'
+        account.save()
+        self.assertEqual(account.ledger_expenses, Decimal('0.00'))
+        self.assertLedgerMatchesRebuild()
+
+
+class MonthlyRollupTests(TestCase):
+    """Los resúmenes mensuales mantenidos con deltas coinciden con rebuild_rollups."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='resumenes@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.food = Category.objects.create(user=self.user, name='Comida', icon='x', color='#f97316', type='expense')
+        self.rent = Category.objects.create(user=self.user, name='Alquiler', icon='x', color='#f97316', type='expense')
+
+    def rollups(self):
+        return sorted(
+            (row['month'], str(row['category_id']), row['currency'], row['kind'], row['total'], row['count'])
+            for row in MonthlyRollup.objects.filter(user=self.user).exclude(count=0).values()
+        )
+
+    def assertRollupsMatchRebuild(self):
+        maintained = self.rollups()
+        rebuild_rollups([self.user])
+        self.assertEqual(maintained, self.rollups())
+
+    def test_rollups_follow_create_edit_and_delete(self):
+        today = date.today()
+        expense = Expense.objects.create(
+            user=self.user, amount=Decimal('30.00'), category=self.food, description='Almuerzo', date=today,
+        )
+        Expense.objects.create(user=self.user, amount=Decimal('12.50'), description='Sin categoría', date=today)
+        income = Income.objects.create(user=self.user, amount=Decimal('3000.00'), description='Sueldo', date=today)
+        self.assertRollupsMatchRebuild()
+
+        expense.category = self.rent
+        expense.date = add_months(today, -1)
+        expense.amount = Decimal('800.00')
+        expense.save()
+        income.currency = 'USD'
+        income.save()
+        self.assertRollupsMatchRebuild()
+
+        expense.delete()
+        self.assertRollupsMatchRebuild()
+
+    def test_month_stats_total(self):
+        Expense.objects.create(
+            user=self.user, amount=Decimal('30.00'), category=self.food, description='Almuerzo', date=date.today(),
+        )
+        response = self.client.get('/api/expenses/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['monthly_total'], 30)
+
+
+class RangeStatsTests(TestCase):
+    """Series de stats con from/to: por moneda y categoría, con resúmenes en los meses completos."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='series@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.food = Category.objects.create(user=self.user, name='Comida', icon='x', color='#f97316', type='expense')
+        self.rent = Category.objects.create(user=self.user, name='Alquiler', icon='x', color='#f97316', type='expense')
+
+    def expense(self, day, amount, category=None, currency='PEN'):
+        return Expense.objects.create(
+            user=self.user, amount=Decimal(amount), description='Compra', date=day, category=category,
+            currency=currency,
+        )
+
+    def stats(self, **params):
+        response = self.client.get('/api/expenses/stats/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def series(self, entry):
+        return [Decimal(str(value)) for value in entry['series']]
+
+    def test_month_series_merges_rollups_and_edge_months(self):
+        self.expense(date(2025, 1, 10), '999.00', self.food)
+        self.expense(date(2025, 1, 20), '100.00', self.food)
+        self.expense(date(2025, 2, 5), '50.00', self.food)
+        self.expense(date(2025, 2, 28), '30.00', self.rent, currency='USD')
+        self.expense(date(2025, 3, 15), '20.00')
+        self.expense(date(2025, 4, 10), '5.00', self.food)
+        self.expense(date(2025, 4, 11), '999.00', self.food)
+
+        data = self.stats(**{'from': '2025-01-15', 'to': '2025-04-10'})
+        self.assertEqual(data['periods'], ['2025-01-01', '2025-02-01', '2025-03-01', '2025-04-01'])
+        self.assertEqual(self.series(data['by_currency']['PEN']), [100, 50, 20, 5])
+        self.assertEqual(data['by_currency']['PEN']['count'], 4)
+        self.assertEqual(self.series(data['by_currency']['USD']), [0, 30, 0, 0])
+        self.assertEqual(
+            [(entry['category_id'], entry['currency'], self.series(entry)) for entry in data['by_category']],
+            [
+                (str(self.food.pk), 'PEN', [100, 50, 0, 5]),
+                (None, 'PEN', [0, 0, 20, 0]),
+                (str(self.rent.pk), 'USD', [0, 30, 0, 0]),
+            ],
+        )
+
+    def test_week_and_day_granularity(self):
+        self.expense(date(2025, 2, 26), '10.00', self.food)
+        self.expense(date(2025, 2, 28), '4.00')
+        self.expense(date(2025, 3, 2), '6.00', self.food)
+
+        days = self.stats(**{'from': '2025-02-26', 'to': '2025-03-02', 'granularity': 'day'})
+        self.assertEqual(days['periods'], ['2025-02-26', '2025-02-27', '2025-02-28', '2025-03-01', '2025-03-02'])
+        self.assertEqual(self.series(days['by_currency']['PEN']), [10, 0, 4, 0, 6])
+
+        weeks = self.stats(**{'from': '2025-02-19', 'to': '2025-03-04', 'granularity': 'week'})
+        self.assertEqual(weeks['periods'], ['2025-02-17', '2025-02-24', '2025-03-03'])
+        self.assertEqual(self.series(weeks['by_currency']['PEN']), [0, 20, 0])
+
+    def test_series_match_raw_sums(self):
+        rng = random.Random(11)
+        categories = [self.food, self.rent, None]
+        first = date(2024, 11, 1)
+        expenses = [
+            self.expense(
+                first + timedelta(days=rng.randrange(240)), f'{rng.randrange(100, 20000) / 100:.2f}',
+                rng.choice(categories), rng.choice(['PEN', 'USD']),
+            )
+            for _ in range(80)
+        ]
+        for _ in range(10):
+            start = first + timedelta(days=rng.randrange(-20, 240))
+            end = start + timedelta(days=rng.randrange(0, 200))
+            for granularity in ('month', 'week', 'day'):
+                data = self.stats(**{'from': start.isoformat(), 'to': end.isoformat(), 'granularity': granularity})
+                position = {date.fromisoformat(period): index for index, period in enumerate(data['periods'])}
+                expected = {}
+                for expense in expenses:
+                    if start <= expense.date <= end:
+                        series = expected.setdefault(expense.currency, [Decimal('0')] * len(position))
+                        series[position[period_start(expense.date, granularity)]] += expense.amount
+                self.assertEqual(
+                    {currency: self.series(entry) for currency, entry in data['by_currency'].items()},
+                    expected,
+                    (start, end, granularity),
+                )
+
+    def test_invalid_ranges(self):
+        for params in (
+            {'from': '2025-01-01', 'granularity': 'year'},
+            {'from': '2025-02-01', 'to': '2025-01-01'},
+            {'from': '01/01/2025'},
+            {'from': '2023-01-01', 'to': '2025-01-02', 'granularity': 'day'},
+            {'from': '0001-01-01', 'to': '9999-12-30', 'granularity': 'day'},
+            {'from': '9999-12-01', 'to': '9999-12-31', 'granularity': 'day'},
+            {'from': '9999-12-01', 'to': '9999-12-31', 'granularity': 'week'},
+            {'from': '9999-12-01', 'to': '9999-12-31', 'granularity': 'month'},
+        ):
+            response = self.client.get('/api/expenses/stats/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class BulkCreateTests(TestCase):
+    """Alta masiva de gastos: una transacción con los mismos efectos que el alta individual."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='masivo@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(
+            user=self.user, name='Comida', icon='x', color='#f97316', type='expense'
+        )
+        self.card = create_card(self.user)
+        self.account = BankAccount.objects.create(user=self.user, name='Ahorros', balance=Decimal('1000.00'))
+
+    def items(self, count, **extra):
+        return [
+            {
+                'amount': '10.00',
+                'currency': 'PEN',
+                'category': str(self.category.pk),
+                'description': f'Compra {index}',
+                'date': date.today().isoformat(),
+                **extra,
+            }
+            for index in range(count)
+        ]
+
+    def test_bulk_applies_card_ledger_and_rollup_effects(self):
+        items = self.items(3, credit_card_id=str(self.card.pk)) + self.items(2, bank_account_id=str(self.account.pk))
+        response = self.client.post('/api/expenses/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()), 5)
+
+        self.card.refresh_from_db()
+        self.account.refresh_from_db()
+        self.assertEqual(self.card.used_pen, Decimal('30.00'))
+        self.assertEqual(self.account.ledger_expenses, Decimal('20.00'))
+        rollup = MonthlyRollup.objects.get(user=self.user, kind='expense')
+        self.assertEqual((rollup.total, rollup.count), (Decimal('50.00'), 5))
+
+    def test_references_are_resolved_once_per_request(self):
+        def queries(count):
+            items = self.items(count, credit_card_id=str(self.card.pk), bank_account_id=str(self.account.pk))
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post('/api/expenses/bulk/', items, format='json')
+            self.assertEqual(response.status_code, 201)
+            return len(context)
+
+        # El primero crea el resumen mensual; los siguientes lo actualizan
+        queries(1)
+        self.assertEqual(queries(2), queries(20))
+
+    def test_unknown_reference_is_a_validation_error(self):
+        items = self.items(1, credit_card_id=str(create_card(
+            User.objects.create_user(email='otro@example.com', password='x')
+        ).pk))
+        response = self.client.post('/api/expenses/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_item_creates_nothing(self):
+        items = self.items(2) + [{'amount': '-1', 'category': str(self.category.pk), 'date': 'ayer'}]
+        response = self.client.post('/api/expenses/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Expense.objects.filter(user=self.user).exists())
+
+
+class ExportTests(TestCase):
+    """Las exportaciones tienen las mismas filas y formatos que el listado."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='exportar@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        category = Category.objects.create(user=self.user, name='Comida', icon='x', color='#f97316', type='expense')
+        for index in range(3):
+            Expense.objects.create(
+                user=self.user, amount=Decimal('10.50'), category=category, description=f'Compra {index}',
+                date=add_months(date.today(), -index),
+            )
+
+    def export(self, output):
+        response = self.client.get('/api/expenses/export/', {'output': output})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_matches_list(self):
+        listed = self.client.get('/api/expenses/').json()['results']
+        exported = [json.loads(line) for line in self.export('ndjson').splitlines()]
+        self.assertEqual(exported, listed)
+
+    def test_csv_has_header_and_one_row_per_movement(self):
+        rows = list(csv.reader(io.StringIO(self.export('csv'))))
+        self.assertEqual(rows[0][:3], ['id', 'amount', 'currency'])
+        self.assertEqual(len(rows), 4)
+        self.assertEqual({row[1] for row in rows[1:]}, {'10.50'})
+
+
+class CursorPaginationTests(TestCase):
+    """La paginación por cursor recorre cada fila una sola vez."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='cursor@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        category = Category.objects.create(user=self.user, name='Comida', icon='x', color='#f97316', type='expense')
+        # Varias filas por fecha para que el desempate por created_at e id importe
+        Expense.objects.bulk_create([
+            Expense(
+                user=self.user, amount=Decimal('5.00'), category=category, description=f'Compra {index}',
+                date=add_months(date.today(), -(index % 4)),
+            )
+            for index in range(23)
+        ])
+
+    def test_cursor_pages_cover_every_row_once(self):
+        seen = []
+        url = '/api/expenses/?pagination=cursor&page_size=5'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row['id'] for row in response.json()['results'])
+            url = response.json()['next']
+        self.assertEqual(len(seen), 23)
+        self.assertEqual(set(seen), {str(pk) for pk in Expense.objects.values_list('pk', flat=True)})
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/expenses/', {'pagination': 'cursor', 'cursor': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ValuesListTests(TestCase):
+    """Los listados con .values() y row_mapper() dan la misma salida que el serializer."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='listados@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.card = create_card(self.user)
+        self.account = BankAccount.objects.create(user=self.user, name='Ahorros', balance=Decimal('100.00'))
+        self.food = Category.objects.create(user=self.user, name='Comida', icon='x', color='#f97316', type='expense')
+        self.salary = Category.objects.create(user=self.user, name='Sueldo', icon='x', color='#22c55e', type='income')
+
+    def listed(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        return data['results'] if isinstance(data, dict) else data
+
+    def assertListMatchesSerializer(self, url, serializer_class, instances):
+        rows = {row['id']: row for row in self.listed(url)}
+        self.assertEqual(len(rows), len(instances))
+        for instance in instances:
+            instance.refresh_from_db()
+            expected = json.loads(JSONRenderer().render(serializer_class(instance).data))
+            self.assertEqual(rows[str(instance.pk)], expected)
+
+    def test_expenses(self):
+        self.assertListMatchesSerializer('/api/expenses/', ExpenseSerializer, [
+            Expense.objects.create(
+                user=self.user, amount=Decimal('12.30'), category=self.food, description='Almuerzo',
+                date=date.today(), credit_card=self.card, bank_account=self.account, currency='PEN',
+            ),
+            Expense.objects.create(user=self.user, amount=Decimal('7.00'), description='Sin nada', date=date.today()),
+        ])
+
+    def test_incomes(self):
+        self.assertListMatchesSerializer('/api/incomes/', IncomeSerializer, [
+            Income.objects.create(
+                user=self.user, amount=Decimal('3000.00'), category=self.salary, description='Sueldo',
+                date=date.today(), bank_account=self.account,
+            ),
+            Income.objects.create(
+                user=self.user, amount=Decimal('15.50'), description='Venta', date=date.today(), currency='USD',
+            ),
+        ])
+
+    def test_fixed_expenses(self):
+        self.assertListMatchesSerializer('/api/fixed-expenses/', FixedExpenseSerializer, [
+            FixedExpense.objects.create(
+                user=self.user, name='Netflix', amount=Decimal('45.00'), category=self.food, day_of_month=28,
+                credit_card=self.card, bank_account=self.account,
+            ),
+            FixedExpense.objects.create(
+                user=self.user, name='Gimnasio', amount=Decimal('80.00'), day_of_month=28, is_active=False,
+            ),
+        ])
+
+    def test_fields_subset_and_unknown_fields(self):
+        Expense.objects.create(user=self.user, amount=Decimal('7.00'), description='Compra', date=date.today())
+        for params in ({}, {'pagination': 'cursor'}):
+            rows = self.listed('/api/expenses/', fields='id, amount,category', **params)
+            self.assertEqual([set(row) for row in rows], [{'id', 'amount', 'category'}])
+            self.assertEqual(rows[0]['category'], None)
+
+        response = self.client.get('/api/expenses/', {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['error'])
+
+
+class DateFilterTests(TestCase):
+    """Los filtros de fecha de los listados se convierten en rangos semiabiertos."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='fechas@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for day in (date(2024, 12, 31), date(2025, 1, 1), date(2025, 1, 31), date(2025, 2, 1), date(2025, 12, 31)):
+            Expense.objects.create(user=self.user, amount=Decimal('5.00'), description='Compra', date=day)
+
+    def dates(self, **params):
+        response = self.client.get('/api/expenses/', {'page_size': 100, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return sorted(row['date'] for row in response.json()['results'])
+
+    def test_date_from_and_date_to_are_inclusive(self):
+        self.assertEqual(self.dates(date_from='2025-01-01', date_to='2025-01-31'), ['2025-01-01', '2025-01-31'])
+
+    def test_month_and_year_are_half_open(self):
+        self.assertEqual(self.dates(month=1, year=2025), ['2025-01-01', '2025-01-31'])
+        self.assertEqual(self.dates(month=12, year=2024), ['2024-12-31'])
+        self.assertEqual(self.dates(year=2025), ['2025-01-01', '2025-01-31', '2025-02-01', '2025-12-31'])
+
+    def test_combined_filters_intersect(self):
+        self.assertEqual(self.dates(year=2025, date_from='2025-01-31', date_to='2025-02-01'), ['2025-01-31', '2025-02-01'])
+
+    def test_filters_use_date_ranges(self):
+        queryset = filter_by_date(Expense.objects.order_by(), {'month': '2', 'year': '2025'})
+        where = str(queryset.query).split('WHERE')[1]
+        self.assertIn('"date" >= 2025-02-01', where)
+        self.assertIn('"date" < 2025-03-01', where)
+
+    def test_invalid_values(self):
+        for params in (
+            {'date_from': '2025-13-01'},
+            {'date_to': '31/01/2025'},
+            {'month': '13', 'year': '2025'},
+            {'month': '1', 'year': 'dos mil'},
+            {'year': '9999'},
+        ):
+            response = self.client.get('/api/expenses/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+requires_trigrams = unittest.skipUnless(connection.vendor == 'postgresql', 'Usa pg_trgm (PostgreSQL)')
+
+
+class DescriptionSearchTests(TestCase):
+    """?search= con los modos contains, prefix y fuzzy, ordenado por relevancia."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='busqueda@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for description in (
+            'Supermercado Wong', 'Compra en supermercado', 'Taxi al super', 'Almuerzo con equipo', 'Pago de luz',
+        ):
+            Expense.objects.create(user=self.user, amount=Decimal('5.00'), description=description, date=date.today())
+
+    def search(self, query, mode=None):
+        params = {'search': query}
+        if mode:
+            params['search_mode'] = mode
+        response = self.client.get('/api/expenses/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['description'] for row in response.json()['results']]
+
+    @requires_trigrams
+    def test_contains_requires_every_word(self):
+        self.assertEqual(self.search('wong  SUPER'), ['Supermercado Wong'])
+        self.assertEqual(set(self.search('mercado')), {'Supermercado Wong', 'Compra en supermercado'})
+
+    @requires_trigrams
+    def test_prefix_matches_word_starts(self):
+        self.assertEqual(self.search('mercado', 'prefix'), [])
+        self.assertEqual(
+            set(self.search('super', 'prefix')), {'Supermercado Wong', 'Compra en supermercado', 'Taxi al super'}
+        )
+
+    @requires_trigrams
+    def test_fuzzy_tolerates_typos(self):
+        results = self.search('supermercdo', 'fuzzy')
+        self.assertEqual(set(results), {'Supermercado Wong', 'Compra en supermercado'})
+
+    @requires_trigrams
+    def test_results_are_ordered_by_rank(self):
+        # 'super' es una palabra completa solo en 'Taxi al super'
+        self.assertEqual(self.search('super', 'prefix')[0], 'Taxi al super')
+
+    def test_invalid_mode(self):
+        response = self.client.get('/api/expenses/', {'search': 'super', 'search_mode': 'regex'})
+        self.assertEqual(response.status_code, 400)
@@ -6,10 +6,12 @@ from .views import (
     CreditCardViewSet,
     CreditCardPaymentViewSet,
     CurrencyExchangeViewSet,
+    DashboardView,
     ExpenseViewSet,
     FixedExpenseViewSet,
     FixedIncomeViewSet,
     IncomeViewSet,
+    ProjectionView,
 )
 
 router = DefaultRouter()
@@ -23,5 +25,7 @@ router.register(r'fixed-expenses', FixedExpenseViewSet, basename='fixed-expense'
 router.register(r'fixed-incomes', FixedIncomeViewSet, basename='fixed-income')
 
 urlpatterns = [
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('projections/', ProjectionView.as_view(), name='projections'),
     path('', include(router.urls)),
 ]
@@ -1,12 +1,41 @@
+import io
+import json
+import logging
+import os
+from datetime import date, timedelta
 from decimal import Decimal
+from itertools import chain
 
-from django.db.models import Sum
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-
-from .models import BankAccount, CreditCard, CreditCardPayment, CurrencyExchange, Expense, FixedExpense, FixedIncome, Income
+from rest_framework.views import APIView
+
+from apps.budgets.models import Budget
+from apps.budgets.serializers import BudgetSerializer
+from apps.categories.models import Category
+from apps.installments.models import Installment
+from apps.installments.serializers import InstallmentSerializer
+from apps.users.models import UserSettings
+from apps.users.serializers import UserSettingsSerializer
+
+from .analytics import GRANULARITIES, MAX_STATS_PERIODS, count_periods, month_stats, next_period, period_start, range_stats
+from .balance_history import MAX_DAILY_POINTS, MAX_MONTHLY_POINTS, daily_series, month_start, monthly_series, next_month
+from .exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_blocks
+from .filters import filter_by_date, month_range
+from .importers import IMPORT_FORMATS, StatementFormatError, import_statement
+from .models import BankAccount, CreditCard, CreditCardPayment, CurrencyExchange, Expense, FixedExpense, FixedIncome, Income, MonthlyRollup
+from .pagination import TransactionPagination
+from .projections import DEFAULT_PROJECTION_MONTHS, MAX_PROJECTION_MONTHS, projection
+from .recurring import process_due_fixed
+from .rollups import ROLLUP_KINDS
+from .search import SEARCH_FILTER_BACKENDS
 from .serializers import (
     BankAccountSerializer,
     CreditCardSerializer,
@@ -18,6 +47,191 @@ from .serializers import (
     FixedIncomeSerializer,
     IncomeSerializer,
 )
+from .statements import MAX_STATEMENT_CYCLES, card_statements, cycles_representable
+
+logger = logging.getLogger(__name__)
+
+
+class StatsMixin:
+    """
+    Acción stats para gastos e ingresos (stats_model).
+
+    - Sin from/to: totales del mes actual o de month/year.
+    - Con from y/o to: series por moneda y por categoría en el rango, con
+      granularity=month|week|day, en una sola consulta agrupada.
+
+    Los meses completos se leen de MonthlyRollup en lugar de los movimientos.
+    """
+
+    stats_model = None
+
+    def get_rollups(self, request):
+        """Resúmenes mensuales del usuario para el tipo de stats_model."""
+        return MonthlyRollup.objects.filter(
+            user=request.user,
+            kind=ROLLUP_KINDS[self.stats_model.__name__],
+            count__gt=0
+        )
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Estadísticas del mes actual o especificado, o de un rango de fechas."""
+        if 'from' in request.query_params or 'to' in request.query_params:
+            return self.range_stats(request)
+
+        now = timezone.now()
+        try:
+            month = int(request.query_params.get('month', now.month))
+            year = int(request.query_params.get('year', now.year))
+            start, _ = month_range(year, month)
+        except ValueError:
+            return Response(
+                {'error': 'month y year deben ser un mes y año válidos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        data = month_stats(self.get_rollups(request), start)
+        serializer = ExpenseStatsSerializer(data)
+        return Response(serializer.data)
+
+    def range_stats(self, request):
+        """Series por moneda y categoría (por defecto, desde el inicio del año hasta hoy)."""
+        today = timezone.now().date()
+        granularity = request.query_params.get('granularity', 'month')
+
+        if granularity not in GRANULARITIES:
+            return Response(
+                {'error': 'granularity debe ser "day", "week" o "month"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            date_to = date.fromisoformat(request.query_params.get('to', today.isoformat()))
+            date_from = date.fromisoformat(
+                request.query_params.get('from', date_to.replace(month=1, day=1).isoformat())
+            )
+        except ValueError:
+            return Response(
+                {'error': 'Las fechas deben tener formato YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if date_from > date_to:
+            return Response(
+                {'error': 'La fecha inicial debe ser anterior a la final'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if count_periods(date_from, date_to, granularity) > MAX_STATS_PERIODS:
+            return Response(
+                {'error': f'El rango no puede superar {MAX_STATS_PERIODS} periodos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            # La serie recorre hasta el inicio del periodo siguiente al último
+            next_period(period_start(date_to, granularity), granularity)
+        except OverflowError:
+            return Response(
+                {'error': 'Las fechas están fuera del rango permitido'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.stats_model.objects.filter(user=request.user)
+        return Response(range_stats(
+            queryset, date_from, date_to, granularity, rollups=self.get_rollups(request)
+        ))
+
+
+class BulkCreateMixin:
+    """
+    Acción bulk: crea hasta bulk_max_items elementos enviados como lista con
+    una validación conjunta y un solo bulk_create (BulkMovementListSerializer).
+    """
+
+    bulk_max_items = 5000
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Crea varios movimientos en una sola transacción."""
+        if not isinstance(request.data, list):
+            return Response(
+                {'error': 'Se espera una lista de elementos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(request.data) > self.bulk_max_items:
+            return Response(
+                {'error': f'Se permiten hasta {self.bulk_max_items} elementos por solicitud'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = self.get_serializer(data=request.data, many=True, allow_empty=False)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class ExportMixin:
+    """
+    Acción export: descarga todos los movimientos del listado (mismos filtros
+    y ?fields=) en CSV o NDJSON con ?output=csv|ndjson, sin paginar.
+
+    Las filas se leen con .values().iterator() y se escriben a medida que se
+    leen, así una exportación de varios años nunca arma el queryset completo
+    en memoria. Si el cliente acepta gzip, la respuesta se comprime al vuelo.
+    """
+
+    export_name = None
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Exporta los movimientos filtrados como archivo CSV o NDJSON."""
+        output = request.query_params.get('output', 'csv')
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {'error': 'output debe ser "csv" o "ndjson"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        fields = [name for name, field in serializer.fields.items() if not field.write_only]
+        rows = queryset.values(*serializer.value_columns()).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        content = export_blocks(rows, serializer.row_mapper(), fields, output)
+
+        gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        response = StreamingHttpResponse(
+            compress_sequence(content) if gzip else content,
+            content_type=EXPORT_FORMATS[output]
+        )
+        if gzip:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        response['Content-Disposition'] = f'attachment; filename="{self.export_name}.{output}"'
+        return response
+
+
+class ValuesListMixin:
+    """
+    Lista con filas de .values() y el row_mapper() del serializer en lugar de
+    instanciar modelos y serializarlos campo por campo. La salida es la misma
+    que la de ModelViewSet.list (incluye ?fields= y la paginación).
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        to_dict = serializer.row_mapper()
+
+        columns = set(serializer.value_columns())
+        if self.paginator is not None:
+            columns.update(getattr(self.paginator, 'cursor_fields', ()))
+        rows = queryset.values(*columns)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response([to_dict(row) for row in page])
+        return Response([to_dict(row) for row in rows])
 
 
 class BankAccountViewSet(viewsets.ModelViewSet):
@@ -26,7 +240,7 @@ class BankAccountViewSet(viewsets.ModelViewSet):
     serializer_class = BankAccountSerializer
 
     def get_queryset(self):
-        return BankAccount.objects.filter(user=self.request.user)
+        return BankAccount.objects.filter(user=self.request.user).with_balances()
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -57,6 +271,137 @@ class BankAccountViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(account)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def balances(self, request, pk=None):
+        """Serie de saldos diaria o mensual de la cuenta en un rango de fechas."""
+        account = self.get_object()
+        today = timezone.now().date()
+        granularity = request.query_params.get('granularity', 'month')
+
+        if granularity not in ('day', 'month'):
+            return Response(
+                {'error': 'granularity debe ser "day" o "month"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        default_span = timedelta(days=30) if granularity == 'day' else timedelta(days=365)
+        try:
+            date_to = date.fromisoformat(request.query_params.get('to', today.isoformat()))
+            date_from = date.fromisoformat(
+                request.query_params.get('from', (date_to - default_span).isoformat())
+            )
+        except (ValueError, OverflowError):
+            return Response(
+                {'error': 'Las fechas deben tener formato YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if date_from > date_to:
+            return Response(
+                {'error': 'La fecha inicial debe ser anterior a la final'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            # Las series parten del cierre del mes anterior y recorren hasta el siguiente
+            month_start(date_from) - timedelta(days=1)
+            next_month(date_to)
+        except OverflowError:
+            return Response(
+                {'error': 'Las fechas están fuera del rango permitido'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if granularity == 'day':
+            if (date_to - date_from).days >= MAX_DAILY_POINTS:
+                return Response(
+                    {'error': f'El rango diario no puede superar {MAX_DAILY_POINTS} días'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            points = daily_series(account, date_from, date_to, today)
+        else:
+            if (date_to.year - date_from.year) * 12 + date_to.month - date_from.month >= MAX_MONTHLY_POINTS:
+                return Response(
+                    {'error': f'El rango mensual no puede superar {MAX_MONTHLY_POINTS} meses'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            points = monthly_series(account, date_from, date_to, today)
+
+        return Response({
+            'account_id': str(account.id),
+            'currency': account.currency,
+            'granularity': granularity,
+            'from': date_from.isoformat(),
+            'to': date_to.isoformat(),
+            'points': points,
+        })
+
+    @action(detail=True, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_transactions(self, request, pk=None):
+        """
+        Importa un estado de cuenta (CSV u OFX) subido en `file` como gastos e
+        ingresos de la cuenta. Responde NDJSON con el avance de cada lote.
+        """
+        account = self.get_object()
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {'error': 'Se requiere el archivo en el campo "file"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        file_format = request.data.get('file_type') or os.path.splitext(upload.name)[1].lstrip('.').lower()
+        if file_format not in IMPORT_FORMATS:
+            return Response(
+                {'error': 'file_type debe ser "csv" u "ofx"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        categories = {}
+        for kind in ('expense', 'income'):
+            category_id = request.data.get(f'{kind}_category')
+            categories[kind] = None
+            if category_id:
+                try:
+                    categories[kind] = Category.objects.filter(id=category_id, user=request.user, type=kind).first()
+                except DjangoValidationError:
+                    pass
+                if categories[kind] is None:
+                    return Response(
+                        {'error': f'Categoría no encontrada: {category_id}'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', errors='replace', newline='')
+        progress = import_statement(
+            stream, file_format, request.user, account, categories['expense'], categories['income']
+        )
+        # El primer lote se procesa antes de responder: un archivo sin el formato esperado es un 400
+        try:
+            first = next(progress)
+        except StatementFormatError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return StreamingHttpResponse(import_progress_lines(first, progress), content_type='application/x-ndjson')
+
+
+def import_progress_lines(first, progress):
+    """
+    Líneas NDJSON del avance de una importación. La respuesta ya se envió con
+    200, así que un error en un lote posterior se informa como última línea
+    {..., done: true, error} con el avance de los lotes ya guardados.
+    """
+    last = first
+    try:
+        for item in chain([first], progress):
+            last = item
+            yield json.dumps(item) + '\n'
+    except Exception:
+        logger.exception('Error al importar un estado de cuenta')
+        data = {key: value for key, value in last.items() if key not in ('done', 'error_details')}
+        data.update(done=True, error='No se pudo completar la importación; los lotes anteriores se guardaron')
+        yield json.dumps(data) + '\n'
+
 
 class CreditCardViewSet(viewsets.ModelViewSet):
     """ViewSet para gestionar tarjetas de crédito."""
@@ -69,25 +414,69 @@ class CreditCardViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @action(detail=True, methods=['get'])
+    def statements(self, request, pk=None):
+        """Estados de cuenta por ciclo de facturación en un rango de fechas."""
+        card = self.get_object()
+        today = timezone.now().date()
+
+        try:
+            date_to = date.fromisoformat(request.query_params.get('to', today.isoformat()))
+            date_from = date.fromisoformat(
+                request.query_params.get('from', (date_to - timedelta(days=365)).isoformat())
+            )
+        except (ValueError, OverflowError):
+            return Response(
+                {'error': 'Las fechas deben tener formato YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if date_from > date_to:
+            return Response(
+                {'error': 'La fecha inicial debe ser anterior a la final'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if (date_to.year - date_from.year) * 12 + date_to.month - date_from.month >= MAX_STATEMENT_CYCLES:
+            return Response(
+                {'error': f'El rango no puede superar {MAX_STATEMENT_CYCLES} ciclos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not cycles_representable(card, date_from, date_to):
+            return Response(
+                {'error': 'Las fechas están fuera del rango permitido'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({
+            'credit_card_id': str(card.id),
+            'cut_off_date': card.cut_off_date,
+            'payment_date': card.payment_date,
+            'from': date_from.isoformat(),
+            'to': date_to.isoformat(),
+            'statements': card_statements(card, date_from, date_to, today),
+        })
+
 
-class ExpenseViewSet(viewsets.ModelViewSet):
+class ExpenseViewSet(StatsMixin, BulkCreateMixin, ExportMixin, ValuesListMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar gastos."""
 
     serializer_class = ExpenseSerializer
+    pagination_class = TransactionPagination
+    stats_model = Expense
+    export_name = 'expenses'
+    filter_backends = SEARCH_FILTER_BACKENDS
+    search_field = 'description'
 
     def get_queryset(self):
         queryset = Expense.objects.filter(user=self.request.user).select_related('credit_card', 'category')
 
         # Filtros
-        month = self.request.query_params.get('month')
-        year = self.request.query_params.get('year')
         category = self.request.query_params.get('category')
         credit_card_id = self.request.query_params.get('credit_card_id')
 
-        if month and year:
-            queryset = queryset.filter(date__month=month, date__year=year)
-        elif year:
-            queryset = queryset.filter(date__year=year)
+        queryset = filter_by_date(queryset, self.request.query_params)
 
         if category:
             queryset = queryset.filter(category_id=category)
@@ -97,55 +486,25 @@ class ExpenseViewSet(viewsets.ModelViewSet):
 
         return queryset
 
-    @action(detail=False, methods=['get'])
-    def stats(self, request):
-        """Estadísticas de gastos del mes actual o especificado."""
-        now = timezone.now()
-        month = int(request.query_params.get('month', now.month))
-        year = int(request.query_params.get('year', now.year))
-
-        expenses = Expense.objects.filter(
-            user=request.user,
-            date__month=month,
-            date__year=year
-        ).select_related('category')
-
-        monthly_total = expenses.aggregate(total=Sum('amount'))['total'] or 0
-
-        by_category = {}
-        category_totals = expenses.values('category__id', 'category__name').annotate(total=Sum('amount'))
-        for item in category_totals:
-            by_category[item['category__name']] = item['total']
 
-        data = {
-            'monthly_total': monthly_total,
-            'by_category': by_category,
-            'month': month,
-            'year': year,
-        }
-
-        serializer = ExpenseStatsSerializer(data)
-        return Response(serializer.data)
-
-
-class IncomeViewSet(viewsets.ModelViewSet):
+class IncomeViewSet(StatsMixin, BulkCreateMixin, ExportMixin, ValuesListMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar ingresos."""
 
     serializer_class = IncomeSerializer
+    pagination_class = TransactionPagination
+    stats_model = Income
+    export_name = 'incomes'
+    filter_backends = SEARCH_FILTER_BACKENDS
+    search_field = 'description'
 
     def get_queryset(self):
         queryset = Income.objects.filter(user=self.request.user).select_related('bank_account', 'category')
 
         # Filtros
-        month = self.request.query_params.get('month')
-        year = self.request.query_params.get('year')
         category = self.request.query_params.get('category')
         bank_account_id = self.request.query_params.get('bank_account_id')
 
-        if month and year:
-            queryset = queryset.filter(date__month=month, date__year=year)
-        elif year:
-            queryset = queryset.filter(date__year=year)
+        queryset = filter_by_date(queryset, self.request.query_params)
 
         if category:
             queryset = queryset.filter(category_id=category)
@@ -156,10 +515,12 @@ class IncomeViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class FixedExpenseViewSet(viewsets.ModelViewSet):
+class FixedExpenseViewSet(ValuesListMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar gastos fijos."""
 
     serializer_class = FixedExpenseSerializer
+    filter_backends = SEARCH_FILTER_BACKENDS
+    search_field = 'name'
 
     def get_queryset(self):
         return FixedExpense.objects.filter(user=self.request.user).select_related(
@@ -168,49 +529,19 @@ class FixedExpenseViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'])
     def process_pending(self, request):
-        """Convierte gastos fijos pendientes en gastos reales."""
+        """Convierte gastos fijos pendientes del mes actual en gastos reales."""
         today = timezone.now().date()
-        current_month_start = today.replace(day=1)
-
-        # Buscar gastos fijos que:
-        # 1. Estén activos
-        # 2. Su día del mes ya pasó o es hoy
-        # 3. No se hayan procesado este mes
-        pending_fixed = FixedExpense.objects.filter(
-            user=request.user,
-            is_active=True,
-            day_of_month__lte=today.day
-        ).exclude(
-            last_processed_date__gte=current_month_start
-        )
 
-        created_expenses = []
-        for fixed in pending_fixed:
-            # Crear el gasto real
-            expense_date = today.replace(day=min(fixed.day_of_month, today.day))
-            expense = Expense.objects.create(
-                user=request.user,
-                amount=fixed.amount,
-                currency=fixed.currency,
-                category=fixed.category,
-                description=f"{fixed.name} (Fijo)",
-                date=expense_date,
-                credit_card=fixed.credit_card,
-                bank_account=fixed.bank_account,
-            )
-            created_expenses.append(expense.id)
-
-            # Marcar como procesado
-            fixed.last_processed_date = today
-            fixed.save(update_fields=['last_processed_date'])
+        # Sin consultas si User.fixed_due_date indica que nada vence aún
+        created = process_due_fixed(request.user, today, models=[FixedExpense])
 
         return Response({
-            'processed': len(created_expenses),
-            'expense_ids': [str(id) for id in created_expenses]
+            'processed': len(created),
+            'expense_ids': [str(expense.id) for expense in created]
         })
 
 
-class FixedIncomeViewSet(viewsets.ModelViewSet):
+class FixedIncomeViewSet(ValuesListMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar ingresos fijos."""
 
     serializer_class = FixedIncomeSerializer
@@ -222,51 +553,26 @@ class FixedIncomeViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'])
     def process_pending(self, request):
-        """Convierte ingresos fijos pendientes en ingresos reales."""
+        """Convierte ingresos fijos pendientes del mes actual en ingresos reales."""
         today = timezone.now().date()
-        current_month_start = today.replace(day=1)
 
-        # Buscar ingresos fijos que:
-        # 1. Estén activos
-        # 2. Su día del mes ya pasó o es hoy
-        # 3. No se hayan procesado este mes
-        pending_fixed = FixedIncome.objects.filter(
-            user=request.user,
-            is_active=True,
-            day_of_month__lte=today.day
-        ).exclude(
-            last_processed_date__gte=current_month_start
-        )
-
-        created_incomes = []
-        for fixed in pending_fixed:
-            # Crear el ingreso real
-            income_date = today.replace(day=min(fixed.day_of_month, today.day))
-            income = Income.objects.create(
-                user=request.user,
-                amount=fixed.amount,
-                currency=fixed.currency,
-                category=fixed.category,
-                description=f"{fixed.name} (Fijo)",
-                date=income_date,
-                bank_account=fixed.bank_account,
-            )
-            created_incomes.append(income.id)
-
-            # Marcar como procesado
-            fixed.last_processed_date = today
-            fixed.save(update_fields=['last_processed_date'])
+        # Sin consultas si User.fixed_due_date indica que nada vence aún
+        created = process_due_fixed(request.user, today, models=[FixedIncome])
 
         return Response({
-            'processed': len(created_incomes),
-            'income_ids': [str(id) for id in created_incomes]
+            'processed': len(created),
+            'income_ids': [str(income.id) for income in created]
         })
 
 
-class CreditCardPaymentViewSet(viewsets.ModelViewSet):
+class CreditCardPaymentViewSet(ExportMixin, ValuesListMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar pagos de tarjetas de crédito."""
 
     serializer_class = CreditCardPaymentSerializer
+    pagination_class = TransactionPagination
+    export_name = 'credit_card_payments'
+    filter_backends = SEARCH_FILTER_BACKENDS
+    search_field = 'description'
 
     def get_queryset(self):
         queryset = CreditCardPayment.objects.filter(user=self.request.user).select_related(
@@ -274,14 +580,9 @@ class CreditCardPaymentViewSet(viewsets.ModelViewSet):
         )
 
         # Filtros
-        month = self.request.query_params.get('month')
-        year = self.request.query_params.get('year')
         credit_card_id = self.request.query_params.get('credit_card_id')
 
-        if month and year:
-            queryset = queryset.filter(date__month=month, date__year=year)
-        elif year:
-            queryset = queryset.filter(date__year=year)
+        queryset = filter_by_date(queryset, self.request.query_params)
 
         if credit_card_id:
             queryset = queryset.filter(credit_card_id=credit_card_id)
@@ -289,10 +590,12 @@ class CreditCardPaymentViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class CurrencyExchangeViewSet(viewsets.ModelViewSet):
+class CurrencyExchangeViewSet(ExportMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar cambios de divisa."""
 
     serializer_class = CurrencyExchangeSerializer
+    pagination_class = TransactionPagination
+    export_name = 'currency_exchanges'
 
     def get_queryset(self):
         queryset = CurrencyExchange.objects.filter(user=self.request.user).select_related(
@@ -300,15 +603,10 @@ class CurrencyExchangeViewSet(viewsets.ModelViewSet):
         )
 
         # Filtros
-        month = self.request.query_params.get('month')
-        year = self.request.query_params.get('year')
         from_account_id = self.request.query_params.get('from_account_id')
         to_account_id = self.request.query_params.get('to_account_id')
 
-        if month and year:
-            queryset = queryset.filter(date__month=month, date__year=year)
-        elif year:
-            queryset = queryset.filter(date__year=year)
+        queryset = filter_by_date(queryset, self.request.query_params)
 
         if from_account_id:
             queryset = queryset.filter(from_account_id=from_account_id)
@@ -317,3 +615,76 @@ class CurrencyExchangeViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(to_account_id=to_account_id)
 
         return queryset
+
+
+class DashboardView(APIView):
+    """
+    Datos de la pantalla de inicio en una sola respuesta: cuentas con sus
+    saldos, tarjetas, estadísticas de gastos del mes, presupuestos, cuotas,
+    gastos e ingresos fijos y configuración.
+
+    Cada sección es una sola consulta (las cuentas con with_balances(), las
+    estadísticas desde MonthlyRollup y los fijos con .values()), así la
+    respuesta usa ocho consultas sin importar cuántos elementos tenga el
+    usuario.
+    """
+
+    def get(self, request):
+        user = request.user
+        now = timezone.now()
+        start, _ = month_range(now.year, now.month)
+
+        fixed = {}
+        for name, model, serializer_class in (
+            ('fixed_expenses', FixedExpense, FixedExpenseSerializer),
+            ('fixed_incomes', FixedIncome, FixedIncomeSerializer),
+        ):
+            serializer = serializer_class()
+            to_dict = serializer.row_mapper()
+            rows = model.objects.filter(user=user).values(*serializer.value_columns())
+            fixed[name] = [to_dict(row) for row in rows]
+
+        # Sin configuración guardada se muestran los valores por defecto (sin crearla)
+        settings = UserSettings.objects.filter(user=user).first() or UserSettings(user=user)
+
+        return Response({
+            'bank_accounts': BankAccountSerializer(
+                BankAccount.objects.filter(user=user).with_balances(), many=True
+            ).data,
+            'credit_cards': CreditCardSerializer(CreditCard.objects.filter(user=user), many=True).data,
+            'expense_stats': ExpenseStatsSerializer(month_stats(
+                MonthlyRollup.objects.filter(user=user, kind=ROLLUP_KINDS['Expense'], count__gt=0), start
+            )).data,
+            'budgets': BudgetSerializer(
+                Budget.objects.filter(user=user).select_related('category'), many=True
+            ).data,
+            'installments': InstallmentSerializer(Installment.objects.filter(user=user), many=True).data,
+            **fixed,
+            'settings': UserSettingsSerializer(settings).data,
+        })
+
+
+class ProjectionView(APIView):
+    """
+    Proyección del saldo de cada cuenta y la deuda de cada tarjeta al cierre
+    de los próximos `months` meses (1 a 36, el primero es el actual), con
+    gastos e ingresos fijos, cuotas y fechas de pago de las tarjetas.
+    """
+
+    def get(self, request):
+        try:
+            months = int(request.query_params.get('months', DEFAULT_PROJECTION_MONTHS))
+        except ValueError:
+            months = 0
+        if not 1 <= months <= MAX_PROJECTION_MONTHS:
+            return Response(
+                {'error': f'months debe ser un entero entre 1 y {MAX_PROJECTION_MONTHS}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        today = timezone.now().date()
+        return Response({
+            'months': months,
+            'from': today.isoformat(),
+            **projection(request.user, today, months),
+        })
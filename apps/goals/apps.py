@@ -5,3 +5,6 @@ class GoalsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.goals'
     verbose_name = 'Objetivos (OKR)'
+
+    def ready(self):
+        import apps.goals.signals  # noqa: F401
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0002_keyresult_measurement_type_alter_keyresult_unit_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='objective',
+            index=models.Index(fields=['user', 'updated_at'], name='objective_user_updated_idx'),
+        ),
+    ]
@@ -81,6 +81,9 @@ class Objective(models.Model):
         verbose_name = 'Objetivo'
         verbose_name_plural = 'Objetivos'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='objective_user_updated_idx'),
+        ]
 
     def __str__(self):
         return self.title
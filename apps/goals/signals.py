@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import KeyResult, Milestone, Objective
+
+
+def touch_objective(sender, instance, raw=False, **kwargs):
+    """
+    Marca como actualizado el objetivo de un key result o milestone que cambió:
+    la sincronización envía los objetivos con sus key results y milestones
+    anidados, así que un cambio en ellos debe volver a enviar el objetivo.
+    """
+    if raw:
+        return
+    if sender is KeyResult:
+        objectives = Objective.objects.filter(pk=instance.objective_id)
+    else:
+        objectives = Objective.objects.filter(key_results=instance.key_result_id)
+    objectives.update(updated_at=timezone.now())
+
+
+for model in (KeyResult, Milestone):
+    post_save.connect(touch_objective, sender=model, dispatch_uid=f'goals_post_save_{model.__name__}')
+    post_delete.connect(touch_objective, sender=model, dispatch_uid=f'goals_post_delete_{model.__name__}')
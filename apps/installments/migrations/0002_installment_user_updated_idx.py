@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('installments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='installment',
+            index=models.Index(fields=['user', 'updated_at'], name='installment_user_updated_idx'),
+        ),
+    ]
@@ -3,8 +3,10 @@ from decimal import Decimal
 from django.conf import settings
 from django.db import models
 
+from apps.finances.models import SnapshotMixin
 
-class Installment(models.Model):
+
+class Installment(SnapshotMixin, models.Model):
     """Modelo para cuotas de compras a plazos."""
 
     class Currency(models.TextChoices):
@@ -50,6 +52,9 @@ class Installment(models.Model):
         verbose_name = 'Cuota'
         verbose_name_plural = 'Cuotas'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='installment_user_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.description} - {self.current_installment}/{self.total_installments}"
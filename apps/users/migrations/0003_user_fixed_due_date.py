@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_usersettings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='fixed_due_date',
+            field=models.DateField(blank=True, help_text='Nada de sus gastos/ingresos fijos vence antes de esta fecha (NULL: sin calcular)', null=True, verbose_name='Próximo fijo pendiente'),
+        ),
+    ]
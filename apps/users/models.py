@@ -35,6 +35,12 @@ class User(AbstractUser):
     email = models.EmailField('Email', unique=True)
     first_name = models.CharField('Nombre', max_length=150, blank=True)
     last_name = models.CharField('Apellido', max_length=150, blank=True)
+    fixed_due_date = models.DateField(
+        'Próximo fijo pendiente',
+        null=True,
+        blank=True,
+        help_text='Nada de sus gastos/ingresos fijos vence antes de esta fecha (NULL: sin calcular)'
+    )
 
     objects = UserManager()
 
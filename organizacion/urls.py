@@ -6,6 +6,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from apps.core.views import SyncView
 from apps.users.views import UserSettingsView
 
 urlpatterns = [
@@ -17,6 +18,7 @@ urlpatterns = [
     path('api/', include('apps.installments.urls')),
     path('api/', include('apps.categories.urls')),
     path('api/settings/', UserSettingsView.as_view(), name='user_settings'),
+    path('api/sync/', SyncView.as_view(), name='sync'),
 ]
 
 if settings.DEBUG: